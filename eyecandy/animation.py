@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Keyframe reduction: compile sampled animations into \\t and \\move tags
+
+An effect that sets a property frame by frame emits one event per frame.
+The samples of a property (a track) are fitted here with few linear or
+accelerated segments, each one becomes a \\t(t1,t2,accel,tags), so the
+whole animation fits in one event (one per \\move segment for positions).
+
+Example:
+>>> times = [i * 40 for i in range(26)]
+>>> scale = [100 + i * 4 for i in range(26)]
+>>> compile_animation(times, {"fscx": scale})
+[AnimatedEvent(start=0, end=1040, tags='\\\\fscx100\\\\t(0,1000,\\\\fscx200)')]
+"""
+from __future__ import absolute_import, division, print_function, with_statement
+
+import math
+from collections import OrderedDict, namedtuple
+
+try:
+    from helpers import round_format_str
+except ImportError:
+    from .helpers import round_format_str
+
+# t1, t2: ms, start/end: tuples of values, accel: \t acceleration
+Segment = namedtuple("Segment", "t1, t2, start, end, accel")
+
+# start, end: ms, tags: override tags of the event (without braces)
+AnimatedEvent = namedtuple("AnimatedEvent", "start, end, tags")
+
+MIN_ACCEL = 0.05
+MAX_ACCEL = 20
+
+
+def _number(value):
+    return round_format_str(round(value, 2), 2)
+
+
+def _alpha(tag):
+    def format(value):
+        return "\\{:s}&H{:02X}&".format(tag, min(max(int(round(value[0])), 0), 255))
+
+    return format
+
+
+def _color(tag):
+    def format(value):
+        r, g, b = (min(max(int(round(c)), 0), 255) for c in value)
+        return "\\{:s}&H{:02X}{:02X}{:02X}&".format(tag, b, g, r)
+
+    return format
+
+
+def _scalar(tag):
+    def format(value):
+        return "\\" + tag + _number(value[0])
+
+    return format
+
+
+def _pos(value):
+    return "\\pos({:s},{:s})".format(_number(value[0]), _number(value[1]))
+
+
+# Animatable properties: name -> (format, default tolerance)
+PROPERTIES = {
+    "pos": (_pos, 0.5),
+    "alpha": (_alpha("alpha"), 1),
+    "1a": (_alpha("1a"), 1),
+    "2a": (_alpha("2a"), 1),
+    "3a": (_alpha("3a"), 1),
+    "4a": (_alpha("4a"), 1),
+    "1c": (_color("1c"), 1),
+    "2c": (_color("2c"), 1),
+    "3c": (_color("3c"), 1),
+    "4c": (_color("4c"), 1),
+}
+PROPERTIES["color"] = PROPERTIES["1c"]
+for _tag, _tolerance in (
+    ("fscx", 0.5),
+    ("fscy", 0.5),
+    ("frx", 0.5),
+    ("fry", 0.5),
+    ("frz", 0.5),
+    ("fs", 0.5),
+    ("fsp", 0.1),
+    ("fax", 0.01),
+    ("fay", 0.01),
+    ("blur", 0.05),
+    ("be", 0.05),
+    ("bord", 0.05),
+    ("xbord", 0.05),
+    ("ybord", 0.05),
+    ("shad", 0.05),
+    ("xshad", 0.05),
+    ("yshad", 0.05),
+):
+    PROPERTIES[_tag] = (_scalar(_tag), _tolerance)
+
+
+def _as_tuples(values):
+    return [tuple(v) if isinstance(v, (tuple, list)) else (v,) for v in values]
+
+
+def _fit_accel(times, values, i, j):
+    """Least squares accel of values[i:j + 1] (value ~ progress ** accel)"""
+    start, end = values[i], values[j]
+    dim = max(range(len(start)), key=lambda d: abs(end[d] - start[d]))
+    delta = end[dim] - start[dim]
+    if not delta:
+        return None
+    duration = times[j] - times[i]
+    num = den = 0.0
+    for k in range(i + 1, j):
+        s = (times[k] - times[i]) / duration
+        p = (values[k][dim] - start[dim]) / delta
+        if 0 < s < 1 and 0 < p < 1:
+            ls = math.log(s)
+            num += math.log(p) * ls
+            den += ls * ls
+    if not den:
+        return None
+    return min(max(num / den, MIN_ACCEL), MAX_ACCEL)
+
+
+def _max_error(times, values, i, j, accel):
+    start, end = values[i], values[j]
+    duration = times[j] - times[i]
+    error = 0.0
+    for k in range(i + 1, j):
+        s = ((times[k] - times[i]) / duration) ** accel
+        for d, value in enumerate(values[k]):
+            error = max(error, abs(start[d] + (end[d] - start[d]) * s - value))
+    return error
+
+
+def _segment_accel(times, values, i, j, tolerance, accel):
+    """Accel of a segment from sample i to j within tolerance, or None"""
+    if _max_error(times, values, i, j, 1) <= tolerance:
+        return 1
+    if accel:
+        fitted = _fit_accel(times, values, i, j)
+        if fitted is not None:
+            if _max_error(times, values, i, j, fitted) <= tolerance:
+                return fitted
+    return None
+
+
+def fit_segments(times, values, tolerance, accel=True):
+    """Fit a sampled track with piecewise linear or accelerated segments
+
+    Every sample is within `tolerance` of its segment. The segments are
+    grown greedily, doubling their length and then bisecting, so long
+    smooth animations take O(n log n) error checks.
+
+    Parameters:
+    :param times: sample times in ms, increasing
+    :param values: sample values, numbers or tuples of numbers
+    :param tolerance: max error of a value
+    :param accel: fit \\t accelerations, only linear segments if False
+    :return: list of Segment
+    """
+    values = _as_tuples(values)
+    n = len(times)
+    if n != len(values):
+        raise ValueError("times and values must have the same length")
+    if n == 1:
+        return [Segment(times[0], times[0], values[0], values[0], 1)]
+    segments = []
+    i = 0
+    while i < n - 1:
+        # Last j known to fit, and first one known to fail
+        good, good_accel = i + 1, 1
+        bad = None
+        step = 1
+        while bad is None:
+            j = min(i + 2 * step, n - 1)
+            if j == good:
+                break
+            fit = _segment_accel(times, values, i, j, tolerance, accel)
+            if fit is None:
+                bad = j
+            else:
+                good, good_accel = j, fit
+                step *= 2
+        while bad is not None and bad - good > 1:
+            j = (good + bad) // 2
+            fit = _segment_accel(times, values, i, j, tolerance, accel)
+            if fit is None:
+                bad = j
+            else:
+                good, good_accel = j, fit
+        segments.append(
+            Segment(times[i], times[good], values[i], values[good], good_accel)
+        )
+        i = good
+    return segments
+
+
+def _tolerance(name, tolerance):
+    if tolerance is None:
+        return PROPERTIES[name][1]
+    if isinstance(tolerance, dict):
+        return tolerance.get(name, PROPERTIES[name][1])
+    return tolerance
+
+
+def _window(times, values, t1, t2):
+    """Samples of a track between t1 and t2 (inclusive)"""
+    keep = [k for k, time in enumerate(times) if t1 <= time <= t2]
+    return [times[k] for k in keep], [values[k] for k in keep]
+
+
+def _transforms(tracks, offset, tolerance, accel):
+    """Initial tags and \\t tags of the tracks, times relative to offset"""
+    initial = []
+    transforms = OrderedDict()
+    for name, (times, values) in tracks.items():
+        format = PROPERTIES[name][0]
+        segments = fit_segments(times, values, _tolerance(name, tolerance), accel)
+        initial.append(format(segments[0].start))
+        for segment in segments:
+            if format(segment.start) == format(segment.end):
+                continue
+            key = (
+                int(round(segment.t1 - offset)),
+                int(round(segment.t2 - offset)),
+                round_format_str(segment.accel, 3),
+            )
+            transforms.setdefault(key, []).append(format(segment.end))
+    tags = "".join(initial)
+    for (t1, t2, accel_str), modifiers in transforms.items():
+        if accel_str == "1":
+            tags += "\\t({:d},{:d},{:s})".format(t1, t2, "".join(modifiers))
+        else:
+            tags += "\\t({:d},{:d},{:s},{:s})".format(
+                t1, t2, accel_str, "".join(modifiers)
+            )
+    return tags
+
+
+def compile_animation(times, tracks, tolerance=None, accel=True, end=None):
+    """Compile sampled tracks to events with \\move and \\t tags
+
+    The "pos" track becomes a \\move (one event per linear segment, an
+    event can only have one \\move), the other tracks become an initial
+    value and a \\t for each segment. Segments with the same times share
+    their \\t.
+
+    Parameters:
+    :param times: sample times in ms (e.g. the frame start times)
+    :param tracks: dict of property name (see PROPERTIES) -> values, a
+        number per sample, or a tuple for "pos" (x, y) and colors (r, g, b)
+    :param tolerance: max error, None for the default of each property,
+        or a dict of property name -> tolerance
+    :param accel: use accelerated \\t
+    :param end: end time of the last event, by default one sample after
+        the last sample time
+    :return: list of AnimatedEvent, times in ms and tags relative to the
+        event start
+    """
+    times = list(times)
+    if not times:
+        return []
+    for name, values in tracks.items():
+        if name not in PROPERTIES:
+            raise ValueError("Unknown animation property: {!r}".format(name))
+        if len(values) != len(times):
+            raise ValueError("The {!r} track must have a value per time".format(name))
+    if end is None:
+        end = times[-1] + (times[-1] - times[-2] if len(times) > 1 else 0)
+    others = OrderedDict(
+        (name, (times, values)) for name, values in tracks.items() if name != "pos"
+    )
+    if "pos" in tracks:
+        windows = fit_segments(
+            times, tracks["pos"], _tolerance("pos", tolerance), accel=False
+        )
+    else:
+        windows = [Segment(times[0], times[-1], None, None, 1)]
+    events = []
+    for n, window in enumerate(windows):
+        start = window.t1
+        stop = windows[n + 1].t1 if n + 1 < len(windows) else end
+        tags = ""
+        if window.start is not None:
+            x1, y1 = window.start
+            x2, y2 = window.end
+            if _pos(window.start) == _pos(window.end):
+                tags = _pos(window.start)
+            else:
+                tags = "\\move({:s},{:s},{:s},{:s},{:d},{:d})".format(
+                    _number(x1),
+                    _number(y1),
+                    _number(x2),
+                    _number(y2),
+                    0,
+                    int(round(window.t2 - start)),
+                )
+        tracks_window = OrderedDict(
+            (name, _window(track_times, values, window.t1, window.t2))
+            for name, (track_times, values) in others.items()
+        )
+        tags += _transforms(tracks_window, start, tolerance, accel)
+        events.append(AnimatedEvent(start, stop, tags))
+    return events
@@ -8,15 +8,24 @@ import operator
 import random
 import re
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 try:
     import color
     import interpolate
-    from color import Color
+    from color import Color, hex_color
     from helpers import round_format_str
+    from shape import format_drawing, format_number, shape_cache, simplify_drawing
+    from svg import svg_to_ass as _svg_to_ass
 except ImportError:
     from . import color, interpolate
-    from .color import Color
+    from .color import Color, hex_color
     from .helpers import round_format_str
+    from .shape import format_drawing, format_number, shape_cache, simplify_drawing
+    from .svg import svg_to_ass as _svg_to_ass
 
 
 def distanceND(p1, p2):
@@ -240,7 +249,7 @@ def c(arg1, arg2=None):
         if isinstance(arg2, Color):
             color = arg2
         else:
-            color = Color.from_hex(arg2)
+            color = hex_color(arg2)
         if tipo not in (1, 2, 3, 4):
             raise ValueError(
                 "\n\nc(tipo,valor):\n<tipo> solo acepta" " numeros entre 1 y 4"
@@ -251,7 +260,7 @@ def c(arg1, arg2=None):
         if isinstance(arg1, Color):
             color = arg1
         else:
-            color = Color.from_hex(arg1)
+            color = hex_color(arg1)
         return "\\c{:s}".format(color.ass)
 
 
@@ -299,6 +308,10 @@ def a(arg1, arg2=None):
         return "\\alpha&H{:s}&".format(alfa)
 
 
+# Valid \an positions
+ALIGNMENTS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+
+
 def an(pos=5):
     """
     Alineamiento del texto.
@@ -314,10 +327,10 @@ def an(pos=5):
     8: Arriba centro
     9: Arriba derecha
     """
-    apos = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-    if pos not in apos:
+    if pos not in ALIGNMENTS:
         raise ValueError(
-            "\n\nan(pos):\n<pos> solo acepta los " "sigientes valores: " + str(apos)
+            "\n\nan(pos):\n<pos> solo acepta los "
+            "sigientes valores: " + str(list(ALIGNMENTS))
         )
     else:
         return "\\an{:d}".format(pos)
@@ -442,21 +455,28 @@ def t(arg1, arg2=None, arg3=None, arg4=None):
         )
 
 
-def clip(x1, y1=None, x2=None, y2=None, reverse=False):
+def clip(x1, y1=None, x2=None, y2=None, reverse=False, tolerance=None):
     """
     Clip del texto, la parte encerrada en el texto es visible.
 
     clip(x1, x2, x3, x4)
     clip(vector)
+    clip(scale, vector)
+
+    @tolerance: simplifica el clip vectorial (ver simplify_shape)
     """
     tipo = ""
     if reverse:
         tipo = "i"
     if y1 == None and x2 == None and y2 == None:
         vector = x1  # clip vectorial
+        if tolerance:
+            vector = simplify_shape(vector, tolerance)
         return "\\{:s}clip({:s})".format(tipo, vector)
     elif x2 == None and y2 == None:
         scale, vector = x1, y1  # clip vectorial
+        if tolerance:
+            vector = simplify_shape(vector, tolerance, scale)
         return "\\{:s}clip({:d},{:s})".format(tipo, scale, vector)
     else:
         x1, y1 = int(math.ceil(x1)), int(math.ceil(y1))
@@ -611,27 +631,26 @@ def shape_poligon(radio, lados):
     poligon(15, 5)
     >>>
     """
+    if numpy is not None:
+        return str(shape_cache.polygon(radio, lados)) + " "
     iangle = 360 / lados
     # horizontal symmetry position
     if lados % 2 != 0:
         angle = 90 + (iangle / 2)
     else:
         angle = 90
-    pdraw = []
+    # radius 1 centered at (1, 1) scaled by radio, as shape_cache
+    points = []
     for i in range(lados + 1):
-        # ass draw commands
-        if i == 0:
-            dcommand = "m"  # start drawing
-        else:
-            dcommand = "l"  # join points with lines
         # convert polar to rectangular
-        pdraw.append(draw(dcommand, *polar2rec(radio, angle)))
-        angle += iangle
-
-    return translate_shape("".join(pdraw), radio, radio)
+        x, y = polar2rec(1, angle + i * iangle)
+        points += [(1 + x) * radio, (1 + y) * radio]
+    return format_drawing((("m", 1), ("l", lados)), points) + " "
 
 
 def shape_star(radio1, radio2, spikes):
+    if numpy is not None:
+        return str(shape_cache.star(radio1, radio2, spikes)) + " "
     # the smallest radio is always the inner circle
     if radio1 > radio2:
         radio1, radio2 = radio2, radio1
@@ -642,19 +661,15 @@ def shape_star(radio1, radio2, spikes):
     else:
         angle1 = 90
     angle2 = angle1 + (iangle / 2)
-    pdraw = []
+    # outer radius 1 centered at (1, 1) scaled by radio2, as shape_cache
+    ratio = radio1 / radio2 if radio2 else 0.0
+    points = []
     for i in range(spikes + 1):
-        # ass draw commands
-        if i == 0:
-            dcommand = "m"  # start drawing
-        else:
-            dcommand = "l"  # join points with lines
         # convert polar to rectangular
-        pdraw.append(draw(dcommand, *polar2rec(radio1, angle1)))
-        pdraw.append(draw("l", *polar2rec(radio2, angle2)))
-        angle1 += iangle
-        angle2 += iangle
-    return translate_shape("".join(pdraw), radio2, radio2)
+        for radio, angle in ((ratio, angle1), (1, angle2)):
+            x, y = polar2rec(radio, angle + i * iangle)
+            points += [(1 + x) * radio2, (1 + y) * radio2]
+    return format_drawing((("m", 1), ("l", 2 * spikes + 1)), points) + " "
 
 
 def shape_pentagon(r):
@@ -670,9 +685,17 @@ def shape_pentagon(r):
 
 
 def shape_circle(radio, substract=False):
+    if numpy is not None:
+        return str(shape_cache.circle(radio, substract)) + " "
+    return _circle(radio, substract)
+
+
+def _circle(radio, substract=False, offset=0):
+    """Drawing of shape_circle without NumPy, translated by `offset`"""
+
     def resize(m):
-        num = (float(m.group(0)) / 100) * radio * 2
-        return round_format_str(num, 2)
+        num = float(m.group(0)) * 0.01 * (radio * 2) + offset
+        return format_number(num)
 
     def swap_coords(m):
         return m.group(2) + " " + m.group(1)
@@ -763,31 +786,33 @@ def shape_triangle(size):
 
 
 def shape_ring(radio, outline_width):
+    if numpy is not None:
+        return str(shape_cache.ring(radio, outline_width)) + " "
     radio2 = radio - outline_width
-    circle2 = shape_circle(radio2, substract=True)
-    circle2 = translate_shape(circle2, -radio2, -radio2)
-    circle2 = translate_shape(circle2, radio, radio)
-    return shape_circle(radio) + circle2
+    return _circle(radio) + _circle(radio2, True, outline_width)
 
 
 def shape_heart(size=30):
+    if numpy is not None:
+        return str(shape_cache.heart(size))
+
     def resize(m):
-        num = (float(m.group(0)) / 30) * size
-        return round_format_str(num, 2)
+        num = float(m.group(0)) * (1 / 30) * size
+        return format_number(num)
 
     path = "m 15 30 b 27 22 30 18 30 14 30 8 22 " "0 15 10 8 0 0 8 0 14 0 18 3 22 15 30"
     return re.sub("\d+", resize, path)
 
 
 def shape_filter(shape, function):
-    return re.sub("(-?\d+.d+|-?\d+)\s(-?\d+.d+|-?\d+)", function, shape)
+    return re.sub(r"(-?\d+(?:\.\d+)?)\s(-?\d+(?:\.\d+)?)", function, shape)
 
 
 def shape_max(shape):
     def abs_float(n):
         return abs(float(n))
 
-    pattern = "(-?\d+.d+|-?\d+)\s(-?\d+.d+|-?\d+)"
+    pattern = r"(-?\d+(?:\.\d+)?)\s(-?\d+(?:\.\d+)?)"
     coords = [list(map(abs_float, n)) for n in re.findall(pattern, shape)]
     maxx = max(coords, key=operator.itemgetter(0))[0]
     maxy = max(coords, key=operator.itemgetter(1))[1]
@@ -798,7 +823,7 @@ def shape_min(shape):
     def abs_float(n):
         return abs(float(n))
 
-    pattern = "(-?\d+.d+|-?\d+)\s(-?\d+.d+|-?\d+)"
+    pattern = r"(-?\d+(?:\.\d+)?)\s(-?\d+(?:\.\d+)?)"
     coords = [map(abs_float, n) for n in re.findall(pattern, shape)]
     maxx = min(coords, key=operator.itemgetter(0))[0]
     maxy = min(coords, key=operator.itemgetter(1))[1]
@@ -858,8 +883,23 @@ def flip_shape(shape):
     return shape_filter(shape, flip)
 
 
+def simplify_shape(shape, tolerance=0.25, scale=1):
+    """
+    Simplifica un dibujo: las curvas se convierten en lineas y se quitan
+    los puntos a menos de `tolerance` pixeles (Ramer-Douglas-Peucker).
+    Menos puntos se dibujan mas rapido en VSFilter/libass.
+
+    @scale: escala del dibujo (\\p o \\clip)
+
+    Ejemplo:
+    >>> simplify_shape("m 0 0 l 1 0.01 2 0 4 0 4 4 0 4")
+    'm 0 0 l 4 0 4 4 0 4'
+    """
+    return simplify_drawing(shape, tolerance, scale)[0]
+
+
 def shape_to_bezier(steps, shape):
-    pattern = "(-?\d+.d+|-?\d+)\s(-?\d+.d+|-?\d+)"
+    pattern = r"(-?\d+(?:\.\d+)?)\s(-?\d+(?:\.\d+)?)"
     mx, my = map(float, re.search("m\s" + pattern, shape).groups())
     shape = re.search("b\s(.*)", shape).group(0).replace("b ", "")
     points_str = re.findall(pattern, shape)
@@ -869,10 +909,19 @@ def shape_to_bezier(steps, shape):
     return bezier_curve_range(steps, points)
 
 
-# TODO: SVG path to Qt path to ASS shape or SVG to ASS
-# def svg_to_ass(svg):
-#     svg_commands = 'MmLlHhVvCcSsQqTtZz'
-#     ass_commands "mlbsc"
+def svg_to_ass(svg, tolerance=None):
+    """ASS drawing of SVG path data, an SVG document or an SVG file
+
+    Quadratic curves and arcs are converted to cubic curves, the
+    transforms are applied. Documents are cached by content (see
+    svg.SvgCache).
+
+    @tolerance: simplify the drawing (see simplify_shape)
+
+    >>> svg_to_ass("M 0 0 h 10 v 10 Q 0 10 0 0 z")
+    'm 0 0 l 10 0 10 10 b 3.33 10 0 6.67 0 0'
+    """
+    return _svg_to_ass(svg, tolerance)
 
 
 if __name__ == "__main__":
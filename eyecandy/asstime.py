@@ -1,7 +1,16 @@
 #!/usr/bin/env python
 # -*- coding:utf-8 -*-
+import bisect
+import codecs
 import fractions
+import math
 import re
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 FPS_NTSC_FILM = fractions.Fraction(24000, 1001)
 FPS_NTSC = fractions.Fraction(30000, 1001)
@@ -14,9 +23,14 @@ FPS_PAL_QUAD = 100
 
 RE_STRTIME = re.compile("(\d):(\d+):(\d+).(\d+)")
 
+# Karaoke timestamps repeat a lot, memoize the conversions.
+# The tables are emptied when they reach the max size.
+MAX_CACHED_TIMES = 1 << 16
+_strtime_cache = {}
+_ms_cache = {}
 
-def ms_to_strtime(timems):
-    """Convert Milliseconds to ASS string time"""
+
+def _format_strtime(timems):
     s, ms = divmod(timems, 1000)
     m, s = divmod(s, 60)
     h, m = divmod(m, 60)
@@ -24,6 +38,30 @@ def ms_to_strtime(timems):
     return "{:01d}:{:02d}:{:02d}.{:02d}".format(h, m, s, cs)
 
 
+def ms_to_strtime(timems):
+    """Convert Milliseconds to ASS string time"""
+    if type(timems) is not int:
+        # Only ints are cached: 1000.0 and True would share their keys
+        return _format_strtime(timems)
+    try:
+        return _strtime_cache[timems]
+    except KeyError:
+        strtime = _format_strtime(timems)
+        if len(_strtime_cache) >= MAX_CACHED_TIMES:
+            _strtime_cache.clear()
+        _strtime_cache[timems] = strtime
+        return strtime
+
+
+def ms_array_to_strtime(times):
+    """Convert a sequence of Milliseconds to a list of ASS string times"""
+    cache = _strtime_cache
+    return [
+        cache[ms] if type(ms) is int and ms in cache else ms_to_strtime(ms)
+        for ms in times
+    ]
+
+
 def ms_to_cs(ms):
     """Convert Millisecons to Centiseconds"""
     return ms / 10
@@ -35,7 +73,12 @@ def ms_to_s(ms):
 
 
 def ms_to_frames(ms, framerate=FPS_NTSC_FILM):
-    """Convert Frames to Milliseconds"""
+    """Convert Milliseconds to Frames
+
+    @framerate: constant framerate or `Timecodes` of a VFR video
+    """
+    if isinstance(framerate, Timecodes):
+        return framerate.ms_to_frame(ms)
     return int(math.floor(framerate * ms_to_s(ms)))
 
 
@@ -80,7 +123,12 @@ def s_to_frames(s, framerate=FPS_NTSC_FILM):
 
 
 def frames_to_s(frames, framerate=FPS_NTSC_FILM):
-    """Convert Frames to Seconds"""
+    """Convert Frames to Seconds
+
+    @framerate: constant framerate or `Timecodes` of a VFR video
+    """
+    if isinstance(framerate, Timecodes):
+        return ms_to_s(framerate.frame_to_ms(frames))
     return frames / framerate
 
 
@@ -99,14 +147,39 @@ def frames_to_strtime(frames, framerate):
     return s_to_strtime(frames_to_s(frames, framerate))
 
 
-def strtime_to_ms(time):
-    """Convert ASS string time to Milliseconds"""
+def _parse_strtime(time):
     # H:MM:SS.CC (H=Hour, M=Minute, S=Second, C=centisecond)
+    if len(time) == 10 and time[1] == ":" and time[4] == ":":
+        # Fixed positions, no need of a regex
+        return (
+            int(time[0]) * 3600000
+            + int(time[2:4]) * 60000
+            + int(time[5:7]) * 1000
+            + int(time[8:10]) * 10
+        )
     return struct_to_ms(*strtime_to_struct(time))
 
 
+def strtime_to_ms(time):
+    """Convert ASS string time to Milliseconds"""
+    try:
+        return _ms_cache[time]
+    except KeyError:
+        ms = _parse_strtime(time)
+        if len(_ms_cache) >= MAX_CACHED_TIMES:
+            _ms_cache.clear()
+        _ms_cache[time] = ms
+        return ms
+
+
+def strtime_array_to_ms(times):
+    """Convert a sequence of ASS string times to an `array` of Milliseconds"""
+    cache = _ms_cache
+    return array("l", [cache[t] if t in cache else strtime_to_ms(t) for t in times])
+
+
 def strtime_to_struct(time):
-    return map(int, re.match(RE_STRTIME, time).groups())
+    return tuple(map(int, re.match(RE_STRTIME, time).groups()))
 
 
 def struct_to_ms(h, m, s, cs):
@@ -128,34 +201,71 @@ def strtime_to_frames(time):
     return ms_to_frames(strtime_to_ms(time))
 
 
+def _time_ms(time):
+    """Milliseconds of a `Time` or number"""
+    if isinstance(time, Time):
+        return time._ms
+    return time
+
+
+def _from_ms(ms):
+    """New `Time` from integer milliseconds, without rounding"""
+    time = _new_object(Time)
+    _set_ms(time, ms)
+    _set_strtime(time, None)
+    return time
+
+
+_new_object = object.__new__
+
+
 class Time(object):
 
-    """Time Object"""
+    """Time Object
+
+    Times are immutable and hashable, they compare (and hash) equal to
+    their value in milliseconds.
+    """
+
+    __slots__ = ("_ms", "_strtime")
 
     def __init__(self, time=None):
-        if time:
-            self.ms = int(round(time))
-        else:
-            self.ms = 0
+        _set_ms(self, int(round(time)) if time else 0)
+        _set_strtime(self, None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Time objects are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Time objects are immutable")
+
+    @property
+    def ms(self):
+        """Get time in milliseconds"""
+        return self._ms
 
     @property
     def cs(self):
         """Get time in centiseconds"""
-        return ms_to_cs(self.ms)
+        return ms_to_cs(self._ms)
 
     @property
     def s(self):
         """Get time in seconds"""
-        return ms_to_s(self.ms)
+        return ms_to_s(self._ms)
 
     def frames(self, framerate=FPS_NTSC_FILM):
         """Get time in number of frames"""
-        return ms_to_frames(self.ms, framerate)
+        return ms_to_frames(self._ms, framerate)
 
     @property
     def strtime(self):
         """Get time in ASS string time"""
-        return ms_to_strtime(self.ms)
+        strtime = self._strtime
+        if strtime is None:
+            strtime = ms_to_strtime(self._ms)
+            _set_strtime(self, strtime)
+        return strtime
 
     @classmethod
     def from_cs(cls, cs):
@@ -190,115 +300,453 @@ class Time(object):
 
     def __sub__(self, other):
         """Substraction of times"""
-        if isinstance(other, int):
-            return Time(self.ms - other)
-        elif isinstance(other, float):
-            return Time(self.ms - other)
-        else:
-            return Time(self.ms - other.ms)
-
-    __rsub__ = __sub__
-
-    def __div__(self, other):
-        """Divition of times"""
-        if isinstance(other, int):
-            return Time(self.ms / other)
-        elif isinstance(other, float):
-            return Time(self.ms / other)
-        else:
-            return Time(self.ms / other.ms)
+        if type(other) is int:
+            return _from_ms(self._ms - other)
+        elif isinstance(other, Time):
+            return _from_ms(self._ms - other._ms)
+        return Time(self._ms - other)
 
-    __rdiv__ = __div__
+    def __rsub__(self, other):
+        if type(other) is int:
+            return _from_ms(other - self._ms)
+        return Time(other - self._ms)
 
     def __truediv__(self, other):
         """Divition of times"""
-        if isinstance(other, int):
-            return Time(self.ms / float(other))
-        elif isinstance(other, float):
-            return Time(self.ms / other)
-        else:
-            return Time(self.ms / other.ms)
+        return Time(self._ms / _time_ms(other))
+
+    def __rtruediv__(self, other):
+        return Time(other / self._ms)
 
-    __rtruediv__ = __truediv__
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
 
     def __add__(self, other):
         """Addition of times"""
-        if isinstance(other, int):
-            return Time(self.ms + other)
-        elif isinstance(other, float):
-            return Time(self.ms + other)
-        else:
-            return Time(self.ms + other.ms)
+        if type(other) is int:
+            return _from_ms(self._ms + other)
+        elif isinstance(other, Time):
+            return _from_ms(self._ms + other._ms)
+        return Time(self._ms + other)
 
     __radd__ = __add__
 
     def __mul__(self, other):
         """Multiplication of times"""
-        if isinstance(other, int):
-            return Time(self.ms * other)
-        elif isinstance(other, float):
-            return Time(self.ms * other)
-        else:
-            return Time(self.ms * other.ms)
+        if type(other) is int:
+            return _from_ms(self._ms * other)
+        return Time(self._ms * _time_ms(other))
 
     __rmul__ = __mul__
 
-    def __ne__(self, other):
-        return not self.__eq__(other)
+    def __hash__(self):
+        return hash(self._ms)
 
     def __eq__(self, other):
         if isinstance(other, Time):
-            return self.ms == other.ms
-        else:
-            return self.ms == other
+            return self._ms == other._ms
+        return self._ms == other
 
-    def __cmp__(self, other):
-        t1 = self.ms
+    def __ne__(self, other):
         if isinstance(other, Time):
-            t2 = other.ms
-        else:
-            t2 = other
-        if t1 == t2:
-            return 0
-        elif t1 > t2:
-            return 1
-        elif t1 < t2:
-            return -1
+            return self._ms != other._ms
+        return self._ms != other
 
     def __lt__(self, other):
-        t1 = self.ms
         if isinstance(other, Time):
-            t2 = other.ms
-        else:
-            t2 = other
-        return t1 < t2
+            return self._ms < other._ms
+        return self._ms < other
 
     def __le__(self, other):
-        t1 = self.ms
         if isinstance(other, Time):
-            t2 = other.ms
-        else:
-            t2 = other
-        return t1 <= t2
+            return self._ms <= other._ms
+        return self._ms <= other
 
     def __gt__(self, other):
-        t1 = self.ms
         if isinstance(other, Time):
-            t2 = other.ms
-        else:
-            t2 = other
-        return t1 > t2
+            return self._ms > other._ms
+        return self._ms > other
 
     def __ge__(self, other):
-        t1 = self.ms
         if isinstance(other, Time):
-            t2 = other.ms
-        else:
-            t2 = other
-        return t1 >= t2
+            return self._ms >= other._ms
+        return self._ms >= other
+
+    def __cmp__(self, other):
+        t1, t2 = self._ms, _time_ms(other)
+        return (t1 > t2) - (t1 < t2)
+
+    def __reduce__(self):
+        return Time, (self._ms,)
 
     def __str__(self):
         return "<Time " + self.strtime + " >"
 
     def __repr__(self):
         return repr("<Time " + self.strtime + " >")
+
+
+# Slot setters, the only way to set the attributes of an immutable `Time`
+_set_ms = Time._ms.__set__
+_set_strtime = Time._strtime.__set__
+
+
+def floor_cs(ms):
+    """Round down Milliseconds to the centisecond precision of ASS times"""
+    return int(ms // 10) * 10
+
+
+class Timecodes(object):
+
+    """Frame timestamps of a (VFR) video
+
+    Frames are looked up with `bisect` in the sorted array of timestamps.
+    Times past the last frame are extrapolated with the duration of the
+    last frame.
+
+    Parameters:
+    :param timestamps: sorted start time, in milliseconds, of every frame
+    """
+
+    def __init__(self, timestamps):
+        self._timestamps = array("d", timestamps)
+        if len(self._timestamps) < 2:
+            raise ValueError("Timecodes need at least two frames")
+        self._last_duration = self._timestamps[-1] - self._timestamps[-2]
+
+    @classmethod
+    def from_fps(cls, framerate, frames):
+        """Create new constant framerate `Timecodes`
+
+        @framerate: frames per second
+        @frames: number of frames
+        """
+        return cls(frames_to_ms(frame, framerate) for frame in range(frames))
+
+    @classmethod
+    def from_file(cls, filename, frames=None):
+        """Create new `Timecodes` from a timecode file (format v1 or v2)
+
+        @filename: timecode file
+        @frames: number of frames of the video (v1 files only), by default
+        the frames up to the end of the last range
+        """
+        with codecs.open(filename, "r", "utf-8-sig") as f:
+            lines = [line.strip() for line in f]
+        header = lines[0].lower() if lines else ""
+        lines = [line for line in lines[1:] if line and not line.startswith("#")]
+        if header.startswith("# timecode format v2"):
+            return cls(float(line) for line in lines)
+        elif header.startswith("# timecode format v1"):
+            return cls(_v1_timestamps(lines, frames))
+        raise ValueError("*%s* is not a v1 or v2 timecode file" % filename)
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    @property
+    def timestamps(self):
+        """Start time in milliseconds of every frame"""
+        return self._timestamps
+
+    def frame_to_ms(self, frame):
+        """Start time in Milliseconds of a frame"""
+        last = len(self._timestamps) - 1
+        if 0 <= frame <= last:
+            return self._timestamps[frame]
+        inside = last if frame > last else 0
+        return self._timestamps[inside] + (frame - inside) * self._last_duration
+
+    def ms_to_frame(self, ms):
+        """Frame displayed at the time in Milliseconds"""
+        timestamps = self._timestamps
+        last = len(timestamps) - 1
+        if ms >= timestamps[last]:
+            return last + int((ms - timestamps[last]) // self._last_duration)
+        return max(bisect.bisect_right(timestamps, ms) - 1, 0)
+
+    def frames_to_ms(self, frames):
+        """Start times in Milliseconds of a sequence of frames"""
+        if numpy is not None:
+            frames = numpy.asarray(frames, dtype=numpy.int64)
+            timestamps = numpy.frombuffer(self._timestamps)
+            last = len(timestamps) - 1
+            inside = numpy.clip(frames, 0, last)
+            extra = (frames - inside) * self._last_duration
+            return array("d", (timestamps[inside] + extra).tobytes())
+        return array("d", [self.frame_to_ms(frame) for frame in frames])
+
+    def ms_to_frames(self, times):
+        """Frames displayed at a sequence of times in Milliseconds"""
+        if numpy is not None:
+            times = numpy.asarray(times, dtype=numpy.float64)
+            timestamps = numpy.frombuffer(self._timestamps)
+            last = len(timestamps) - 1
+            frames = numpy.searchsorted(timestamps, times, side="right") - 1
+            past = times >= timestamps[last]
+            extra = (times[past] - timestamps[last]) // self._last_duration
+            frames[past] = last + extra.astype(numpy.int64)
+            return array("l", numpy.maximum(frames, 0).astype("l").tobytes())
+        return array("l", [self.ms_to_frame(ms) for ms in times])
+
+    def frame_start(self, frame):
+        """ASS time (ms) where the frame begins to be displayed"""
+        if frame <= 0:
+            return 0
+        return floor_cs(self.frame_to_ms(frame))
+
+    def snap(self, start, end):
+        """Snap the start/end times (ms) of an event to frame boundaries
+
+        The event starts at the first frame displayed at or after `start`
+        and ends before the first frame displayed at or after `end`.
+        """
+        return self.frame_start(self._first_frame(start)), self.frame_start(
+            self._first_frame(end)
+        )
+
+    def snap_array(self, starts, ends):
+        """Snap sequences of start/end times (ms), return (starts, ends)
+
+        Same as `snap` for every event, computed at once with NumPy.
+        """
+        if numpy is None:
+            snapped = [self.snap(start, end) for start, end in zip(starts, ends)]
+            return (
+                array("l", [start for start, end in snapped]),
+                array("l", [end for start, end in snapped]),
+            )
+        starts = self._frame_starts(self._first_frames(starts))
+        ends = self._frame_starts(self._first_frames(ends))
+        return array("l", starts.tobytes()), array("l", ends.tobytes())
+
+    def _first_frames(self, times):
+        """`_first_frame` of a sequence of times (ms), as a NumPy array"""
+        times = numpy.asarray(times, dtype=numpy.float64)
+        frames = numpy.frombuffer(self.ms_to_frames(times), "l").copy()
+        frames += numpy.frombuffer(self.frames_to_ms(frames)) < times
+        return frames
+
+    def _frame_starts(self, frames):
+        """`frame_start` of a NumPy array of frames"""
+        ms = numpy.frombuffer(self.frames_to_ms(frames))
+        starts = (ms // 10).astype("l") * 10
+        starts[frames <= 0] = 0
+        return starts
+
+    def _first_frame(self, ms):
+        """First frame displayed at or after the time in Milliseconds"""
+        frame = self.ms_to_frame(ms)
+        if self.frame_to_ms(frame) < ms:
+            frame += 1
+        return frame
+
+    def frame_range(self, start, end):
+        """Every frame displayed between the times start and end (ms)
+
+        Yields (frame, start, end) with the ASS times (ms) of each frame,
+        to generate exactly one event per frame of the video.
+        """
+        first = self._first_frame(start)
+        last = self._first_frame(end)
+        frame_start = self.frame_start
+        fstart = frame_start(first)
+        for frame in range(first, last):
+            fend = frame_start(frame + 1)
+            yield frame, fstart, fend
+            fstart = fend
+
+    def __repr__(self):
+        return "<{:s} {:d} frames>".format(self.__class__.__name__, len(self))
+
+
+def _v1_timestamps(lines, frames=None):
+    """Frame timestamps from the lines of a v1 timecode file"""
+    assume = float(lines[0].split()[-1])  # Assume 29.970
+    ranges = []
+    for line in lines[1:]:
+        start, end, fps = line.split(",")
+        ranges.append((int(start), int(end), float(fps)))
+    ranges.sort()
+    if frames is None:
+        frames = ranges[-1][1] + 1 if ranges else 2
+    fps = [assume] * frames
+    for start, end, rfps in ranges:
+        for frame in range(start, min(end + 1, frames)):
+            fps[frame] = rfps
+    timestamps = []
+    ms = 0.0
+    for frame in range(frames):
+        timestamps.append(ms)
+        ms += 1000 / fps[frame]
+    return timestamps
+
+
+# Frame types of the lines of a XviD pass file (intra, predicted,
+# bidirectional, sprite)
+XVID_FRAME_TYPES = frozenset("ipbs")
+
+
+class Keyframes(object):
+
+    """Scene change keyframes of a video
+
+    Keyframes are kept as a sorted array of ASS times (ms), where each
+    keyframe begins to be displayed, and looked up with `bisect`.
+
+    Parameters:
+    :param frames: keyframe numbers
+    :param timecodes: `Timecodes` of the video
+    """
+
+    def __init__(self, frames, timecodes):
+        self._frames = array("l", sorted(set(frames)))
+        if not self._frames:
+            raise ValueError("Keyframes need at least one keyframe")
+        self._times = array("l", [timecodes.frame_start(f) for f in self._frames])
+
+    @classmethod
+    def from_file(cls, filename, timecodes=None):
+        """Create new `Keyframes` from an Aegisub keyframe file, a XviD
+        pass file or a x264 stats file
+
+        @filename: keyframe file
+        @timecodes: `Timecodes` of the video, by default the fps of the
+        keyframe file (or FPS_NTSC_FILM)
+        """
+        with codecs.open(filename, "r", "utf-8-sig") as f:
+            lines = [line.strip() for line in f]
+        fps = FPS_NTSC_FILM
+        header = lines[0].lower() if lines else ""
+        if header.startswith("# keyframe format v1"):
+            frames = []
+            for line in lines[1:]:
+                if line.startswith("fps"):
+                    fps = float(line.split()[1]) or fps
+                elif line and not line.startswith("#"):
+                    frames.append(int(line))
+        elif header.startswith("# xvid"):
+            # One line per frame starting with its type, "i" for the intra
+            # (key) frames; headers and comments are not frames
+            frames = []
+            count = 0
+            for line in lines[1:]:
+                kind = line[:1].lower()
+                if kind and kind in XVID_FRAME_TYPES:
+                    if kind == "i":
+                        frames.append(count)
+                    count += 1
+        elif header.startswith("#options"):
+            # x264 stats: in:<frame> out:<frame> type:<I|i|P|B|b> ...
+            frames = []
+            for line in lines[1:]:
+                fields = dict(field.split(":", 1) for field in line.split()[:3])
+                if fields.get("type") in ("I", "i"):
+                    frames.append(int(fields["in"]))
+        else:
+            raise ValueError("*%s* is not a supported keyframe file" % filename)
+        if timecodes is None:
+            # Every frame up to the last keyframe, nothing extrapolated
+            timecodes = Timecodes.from_fps(fps, max(frames or [0]) + 2)
+        return cls(frames, timecodes)
+
+    def __len__(self):
+        return len(self._frames)
+
+    @property
+    def frames(self):
+        """Keyframe numbers"""
+        return self._frames
+
+    @property
+    def times(self):
+        """ASS times (ms) of the keyframes"""
+        return self._times
+
+    def nearest(self, ms):
+        """ASS time (ms) of the keyframe nearest to the time"""
+        times = self._times
+        i = bisect.bisect_left(times, ms)
+        if i == 0:
+            return times[0]
+        elif i == len(times):
+            return times[-1]
+        before, after = times[i - 1], times[i]
+        return before if ms - before <= after - ms else after
+
+    def snap(self, times, threshold=200):
+        """Move the times (ms) within threshold ms of a keyframe to it
+
+        Return a new `array` of times.
+        """
+        if numpy is not None:
+            times = numpy.asarray(times, dtype=numpy.int64)
+            keytimes = numpy.frombuffer(self._times, self._times.typecode)
+            i = numpy.searchsorted(keytimes, times)
+            after = keytimes[numpy.minimum(i, len(keytimes) - 1)]
+            before = keytimes[numpy.maximum(i - 1, 0)]
+            nearest = numpy.where(times - before <= after - times, before, after)
+            snapped = numpy.where(abs(nearest - times) <= threshold, nearest, times)
+            return array("l", snapped.astype("l").tobytes())
+        nearest = self.nearest
+        snapped = array("l")
+        for ms in times:
+            key = nearest(ms)
+            snapped.append(key if abs(key - ms) <= threshold else ms)
+        return snapped
+
+    def __repr__(self):
+        return "<{:s} {:d} keyframes>".format(self.__class__.__name__, len(self))
+
+
+def _benchmark_strtime(n=1000000):
+    """Compare the timestamp conversions with the regex/divmod ones"""
+    import random
+    import timeit
+
+    def regex_strtime_to_ms(time):
+        return struct_to_ms(*map(int, re.match(RE_STRTIME, time).groups()))
+
+    # Karaoke like timestamps: few distinct values, repeated a lot
+    values = [random.randrange(0, 600000, 10) for i in range(n // 50)]
+    mstimes = [random.choice(values) for i in range(n)]
+    strtimes = [_format_strtime(ms) for ms in mstimes]
+    assert [regex_strtime_to_ms(t) for t in strtimes[:1000]] == list(
+        strtime_array_to_ms(strtimes[:1000])
+    )
+    assert [_format_strtime(ms) for ms in mstimes[:1000]] == ms_array_to_strtime(
+        mstimes[:1000]
+    )
+
+    for name, func in (
+        ("regex parse", lambda: [regex_strtime_to_ms(t) for t in strtimes]),
+        ("slicing parse", lambda: [_parse_strtime(t) for t in strtimes]),
+        ("strtime_to_ms", lambda: [strtime_to_ms(t) for t in strtimes]),
+        ("strtime_array_to_ms", lambda: strtime_array_to_ms(strtimes)),
+        ("divmod format", lambda: [_format_strtime(ms) for ms in mstimes]),
+        ("ms_to_strtime", lambda: [ms_to_strtime(ms) for ms in mstimes]),
+        ("ms_array_to_strtime", lambda: ms_array_to_strtime(mstimes)),
+    ):
+        best = min(timeit.repeat(func, number=1, repeat=3))
+        print("{:28s} {:8.3f} s / {:d} timestamps".format(name, best, n))
+
+
+if __name__ == "__main__":
+    import timeit
+
+    # Micro-benchmarks of common effect patterns
+    setup = "from __main__ import Time; start = Time(1000); end = Time(2500)"
+    for stmt in (
+        "end + 50",
+        "end - start",
+        "end + 50 >= start",
+        "(end + 50).ms >= start.ms",
+        "start + (end - start) / 2",
+        "end.strtime",
+        "Time(2500).strtime",
+        "{start: 1}",
+    ):
+        best = min(timeit.repeat(stmt, setup, number=200000, repeat=5))
+        print("{:28s} {:8.1f} ns".format(stmt, best / 200000 * 1e9))
+
+    _benchmark_strtime()
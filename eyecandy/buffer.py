@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import heapq
+import itertools
+import json
+import tempfile
+from operator import itemgetter
+
+try:
+    import asstime
+except ImportError:
+    from . import asstime
+
+_RECORD_KEY = itemgetter(0, 1, 2)  # layer, start, insertion order
+
+
+class EventBuffer(object):
+
+    """Event buffer with bounded memory
+
+    Events are kept in memory until *limit* events are buffered, then the
+    buffer is written to a temporary run file and emptied. Iterating the
+    buffer k-way merges the runs back, in insertion order or, with *sort*,
+    ordered by layer and start time.
+
+    Parameters:
+    :param limit: max number of events kept in memory (None: never spill)
+    :param sort: iterate the events sorted by layer and start time
+    :param tempdir: directory for the temporary run files
+    """
+
+    def __init__(self, limit=None, sort=False, tempdir=None):
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be greater than 0")
+        self.limit = limit
+        self.sort = sort
+        self.tempdir = tempdir
+        self._events = []
+        self._runs = []
+        self._styles = {}
+        self._count = 0
+        self._first = 0  # insertion order of the first event in memory
+        self._end = 0
+        self._ended = 0  # events in memory already counted in _end
+
+    @property
+    def styles(self):
+        """Names of the styles used by the buffered events"""
+        return set(self._styles)
+
+    @property
+    def end(self):
+        """ASS string time of the last event end"""
+        self._update_end()
+        return asstime.ms_to_strtime(self._end)
+
+    @property
+    def runs(self):
+        """Number of run files spilled to disk"""
+        return len(self._runs)
+
+    def append(self, dialog):
+        """Add a dialog dict to the buffer"""
+        # The times are parsed only when spilling, sorting or asking the end
+        self._styles[dialog["style"]["name"]] = dialog["style"]
+        self._events.append(dialog)
+        self._count += 1
+        if self.limit and len(self._events) >= self.limit:
+            self._spill()
+
+    def extend(self, dialogs):
+        for dialog in dialogs:
+            self.append(dialog)
+
+    def _spill(self):
+        """Write the in memory events to a new run file"""
+        self._update_end()
+        records = self._records()
+        if self.sort:
+            records.sort(key=_RECORD_KEY)
+        run = tempfile.TemporaryFile(
+            mode="w+", encoding="utf-8", prefix="eyecandy-", dir=self.tempdir
+        )
+        for layer, start, n, dialog in records:
+            # Styles are stored once in the buffer, not once per event
+            dialog = dict(dialog, style=dialog["style"]["name"])
+            run.write(json.dumps([layer, start, n, dialog]))
+            run.write("\n")
+        self._runs.append(run)
+        self._events = []
+        self._first = self._count
+        self._ended = 0
+
+    def transform(self, func):
+        """Replace the events with func(events), one batch at a time
+
+        func gets a list of dialog dicts, the events of a run file or the
+        ones in memory, in insertion order, and returns the new list.
+        Only one batch is loaded in memory at once.
+        """
+        events, runs = self._events, self._runs
+        self._events, self._runs = [], []
+        self._count = self._first = self._end = self._ended = 0
+        for run in runs:
+            records = sorted(self._read_run(run), key=itemgetter(2))
+            run.close()
+            self.extend(func([record[3] for record in records]))
+        self.extend(func(events))
+
+    def _records(self):
+        """(layer, start, n, dialog) records of the events in memory"""
+        strtime_to_ms = asstime.strtime_to_ms
+        return [
+            (dialog["layer"], strtime_to_ms(dialog["start"]), n, dialog)
+            for n, dialog in enumerate(self._events, self._first)
+        ]
+
+    def _update_end(self):
+        """Add the ends of the events appended since the last call to the end"""
+        strtime_to_ms = asstime.strtime_to_ms
+        for dialog in self._events[self._ended :]:
+            self._end = max(self._end, strtime_to_ms(dialog["end"]))
+        self._ended = len(self._events)
+
+    def _read_run(self, run):
+        run.seek(0)
+        for line in run:
+            layer, start, n, dialog = json.loads(line)
+            dialog["style"] = self._styles[dialog["style"]]
+            yield layer, start, n, dialog
+
+    def __iter__(self):
+        sources = [self._read_run(run) for run in self._runs]
+        if self.sort:
+            sources.append(sorted(self._records(), key=_RECORD_KEY))
+            records = heapq.merge(*sources, key=_RECORD_KEY)
+        else:
+            records = itertools.chain(*sources)
+        for record in records:
+            yield record[3]
+        if not self.sort:
+            for dialog in self._events:
+                yield dialog
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """Remove the run files and empty the buffer"""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._events = []
+        self._styles = {}
+        self._count = self._first = self._end = self._ended = 0
+
+    def __repr__(self):
+        return "<{:s} {:d} events, {:d} runs>".format(
+            self.__class__.__name__, self._count, len(self._runs)
+        )
@@ -3,16 +3,25 @@
 from __future__ import absolute_import, division, print_function, with_statement
 
 import colorsys
+import functools
 import math
 import random
 import re
 import string
 import sys
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 try:
     import interpolate
+    from helpers import require_numpy
 except ImportError:
     from . import interpolate
+    from .helpers import require_numpy
 
 _HEXVALUES = "0123456789ABCDEF"
 try:
@@ -76,6 +85,416 @@ def gradient_bezier(colors, steps):
             yield Color(r, g, b)
 
 
+CacheInfo = namedtuple("CacheInfo", "hits, misses, maxsize, currsize")
+
+
+def _func_key(func):
+    """Hashable key of an interpolation function (partials by value)"""
+    if isinstance(func, functools.partial):
+        keywords = tuple(sorted((func.keywords or {}).items()))
+        return _func_key(func.func), func.args, keywords
+    return func
+
+
+def _default_func(func, space):
+    """Interpolation function of a gradient, None is the default one of
+    the color space (DEFAULT_INTERPOLATE for "rgb", else linear)
+    """
+    if func is not None:
+        return func
+    return DEFAULT_INTERPOLATE if space == "rgb" else interpolate.linear
+
+
+def _gradient_entry(colors, steps, func, space):
+    """(frozen colors, ASS strings) of a gradient, see GradientCache"""
+    if space != "rgb":
+        rgb = gradient_array(colors, steps, func, space).tolist()
+        colors = tuple(FrozenColor(*values) for values in rgb)
+    elif len(colors) == 2:
+        colors = tuple(_gradient(colors[0], colors[1], steps, func))
+    else:
+        colors = tuple(gradient(colors, steps, func))
+    colors = tuple(color.freeze() for color in colors)
+    return colors, tuple(color.ass for color in colors)
+
+
+class GradientCache(object):
+
+    """Memoized gradients with LRU eviction
+
+    Gradients are keyed by (colors, steps, interpolation function) and
+    stored as tuples of frozen colors and of ASS strings, so the lines
+    that share the number of chars and the colors compute the gradient
+    only once.
+
+    Parameters:
+    :param maxsize: max number of gradients kept in the cache
+
+    Example:
+    >>> cache = GradientCache()
+    >>> cache.ass((Color(255, 255, 255), Color(0, 0, 0)), 3)
+    ('&HFFFFFF&', '&HB4B4B4&', '&H000000&')
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._gradients = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _get(self, colors, steps, func, space):
+        colors = tuple(colors)
+        func = _default_func(func, space)
+        key = (
+            tuple(tuple(color) for color in colors),
+            steps,
+            _func_key(func),
+            space,
+        )
+        try:
+            entry = self._gradients[key]
+        except KeyError:
+            self._misses += 1
+            entry = self._gradients[key] = _gradient_entry(colors, steps, func, space)
+            if len(self._gradients) > self.maxsize:
+                self._gradients.popitem(last=False)
+        except TypeError:
+            # Unhashable function (e.g. a partial of a list), not cached
+            self._misses += 1
+            return _gradient_entry(colors, steps, func, space)
+        else:
+            self._hits += 1
+            self._gradients.move_to_end(key)
+        return entry
+
+    def colors(self, colors, steps, func=None, space="rgb"):
+        """Gradient through `colors` as a tuple of colors
+
+        `func` defaults to the one of `gradient_array` for the space.
+        """
+        return self._get(colors, steps, func, space)[0]
+
+    def ass(self, colors, steps, func=None, space="rgb"):
+        """Gradient through `colors` as a tuple of ASS color strings
+
+        With a perceptual `space` the gradient is computed by
+        `gradient_array`.
+        """
+        return self._get(colors, steps, func, space)[1]
+
+    def cache_info(self):
+        """Hits, misses, max size and current size of the cache"""
+        return CacheInfo(self._hits, self._misses, self.maxsize, len(self._gradients))
+
+    def cache_clear(self):
+        self._gradients.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+gradient_cache = GradientCache()
+
+
+def _interpolate_array(func, t, start, end):
+    """Apply an interpolation function to NumPy arrays
+
+    The functions of `interpolate` use their array version, functions that
+    only work with numbers are applied element by element.
+    """
+    array_func = interpolate.array_func(func)
+    if array_func is not None:
+        return array_func(t, start, end)
+    shape = numpy.broadcast(t, start, end).shape
+    try:
+        values = func(t, start, end)
+    except (TypeError, ValueError):
+        values = None
+    if numpy.shape(values) != shape:
+        values = numpy.vectorize(func, otypes=[float])(t, start, end)
+    return values
+
+
+# sRGB <-> linear lookup tables, built on first use
+_LINEAR_TABLE_SIZE = 65536
+_linear_tables = None
+
+
+def _srgb_tables():
+    """(8 bit sRGB -> linear float, 16 bit linear -> 8 bit sRGB) tables"""
+    global _linear_tables
+    if _linear_tables is None:
+        to_linear = _srgb_to_linear(numpy.arange(256) / 255)
+        linear = numpy.linspace(0, 1, _LINEAR_TABLE_SIZE)
+        to_srgb = numpy.rint(_linear_to_srgb(linear) * 255).astype(numpy.uint8)
+        _linear_tables = to_linear, to_srgb
+    return _linear_tables
+
+
+def _srgb_to_linear(c):
+    return numpy.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(c):
+    c = numpy.maximum(c, 0)
+    return numpy.where(c <= 0.0031308, c * 12.92, 1.055 * c ** (1 / 2.4) - 0.055)
+
+
+def rgb_to_linear(rgb):
+    """Linear light values (0-1) of an array of 8 bit sRGB values (0-255)
+
+    Integer arrays are converted with a lookup table.
+    """
+    require_numpy("rgb_to_linear")
+    rgb = numpy.asarray(rgb)
+    if rgb.dtype.kind in "ui":
+        return _srgb_tables()[0][numpy.clip(rgb, 0, 255)]
+    return _srgb_to_linear(numpy.clip(rgb, 0, 255) / 255)
+
+
+def linear_to_rgb(linear):
+    """8 bit sRGB values (uint8) of an array of linear light values
+
+    Values out of the sRGB gamut are clipped.
+    """
+    require_numpy("linear_to_rgb")
+    index = numpy.rint(numpy.clip(linear, 0, 1) * (_LINEAR_TABLE_SIZE - 1))
+    return _srgb_tables()[1][index.astype(numpy.intp)]
+
+
+_RGB_TO_LMS = (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+)
+_LMS_TO_OKLAB = (
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+)
+_OKLAB_TO_LMS = (
+    (1.0, 0.3963377774, 0.2158037573),
+    (1.0, -0.1055613458, -0.0638541728),
+    (1.0, -0.0894841775, -1.2914855480),
+)
+_LMS_TO_RGB = (
+    (4.0767416621, -3.3077115913, 0.2309699292),
+    (-1.2684380046, 2.6097574011, -0.3413193965),
+    (-0.0041960863, -0.7034186147, 1.7076147010),
+)
+_RGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+_XYZ_TO_RGB = (
+    (3.2404542, -1.5371385, -0.4985314),
+    (-0.9692660, 1.8760108, 0.0415560),
+    (0.0556434, -0.2040259, 1.0572252),
+)
+_D65 = (0.95047, 1.0, 1.08883)
+_LAB_DELTA = 6 / 29
+
+
+def _dot(values, matrix):
+    """Multiply the last axis of `values` by a 3x3 matrix"""
+    return numpy.dot(values, numpy.asarray(matrix).T)
+
+
+def rgb_to_oklab(rgb):
+    """OKLab (L, a, b) values of an array of sRGB values (0-255)"""
+    lms = numpy.cbrt(_dot(rgb_to_linear(rgb), _RGB_TO_LMS))
+    return _dot(lms, _LMS_TO_OKLAB)
+
+
+def oklab_to_rgb(lab):
+    """8 bit sRGB values (uint8) of an array of OKLab values"""
+    return linear_to_rgb(_dot(_dot(lab, _OKLAB_TO_LMS) ** 3, _LMS_TO_RGB))
+
+
+def rgb_to_lab(rgb):
+    """CIELAB (L, a, b) values (D65) of an array of sRGB values (0-255)"""
+    xyz = _dot(rgb_to_linear(rgb), _RGB_TO_XYZ) / _D65
+    f = numpy.where(
+        xyz > _LAB_DELTA**3,
+        numpy.cbrt(xyz),
+        xyz / (3 * _LAB_DELTA**2) + 4 / 29,
+    )
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    return numpy.stack([116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)], axis=-1)
+
+
+def lab_to_rgb(lab):
+    """8 bit sRGB values (uint8) of an array of CIELAB values (D65)"""
+    lab = numpy.asarray(lab, dtype=float)
+    fy = (lab[..., 0] + 16) / 116
+    f = numpy.stack([fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200], axis=-1)
+    xyz = numpy.where(f > _LAB_DELTA, f**3, 3 * _LAB_DELTA**2 * (f - 4 / 29))
+    return linear_to_rgb(_dot(xyz * _D65, _XYZ_TO_RGB))
+
+
+def lab_to_lch(lab):
+    """(L, C, h) values of an array of (L, a, b) values, h in degrees"""
+    lab = numpy.asarray(lab, dtype=float)
+    a, b = lab[..., 1], lab[..., 2]
+    hue = numpy.degrees(numpy.arctan2(b, a)) % 360
+    return numpy.stack([lab[..., 0], numpy.hypot(a, b), hue], axis=-1)
+
+
+def lch_to_lab(lch):
+    """(L, a, b) values of an array of (L, C, h) values, h in degrees"""
+    lch = numpy.asarray(lch, dtype=float)
+    hue = numpy.radians(lch[..., 2])
+    chroma = lch[..., 1]
+    return numpy.stack(
+        [lch[..., 0], chroma * numpy.cos(hue), chroma * numpy.sin(hue)], axis=-1
+    )
+
+
+# Gradient color spaces: name -> (from sRGB, to sRGB, hue channel)
+COLOR_SPACES = {
+    "rgb": (None, None, None),
+    "linear": (rgb_to_linear, linear_to_rgb, None),
+    "oklab": (rgb_to_oklab, oklab_to_rgb, None),
+    "lab": (rgb_to_lab, lab_to_rgb, None),
+    "oklch": (
+        lambda rgb: lab_to_lch(rgb_to_oklab(rgb)),
+        lambda lch: oklab_to_rgb(lch_to_lab(lch)),
+        2,
+    ),
+    "lch": (
+        lambda rgb: lab_to_lch(rgb_to_lab(rgb)),
+        lambda lch: lab_to_rgb(lch_to_lab(lch)),
+        2,
+    ),
+}
+
+
+def gradient_array(colors, steps, func=None, space="rgb"):
+    """Gradient of `steps` colors through `colors` as a (steps, 3) uint8
+    array of RGB values
+
+    All the steps of all the channels are computed at once with NumPy.
+    The colors are evenly distributed over the steps, with two colors
+    the values are the same that `Color.gradient`.
+
+    With a perceptual `space` ("oklab", "oklch", "lab", "lch" or
+    "linear", see COLOR_SPACES) the colors are interpolated in that space
+    and converted back to sRGB, LCh hues take the shortest way around.
+    `func` defaults to DEFAULT_INTERPOLATE for "rgb" and to
+    `interpolate.linear` for the other spaces.
+
+    Example:
+    >>> gradient_array([Color(255, 255, 255), Color(0, 0, 0)], 3)
+    array([[255, 255, 255],
+           [180, 180, 180],
+           [  0,   0,   0]], dtype=uint8)
+    """
+    require_numpy("gradient_array")
+    try:
+        to_space, from_space, hue = COLOR_SPACES[space]
+    except KeyError:
+        raise ValueError("Unknown color space: {!r}".format(space))
+    func = _default_func(func, space)
+    stops = numpy.array([tuple(color)[:3] for color in colors], dtype=float)
+    if len(stops) == 1:
+        stops = numpy.concatenate([stops, stops])
+    if to_space is not None:
+        stops = to_space(stops.astype(numpy.uint8))
+    segments = len(stops) - 1
+    if steps > 1:
+        position = numpy.arange(steps) * segments / (steps - 1)
+    else:
+        position = numpy.zeros(steps)
+    index = numpy.minimum(position.astype(int), segments - 1)
+    t = (position - index)[:, None]
+    start, end = stops[index], stops[index + 1]
+    if hue is not None:
+        end = end.copy()
+        delta = (end[:, hue] - start[:, hue] + 180) % 360 - 180
+        end[:, hue] = start[:, hue] + delta
+    values = _interpolate_array(func, t, start, end)
+    if to_space is None:
+        return numpy.clip(values, 0, 255).astype(numpy.uint8)
+    if hue is not None:
+        values[:, hue] %= 360
+    return from_space(values)
+
+
+def rgb_array_to_ass(rgb):
+    """ASS color strings (&HBBGGRR&) of a (N, 3) array of RGB values"""
+    rgb = numpy.asarray(rgb).astype(numpy.int64)
+    bgr = (rgb[:, 2] << 16) | (rgb[:, 1] << 8) | rgb[:, 0]
+    return ["&H%06X&" % value for value in bgr.tolist()]
+
+
+def gradient_ass(colors, steps, func=None, space="rgb"):
+    """Same as `gradient_array` but return ASS color strings (&HBBGGRR&)"""
+    return rgb_array_to_ass(gradient_array(colors, steps, func, space))
+
+
+Quantization = namedtuple("Quantization", "rgb, palette, index, max_error")
+
+
+def quantize_array(rgb, ncolors=16, max_error=0.02, weights=None):
+    """Cluster an array of RGB values to a palette of at most `ncolors`
+
+    Median-cut in OKLab: the box of colors with the largest error is split
+    at the weighted median of its widest axis until there are `ncolors`
+    boxes or every color is within `max_error` (OKLab distance, about 0.02
+    is a just noticeable difference) of its box mean. Colors still out of
+    the error budget keep their own value.
+
+    Return a Quantization (rgb, palette, index, max_error): the quantized
+    (N, 3) uint8 values, the (K, 3) uint8 palette, the palette row of each
+    value (-1 if kept) and the largest error of the quantized values.
+
+    Parameters:
+    :param rgb: (N, 3) array of RGB values (0-255)
+    :param ncolors: max number of palette colors
+    :param max_error: perceptual error budget, None for no budget
+    :param weights: number of uses of each value (default 1)
+    """
+    require_numpy("quantize_array")
+    rgb = numpy.asarray(rgb, dtype=numpy.uint8).reshape(-1, 3)
+    if not len(rgb):
+        empty = numpy.zeros((0, 3), dtype=numpy.uint8)
+        return Quantization(rgb, empty, numpy.zeros(0, dtype=int), 0.0)
+    rgb, inverse = numpy.unique(rgb, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    weights = numpy.bincount(inverse, weights=weights, minlength=len(rgb))
+    lab = rgb_to_oklab(rgb)
+
+    def box(members):
+        mean = numpy.average(lab[members], axis=0, weights=weights[members])
+        error = numpy.sqrt(((lab[members] - mean) ** 2).sum(axis=1)).max()
+        return error, members, mean
+
+    boxes = [box(numpy.arange(len(rgb)))]
+    while len(boxes) < ncolors:
+        worst = max(range(len(boxes)), key=lambda i: boxes[i][0])
+        error, members, mean = boxes[worst]
+        if error == 0 or (max_error is not None and error <= max_error):
+            break
+        values = lab[members]
+        axis = numpy.argmax(values.max(axis=0) - values.min(axis=0))
+        order = members[numpy.argsort(values[:, axis], kind="stable")]
+        cumulative = numpy.cumsum(weights[order])
+        split = numpy.searchsorted(cumulative, cumulative[-1] / 2, side="right")
+        split = min(max(split, 1), len(order) - 1)
+        boxes[worst : worst + 1] = [box(order[:split]), box(order[split:])]
+
+    palette = oklab_to_rgb(numpy.array([mean for _, _, mean in boxes]))
+    index = numpy.empty(len(rgb), dtype=int)
+    for i, (_, members, _) in enumerate(boxes):
+        index[members] = i
+    errors = numpy.sqrt(((lab - rgb_to_oklab(palette)[index]) ** 2).sum(axis=1))
+    if max_error is not None:
+        index[errors > max_error] = -1
+    quantized = numpy.where((index >= 0)[:, None], palette[index], rgb)
+    error = float(errors[index >= 0].max()) if (index >= 0).any() else 0.0
+    return Quantization(quantized[inverse], palette, index[inverse], error)
+
+
 class BaseColor(object):
     def __init__(self, c1=None, c2=None, c3=None):
         super(BaseColor, self).__init__()
@@ -373,157 +792,383 @@ class Color(BaseColor):
         for color in _gradient(self, target, steps, func):
             yield color
 
+    def gradient_array(self, target, steps, func=None, space="rgb"):
+        """Gradient to `target` as a (steps, 3) uint8 array, see
+        `gradient_array`"""
+        return gradient_array((self, target), steps, func, space)
+
+    def gradient_ass(self, target, steps, func=None, space="rgb"):
+        """Gradient to `target` as a list of ASS color strings"""
+        return gradient_ass((self, target), steps, func, space)
+
+    @property
+    def oklab(self):
+        """OKLab (L, a, b) values of the color"""
+        return tuple(rgb_to_oklab(self.rgb).tolist())
+
+    @property
+    def lab(self):
+        """CIELAB (L, a, b) values (D65) of the color"""
+        return tuple(rgb_to_lab(self.rgb).tolist())
+
+    @classmethod
+    def from_oklab(cls, l, a, b):
+        return cls(*oklab_to_rgb((l, a, b)).tolist())
+
+    @classmethod
+    def from_lab(cls, l, a, b):
+        return cls(*lab_to_rgb((l, a, b)).tolist())
+
     def invert(self):
         return self.from_hex(self.hex.translate(_TABLE_INVERT_COLOR))
 
+    def freeze(self):
+        """Immutable copy of the color, see `FrozenColor`"""
+        return FrozenColor(*self._color)
+
+
+class FrozenColor(Color):
+
+    """Immutable RGB color packed into an int (0xRRGGBB)
+
+    The ass, ass_long and hex strings are formatted once and cached, so
+    the colors reused by many tags are not formatted again. Frozen colors
+    are hashable and compare equal to the `Color` with the same values.
+
+    Example:
+    >>> FrozenColor(255, 0, 128).ass
+    '&H8000FF&'
+    """
+
+    _valid_range_min = 0
+    _valid_range_max = 255
 
-aliceblue = Color.from_hex("#f0f8ff")
-antiquewhite = Color.from_hex("#faebd7")
-aqua = Color.from_hex("#00ffff")
-aquamarine = Color.from_hex("#7fffd4")
-azure = Color.from_hex("#f0ffff")
-beige = Color.from_hex("#f5f5dc")
-bisque = Color.from_hex("#ffe4c4")
-black = Color.from_hex("#000000")
-blanchedalmond = Color.from_hex("#ffebcd")
-blue = Color.from_hex("#0000ff")
-blueviolet = Color.from_hex("#8a2be2")
-brown = Color.from_hex("#a52a2a")
-burlywood = Color.from_hex("#deb887")
-cadetblue = Color.from_hex("#5f9ea0")
-chartreuse = Color.from_hex("#7fff00")
-chocolate = Color.from_hex("#d2691e")
-coral = Color.from_hex("#ff7f50")
-cornflowerblue = Color.from_hex("#6495ed")
-cornsilk = Color.from_hex("#fff8dc")
-crimson = Color.from_hex("#dc143c")
-cyan = Color.from_hex("#00ffff")
-darkblue = Color.from_hex("#00008b")
-darkcyan = Color.from_hex("#008b8b")
-darkgoldenrod = Color.from_hex("#b8860b")
-darkgray = Color.from_hex("#a9a9a9")
-darkgrey = Color.from_hex("#a9a9a9")
-darkgreen = Color.from_hex("#006400")
-darkkhaki = Color.from_hex("#bdb76b")
-darkmagenta = Color.from_hex("#8b008b")
-darkolivegreen = Color.from_hex("#556b2f")
-darkorange = Color.from_hex("#ff8c00")
-darkorchid = Color.from_hex("#9932cc")
-darkred = Color.from_hex("#8b0000")
-darksalmon = Color.from_hex("#e9967a")
-darkseagreen = Color.from_hex("#8fbc8f")
-darkslateblue = Color.from_hex("#483d8b")
-darkslategray = Color.from_hex("#2f4f4f")
-darkslategrey = Color.from_hex("#2f4f4f")
-darkturquoise = Color.from_hex("#00ced1")
-darkviolet = Color.from_hex("#9400d3")
-deeppink = Color.from_hex("#ff1493")
-deepskyblue = Color.from_hex("#00bfff")
-dimgray = Color.from_hex("#696969")
-dimgrey = Color.from_hex("#696969")
-dodgerblue = Color.from_hex("#1e90ff")
-firebrick = Color.from_hex("#b22222")
-floralwhite = Color.from_hex("#fffaf0")
-forestgreen = Color.from_hex("#228b22")
-fuchsia = Color.from_hex("#ff00ff")
-gainsboro = Color.from_hex("#dcdcdc")
-ghostwhite = Color.from_hex("#f8f8ff")
-gold = Color.from_hex("#ffd700")
-goldenrod = Color.from_hex("#daa520")
-gray = Color.from_hex("#808080")
-grey = Color.from_hex("#808080")
-green = Color.from_hex("#008000")
-greenyellow = Color.from_hex("#adff2f")
-honeydew = Color.from_hex("#f0fff0")
-hotpink = Color.from_hex("#ff69b4")
-indianred = Color.from_hex("#cd5c5c")
-indigo = Color.from_hex("#4b0082")
-ivory = Color.from_hex("#fffff0")
-khaki = Color.from_hex("#f0e68c")
-lavender = Color.from_hex("#e6e6fa")
-lavenderblush = Color.from_hex("#fff0f5")
-lawngreen = Color.from_hex("#7cfc00")
-lemonchiffon = Color.from_hex("#fffacd")
-lightblue = Color.from_hex("#add8e6")
-lightcoral = Color.from_hex("#f08080")
-lightcyan = Color.from_hex("#e0ffff")
-lightgoldenrodyellow = Color.from_hex("#fafad2")
-lightgray = Color.from_hex("#d3d3d3")
-lightgrey = Color.from_hex("#d3d3d3")
-lightgreen = Color.from_hex("#90ee90")
-lightpink = Color.from_hex("#ffb6c1")
-lightsalmon = Color.from_hex("#ffa07a")
-lightseagreen = Color.from_hex("#20b2aa")
-lightskyblue = Color.from_hex("#87cefa")
-lightslategray = Color.from_hex("#778899")
-lightslategrey = Color.from_hex("#778899")
-lightsteelblue = Color.from_hex("#b0c4de")
-lightyellow = Color.from_hex("#ffffe0")
-lime = Color.from_hex("#00ff00")
-limegreen = Color.from_hex("#32cd32")
-linen = Color.from_hex("#faf0e6")
-magenta = Color.from_hex("#ff00ff")
-maroon = Color.from_hex("#800000")
-mediumaquamarine = Color.from_hex("#66cdaa")
-mediumblue = Color.from_hex("#0000cd")
-mediumorchid = Color.from_hex("#ba55d3")
-mediumpurple = Color.from_hex("#9370d8")
-mediumseagreen = Color.from_hex("#3cb371")
-mediumslateblue = Color.from_hex("#7b68ee")
-mediumspringgreen = Color.from_hex("#00fa9a")
-mediumturquoise = Color.from_hex("#48d1cc")
-mediumvioletred = Color.from_hex("#c71585")
-midnightblue = Color.from_hex("#191970")
-mintcream = Color.from_hex("#f5fffa")
-mistyrose = Color.from_hex("#ffe4e1")
-moccasin = Color.from_hex("#ffe4b5")
-navajowhite = Color.from_hex("#ffdead")
-navy = Color.from_hex("#000080")
-oldlace = Color.from_hex("#fdf5e6")
-olive = Color.from_hex("#808000")
-olivedrab = Color.from_hex("#6b8e23")
-orange = Color.from_hex("#ffa500")
-orangered = Color.from_hex("#ff4500")
-orchid = Color.from_hex("#da70d6")
-palegoldenrod = Color.from_hex("#eee8aa")
-palegreen = Color.from_hex("#98fb98")
-paleturquoise = Color.from_hex("#afeeee")
-palevioletred = Color.from_hex("#d87093")
-papayawhip = Color.from_hex("#ffefd5")
-peachpuff = Color.from_hex("#ffdab9")
-peru = Color.from_hex("#cd853f")
-pink = Color.from_hex("#ffc0cb")
-plum = Color.from_hex("#dda0dd")
-powderblue = Color.from_hex("#b0e0e6")
-purple = Color.from_hex("#800080")
-red = Color.from_hex("#ff0000")
-rosybrown = Color.from_hex("#bc8f8f")
-royalblue = Color.from_hex("#4169e1")
-saddlebrown = Color.from_hex("#8b4513")
-salmon = Color.from_hex("#fa8072")
-sandybrown = Color.from_hex("#f4a460")
-seagreen = Color.from_hex("#2e8b57")
-seashell = Color.from_hex("#fff5ee")
-sienna = Color.from_hex("#a0522d")
-silver = Color.from_hex("#c0c0c0")
-skyblue = Color.from_hex("#87ceeb")
-slateblue = Color.from_hex("#6a5acd")
-slategray = Color.from_hex("#708090")
-slategrey = Color.from_hex("#708090")
-snow = Color.from_hex("#fffafa")
-springgreen = Color.from_hex("#00ff7f")
-steelblue = Color.from_hex("#4682b4")
-tan = Color.from_hex("#d2b48c")
-teal = Color.from_hex("#008080")
-thistle = Color.from_hex("#d8bfd8")
-tomato = Color.from_hex("#ff6347")
-turquoise = Color.from_hex("#40e0d0")
-violet = Color.from_hex("#ee82ee")
-wheat = Color.from_hex("#f5deb3")
-white = Color.from_hex("#ffffff")
-whitesmoke = Color.from_hex("#f5f5f5")
-yellow = Color.from_hex("#ffff00")
-yellowgreen = Color.from_hex("#9acd32")
+    def __init__(self, r=None, g=None, b=None):
+        if r is not None and g is None and b is None:
+            g = b = r
+        r, g, b = int(r or 0), int(g or 0), int(b or 0)
+        if not (0 <= r <= 255 and 0 <= g <= 255 and 0 <= b <= 255):
+            raise ValueError("Color values out of range [0, 255]")
+        self._value = (r << 16) | (g << 8) | b
+        self._strings = {}
+
+    @classmethod
+    def from_value(cls, value):
+        """Create a frozen color from a packed 0xRRGGBB int"""
+        color = cls.__new__(cls)
+        color._value = value
+        color._strings = {}
+        return color
+
+    @property
+    def value(self):
+        """Packed 0xRRGGBB int"""
+        return self._value
+
+    @property
+    def _color(self):
+        value = self._value
+        return value >> 16, (value >> 8) & 0xFF, value & 0xFF
+
+    @property
+    def r(self):
+        return self._value >> 16
+
+    @property
+    def g(self):
+        return (self._value >> 8) & 0xFF
+
+    @property
+    def b(self):
+        return self._value & 0xFF
+
+    @property
+    def rgb(self):
+        return self._color
+
+    def _bgr(self):
+        value = self._value
+        return ((value & 0xFF) << 16) | (value & 0xFF00) | (value >> 16)
+
+    @property
+    def ass(self):
+        try:
+            return self._strings["ass"]
+        except KeyError:
+            string = self._strings["ass"] = "&H%06X&" % self._bgr()
+            return string
+
+    @property
+    def ass_long(self):
+        try:
+            return self._strings["ass_long"]
+        except KeyError:
+            string = self._strings["ass_long"] = "&H00%06X&" % self._bgr()
+            return string
+
+    @property
+    def hex(self):
+        try:
+            return self._strings["hex"]
+        except KeyError:
+            string = self._strings["hex"] = "#%06X" % self._value
+            return string
+
+    def _set_component(self, index, value):
+        raise TypeError("FrozenColor is immutable, use Color(*color)")
+
+    __setitem__ = _set_component
+
+    def __eq__(self, other):
+        if isinstance(other, BaseColor):
+            return tuple(self._color) == tuple(other._color)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def __int__(self):
+        return self._value
+
+    def __reduce__(self):
+        return self.from_value, (self._value,)
+
+    def freeze(self):
+        return self
+
+
+_NAMED_COLORS = {
+    "aliceblue": 0xF0F8FF,
+    "antiquewhite": 0xFAEBD7,
+    "aqua": 0x00FFFF,
+    "aquamarine": 0x7FFFD4,
+    "azure": 0xF0FFFF,
+    "beige": 0xF5F5DC,
+    "bisque": 0xFFE4C4,
+    "black": 0x000000,
+    "blanchedalmond": 0xFFEBCD,
+    "blue": 0x0000FF,
+    "blueviolet": 0x8A2BE2,
+    "brown": 0xA52A2A,
+    "burlywood": 0xDEB887,
+    "cadetblue": 0x5F9EA0,
+    "chartreuse": 0x7FFF00,
+    "chocolate": 0xD2691E,
+    "coral": 0xFF7F50,
+    "cornflowerblue": 0x6495ED,
+    "cornsilk": 0xFFF8DC,
+    "crimson": 0xDC143C,
+    "cyan": 0x00FFFF,
+    "darkblue": 0x00008B,
+    "darkcyan": 0x008B8B,
+    "darkgoldenrod": 0xB8860B,
+    "darkgray": 0xA9A9A9,
+    "darkgrey": 0xA9A9A9,
+    "darkgreen": 0x006400,
+    "darkkhaki": 0xBDB76B,
+    "darkmagenta": 0x8B008B,
+    "darkolivegreen": 0x556B2F,
+    "darkorange": 0xFF8C00,
+    "darkorchid": 0x9932CC,
+    "darkred": 0x8B0000,
+    "darksalmon": 0xE9967A,
+    "darkseagreen": 0x8FBC8F,
+    "darkslateblue": 0x483D8B,
+    "darkslategray": 0x2F4F4F,
+    "darkslategrey": 0x2F4F4F,
+    "darkturquoise": 0x00CED1,
+    "darkviolet": 0x9400D3,
+    "deeppink": 0xFF1493,
+    "deepskyblue": 0x00BFFF,
+    "dimgray": 0x696969,
+    "dimgrey": 0x696969,
+    "dodgerblue": 0x1E90FF,
+    "firebrick": 0xB22222,
+    "floralwhite": 0xFFFAF0,
+    "forestgreen": 0x228B22,
+    "fuchsia": 0xFF00FF,
+    "gainsboro": 0xDCDCDC,
+    "ghostwhite": 0xF8F8FF,
+    "gold": 0xFFD700,
+    "goldenrod": 0xDAA520,
+    "gray": 0x808080,
+    "grey": 0x808080,
+    "green": 0x008000,
+    "greenyellow": 0xADFF2F,
+    "honeydew": 0xF0FFF0,
+    "hotpink": 0xFF69B4,
+    "indianred": 0xCD5C5C,
+    "indigo": 0x4B0082,
+    "ivory": 0xFFFFF0,
+    "khaki": 0xF0E68C,
+    "lavender": 0xE6E6FA,
+    "lavenderblush": 0xFFF0F5,
+    "lawngreen": 0x7CFC00,
+    "lemonchiffon": 0xFFFACD,
+    "lightblue": 0xADD8E6,
+    "lightcoral": 0xF08080,
+    "lightcyan": 0xE0FFFF,
+    "lightgoldenrodyellow": 0xFAFAD2,
+    "lightgray": 0xD3D3D3,
+    "lightgrey": 0xD3D3D3,
+    "lightgreen": 0x90EE90,
+    "lightpink": 0xFFB6C1,
+    "lightsalmon": 0xFFA07A,
+    "lightseagreen": 0x20B2AA,
+    "lightskyblue": 0x87CEFA,
+    "lightslategray": 0x778899,
+    "lightslategrey": 0x778899,
+    "lightsteelblue": 0xB0C4DE,
+    "lightyellow": 0xFFFFE0,
+    "lime": 0x00FF00,
+    "limegreen": 0x32CD32,
+    "linen": 0xFAF0E6,
+    "magenta": 0xFF00FF,
+    "maroon": 0x800000,
+    "mediumaquamarine": 0x66CDAA,
+    "mediumblue": 0x0000CD,
+    "mediumorchid": 0xBA55D3,
+    "mediumpurple": 0x9370D8,
+    "mediumseagreen": 0x3CB371,
+    "mediumslateblue": 0x7B68EE,
+    "mediumspringgreen": 0x00FA9A,
+    "mediumturquoise": 0x48D1CC,
+    "mediumvioletred": 0xC71585,
+    "midnightblue": 0x191970,
+    "mintcream": 0xF5FFFA,
+    "mistyrose": 0xFFE4E1,
+    "moccasin": 0xFFE4B5,
+    "navajowhite": 0xFFDEAD,
+    "navy": 0x000080,
+    "oldlace": 0xFDF5E6,
+    "olive": 0x808000,
+    "olivedrab": 0x6B8E23,
+    "orange": 0xFFA500,
+    "orangered": 0xFF4500,
+    "orchid": 0xDA70D6,
+    "palegoldenrod": 0xEEE8AA,
+    "palegreen": 0x98FB98,
+    "paleturquoise": 0xAFEEEE,
+    "palevioletred": 0xD87093,
+    "papayawhip": 0xFFEFD5,
+    "peachpuff": 0xFFDAB9,
+    "peru": 0xCD853F,
+    "pink": 0xFFC0CB,
+    "plum": 0xDDA0DD,
+    "powderblue": 0xB0E0E6,
+    "purple": 0x800080,
+    "red": 0xFF0000,
+    "rosybrown": 0xBC8F8F,
+    "royalblue": 0x4169E1,
+    "saddlebrown": 0x8B4513,
+    "salmon": 0xFA8072,
+    "sandybrown": 0xF4A460,
+    "seagreen": 0x2E8B57,
+    "seashell": 0xFFF5EE,
+    "sienna": 0xA0522D,
+    "silver": 0xC0C0C0,
+    "skyblue": 0x87CEEB,
+    "slateblue": 0x6A5ACD,
+    "slategray": 0x708090,
+    "slategrey": 0x708090,
+    "snow": 0xFFFAFA,
+    "springgreen": 0x00FF7F,
+    "steelblue": 0x4682B4,
+    "tan": 0xD2B48C,
+    "teal": 0x008080,
+    "thistle": 0xD8BFD8,
+    "tomato": 0xFF6347,
+    "turquoise": 0x40E0D0,
+    "violet": 0xEE82EE,
+    "wheat": 0xF5DEB3,
+    "white": 0xFFFFFF,
+    "whitesmoke": 0xF5F5F5,
+    "yellow": 0xFFFF00,
+    "yellowgreen": 0x9ACD32,
+}
+
+
+MAX_CACHED_COLORS = 4096
+_hex_colors = {}
+
+
+def hex_color(hexstring):
+    """Frozen color of a hex string, memoized
+
+    Same as `Color.from_hex` but the parsed colors (and their cached ASS
+    strings) are shared by the tags that use the same hex string.
+    """
+    try:
+        return _hex_colors[hexstring]
+    except KeyError:
+        pass
+    color = FrozenColor.from_hex(hexstring)
+    if len(_hex_colors) >= MAX_CACHED_COLORS:
+        _hex_colors.clear()
+    _hex_colors[hexstring] = color
+    return color
+
+
+def named_color(name):
+    """Frozen color of a CSS color name, e.g. named_color("red")"""
+    try:
+        value = _NAMED_COLORS[name]
+    except KeyError:
+        raise ValueError("'{}' is not a named color.".format(name))
+    color = globals().get(name)
+    if color is None:
+        color = globals()[name] = FrozenColor.from_value(value)
+    return color
+
+
+def __getattr__(name):
+    # Named colors are created on first access (PEP 562)
+    if name in _NAMED_COLORS:
+        return named_color(name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_NAMED_COLORS))
+
+
+if sys.version_info < (3, 7):
+    for _name in _NAMED_COLORS:
+        named_color(_name)
+
+
+# The named colors are not globals until used, "import *" gets them from
+# __all__ (and creates them)
+__all__ = [
+    "DEFAULT_INTERPOLATE",
+    "rainbow",
+    "validate_range_values",
+    "gradient",
+    "gradient_bezier",
+    "CacheInfo",
+    "GradientCache",
+    "gradient_cache",
+    "rgb_to_linear",
+    "linear_to_rgb",
+    "rgb_to_oklab",
+    "oklab_to_rgb",
+    "rgb_to_lab",
+    "lab_to_rgb",
+    "lab_to_lch",
+    "lch_to_lab",
+    "COLOR_SPACES",
+    "gradient_array",
+    "rgb_array_to_ass",
+    "gradient_ass",
+    "Quantization",
+    "quantize_array",
+    "BaseColor",
+    "Color",
+    "FrozenColor",
+    "MAX_CACHED_COLORS",
+    "hex_color",
+    "named_color",
+] + sorted(_NAMED_COLORS)
 
 
 if __name__ == "__main__":
@@ -18,17 +18,48 @@ except ImportError:
     app = QtGui.QApplication([])
 
 try:
+    import asstime
     import helpers
     from asstime import Time
+    from buffer import EventBuffer
     from color import Color
+    from karaoke import (  # noqa: F401
+        Columns,
+        Fx,
+        Phases,
+        clamp_times,
+        delay_times,
+        fill_times,
+        karaoke_phases,
+        shift_times,
+    )
+    from optimize import optimize_buffer
+    from quantize import quantize_buffer
     from reader import Reader
+    from retime import retime_dialogs
+    from tagbuilder import TagBuilder
     from writer import Writer
 
 except ImportError:
-    from . import helpers
+    from . import asstime, helpers
     from .asstime import Time
+    from .buffer import EventBuffer
     from .color import Color
+    from .karaoke import (  # noqa: F401
+        Columns,
+        Fx,
+        Phases,
+        clamp_times,
+        delay_times,
+        fill_times,
+        karaoke_phases,
+        shift_times,
+    )
+    from .optimize import optimize_buffer
+    from .quantize import quantize_buffer
     from .reader import Reader
+    from .retime import retime_dialogs
+    from .tagbuilder import TagBuilder
     from .writer import Writer
 
 RE_TAGS = re.compile(
@@ -233,6 +264,23 @@ class Line(Dialog):
         self.char_n = len(self.chars)
         self.syl_n = len(self.syls)
 
+        self._syl_columns = None
+        self._char_columns = None
+
+    @property
+    def syl_columns(self):
+        """Times and positions of the syllables as `Columns`"""
+        if self._syl_columns is None:
+            self._syl_columns = Columns.from_items(self.syls)
+        return self._syl_columns
+
+    @property
+    def char_columns(self):
+        """Times and positions of the letters as `Columns`"""
+        if self._char_columns is None:
+            self._char_columns = Columns.from_items(self.chars)
+        return self._char_columns
+
     @property
     def width(self):
         """Pixel Size width of text"""
@@ -474,6 +522,13 @@ class Style(object):
     def scale(self):
         return self.scalex, self.scaley
 
+    def tag_builder(self):
+        """TagBuilder that drops the tags equal to this style
+
+        The styles are written with alignment 5 (see Generator.save).
+        """
+        return TagBuilder.from_style(self, alignment=5)
+
     def as_dict(self):
         """Return a dict from instance variables"""
         style_item = {
@@ -513,7 +568,15 @@ class Style(object):
 
 class Generator(object):
 
-    """docstring for Generator"""
+    """Karaoke effect generator
+
+    Parameters:
+    :param input_script: filename of the script to read
+    :param output_script: filename of the script to write
+    :param max_events: events kept in memory before they are spilled to
+        temporary files on disk (None: keep all the events in memory)
+    :param sort: write the events sorted by layer and start time
+    """
 
     def __init__(
         self,
@@ -522,6 +585,8 @@ class Generator(object):
         progressbar=True,
         original=True,
         open=True,
+        max_events=None,
+        sort=False,
     ):
         self._input_script = input_script
         self._output_script = output_script
@@ -529,7 +594,7 @@ class Generator(object):
         self._script_data = Reader().read(self._input_script)
         self.open = open
 
-        self._dialog = []
+        self._dialog = EventBuffer(max_events, sort)
 
         self.kara_n = len(list(self.lines))
 
@@ -668,6 +733,10 @@ class Generator(object):
     def add(self, d):
         self._dialog.append(d.as_dict())
 
+    def extend(self, dialogs):
+        """Add a batch of dialogs"""
+        self._dialog.extend(d.as_dict() for d in dialogs)
+
     def add_dialog(
         self,
         layer=0,
@@ -710,6 +779,88 @@ class Generator(object):
             return helpers.progressbar(lines)
         return lines
 
+    def snap_to_keyframes(self, keyframes, threshold=200, events=False):
+        """Snap the start and end of the lines to the nearest keyframes
+
+        Times within threshold ms of a keyframe are moved to it, unless the
+        dialog would end before it starts.
+
+        Parameters:
+        :param keyframes: `asstime.Keyframes` of the video
+        :param threshold: max distance in ms to a keyframe
+        :param events: snap the generated events instead of the lines
+
+        Return a list of (index, start, end, new start, new end), times in
+        ms, of the changed dialogs.
+        """
+        changes = []
+        first = [0]  # index of the first dialog of the batch
+
+        def snap(dialogs):
+            offset = first[0]
+            first[0] += len(dialogs)
+            starts = asstime.strtime_array_to_ms([d["start"] for d in dialogs])
+            ends = asstime.strtime_array_to_ms([d["end"] for d in dialogs])
+            new_starts = keyframes.snap(starts, threshold)
+            new_ends = keyframes.snap(ends, threshold)
+            for i, d in enumerate(dialogs):
+                start, end = starts[i], ends[i]
+                new_start, new_end = new_starts[i], new_ends[i]
+                if (new_start, new_end) == (start, end) or new_start >= new_end:
+                    continue
+                d["start"] = asstime.ms_to_strtime(new_start)
+                d["end"] = asstime.ms_to_strtime(new_end)
+                changes.append((offset + i, start, end, new_start, new_end))
+            return dialogs
+
+        if events:
+            self._dialog.transform(snap)
+        elif self._script_data["dialog"]:
+            snap(self._script_data["dialog"])
+        return changes
+
+    def retime(self, shift=0, scale=1, source_fps=None, target_fps=None):
+        """Shift, scale and convert the framerate of the whole script
+
+        Both the lines and the generated events are retimed, including the
+        relative times of the \\t, \\move, \\fad and \\k tags.
+
+        Example:
+        >>> sub.retime(source_fps=FPS_NTSC_FILM, target_fps=FPS_PAL)
+        """
+        kwargs = dict(
+            shift=shift, scale=scale, source_fps=source_fps, target_fps=target_fps
+        )
+        if self._script_data["dialog"]:
+            retime_dialogs(self._script_data["dialog"], **kwargs)
+        self._dialog.transform(partial(retime_dialogs, **kwargs))
+
+    def quantize_colors(self, ncolors=64, max_error=0.02):
+        """Quantize the color tags of the generated events
+
+        The \\c, \\1c-\\4c colors are clustered to a palette of at most
+        `ncolors` colors (median-cut in OKLab), colors farther than
+        `max_error` from the palette are kept, and the color tags that
+        repeat the color in use are removed. Return a QuantizeReport.
+
+        Example:
+        >>> print(sub.quantize_colors(ncolors=32))
+        """
+        return quantize_buffer(self._dialog, ncolors, max_error)
+
+    def optimize(self, precision=None):
+        """Optimize the override tags of the generated events
+
+        Merges adjacent override blocks, removes the tags without effect
+        and rounds their numbers (see optimize.PRECISION), removes the
+        events of zero duration or fully transparent. Return an
+        OptimizeReport.
+
+        Example:
+        >>> print(sub.optimize())
+        """
+        return optimize_buffer(self._dialog, precision, alignment=5)
+
     def _add_default_dialog(self):
         """Add the original karaoke commented by default in the script"""
         # This help to jump to the wanted line in the preview in Aegisub,
@@ -727,8 +878,15 @@ class Generator(object):
         self._script_data["dialog"] = self._dialog
         return Writer(self._script_data)._tostring()
 
-    def save(self, filename=None):
+    def save(self, filename=None, optimize=False):
+        """Write the script
+
+        @optimize: optimize the generated events first (see optimize) and
+        print the report
+        """
         # FIX: Don't change alignment in rawlines
+        if optimize:
+            print(self.optimize())
         if not filename:
             filename = self._output_script
         for name in self._script_data["style"].keys():
@@ -739,42 +897,14 @@ class Generator(object):
             helpers.start_file(filename)
 
 
-# class Fx():
-#     def OnDialogue(self, diag):
-#         pass
-#     def OnSyllable(self, sil):
-#         pass
-#     def OnLetter(self, let):
-#         pass
-#     def OnSyllableDead(self, sil):
-#         pass
-#     def OnSyllableSleep(self, sil):
-#         pass
-#     def OnLetterDead(self, let):
-#         pass
-#     def OnLetterSleep(self, let):
-#         pass
-#     def OnDialogueIn(self, diag):
-#         pass
-#     def OnSyllableIn(self, sil):
-#         pass
-#     def OnLetterIn(self, let):
-#         pass
-#     def OnDialogueOut(self, diag):
-#         pass
-#     def OnSyllableOut(self, sil):
-#         pass
-#     def OnLetterOut(self, let):
-#         pass
-
-
 @helpers.timeit
 def main():
     import random
 
     import color
     import interpolate
-    from asstags import *
+    from asstags import an, blur, c, fad, move, pos
+    from tagtemplate import tag_template
 
     it_custom = partial(interpolate.cosine, repeat=6)
 
@@ -784,69 +914,62 @@ def main():
     # an4: .left, .middle | an5: .center, .middle | an6: .right, .middle
     # an1: .left, .bottom | an2: .center, .bottom | an3: .right, .bottom
 
-    for line in sub.lines:
-        c1 = line.style.primarycolor
-        c2 = line.style.secondarycolor
-        c3 = line.style.bordcolor
-        c4 = line.style.shadowcolor
-
-        cblue = color.Color.from_hex("#93BEC2")
-        colorsb = list(cblue.gradient(c1, len(line.chars), it_custom))
-        i_custom = list(interpolate.interpolate_range(0, 1, line.char_n, it_custom))
-
-        for li, char in enumerate(line.chars):
-            # alias for .center, .middle
-            x, y = char.left, char.bottom
-
-            # Efecto de silaba
-            ch = char.copy()
-            ch.tag = (
-                pos(x, y)
-                + blur()
-                + c(c2)
-                + fsc(130)
-                + t(fsc(100) + blur(2) + c(colorsb[li]))
-                + an(1)
+    class Effect(Fx):
+        def prepare(self, line):
+            c1 = line.style.primarycolor
+            self.c2 = line.style.secondarycolor
+
+            cblue = color.Color.from_hex("#93BEC2")
+            self.colorsb = list(cblue.gradient(c1, line.char_n, it_custom))
+            self.i_custom = list(
+                interpolate.interpolate_range(0, 1, line.char_n, it_custom)
+            )
+            self.offsets = [
+                (random.randint(-5, 5), random.randint(-5, 5)) for ch in line.chars
+            ]
+
+        # Efecto de silaba
+        def OnLetter(self, let):
+            # Compiled once, only the placeholders are formatted per char
+            template = tag_template(
+                "\\pos({x},{y})\\blur1\\c{c2}\\fscx130\\fscy130"
+                "\\t(\\fscx100\\fscy100\\blur2\\c{color})\\an1"
+            )
+            let.tag = template(
+                x=let.left, y=let.bottom, c2=self.c2, color=self.colorsb[self.index]
             )
-            ch.layer = 1
-            ch.end = char.end + 50
-            if ch.end.ms >= line.end.ms:
-                ch.end = char.end
-            sub.add(ch)
-
-            # Silabas por cantar
-            ch = char.copy()
-            ch.tag = pos(x, y) + c(c2) + blur() + an(1)
-            ch.start = line.start
-            ch.end = char.start
-            sub.add(ch)
-
-            # Silabas Muertas (cantadas)
-            ch = char.copy()
-            ch.tag = pos(x, y) + blur() + an(1) + c(colorsb[li])
-            ch.start = char.end + 50
-            if ch.start.ms >= line.end.ms:
-                ch.start = char.end
-            ch.end = line.end
-            sub.add(ch)
-
-            # Efecto de entrada
-            ch = char.copy()
-            px = x + random.randint(-5, 5)
-            py = y + random.randint(-5, 5)
-            m = move(px, py * i_custom[li] - char.height / 4, x, y)
-            ch.tag = blur() + fad(150, 0) + c(c2) + m + an(1)
-            ch.start = line.start - 100
-            ch.end = line.start
-            sub.add(ch)
-
-            # Efecto de salida
-            ch = char.copy()
-            m = move(x, y, px, py + char.height / 2)
-            ch.tag = blur() + fad(0, 150) + c(colorsb[li]) + m + an(1)
-            ch.start = line.end
-            ch.end = line.end + 100
-            sub.add(ch)
+            let.layer = 1
+            return let
+
+        # Silabas por cantar
+        def OnLetterSleep(self, let):
+            let.tag = pos(let.left, let.bottom) + c(self.c2) + blur() + an(1)
+            return let
+
+        # Silabas Muertas (cantadas)
+        def OnLetterDead(self, let):
+            x, y = let.left, let.bottom
+            let.tag = pos(x, y) + blur() + an(1) + c(self.colorsb[self.index])
+            return let
+
+        # Efecto de entrada
+        def OnLetterIn(self, let):
+            x, y = let.left, let.bottom
+            dx, dy = self.offsets[self.index]
+            py = (y + dy) * self.i_custom[self.index] - let.height / 4
+            m = move(x + dx, py, x, y)
+            let.tag = blur() + fad(150, 0) + c(self.c2) + m + an(1)
+            return let
+
+        # Efecto de salida
+        def OnLetterOut(self, let):
+            x, y = let.left, let.bottom
+            dx, dy = self.offsets[self.index]
+            m = move(x, y, x + dx, y + dy + let.height / 2)
+            let.tag = blur() + fad(0, 150) + c(self.colorsb[self.index]) + m + an(1)
+            return let
+
+    Effect(sub, delay=50, in_dur=100, out_dur=100).run()
 
     sub.save()
 
@@ -6,6 +6,11 @@ import subprocess
 import sys
 import time
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 def generate_effect():
     # input, output, effect
@@ -88,8 +93,60 @@ def timeit(method):
     return timed
 
 
+def require_numpy(feature="This feature"):
+    """Raise ImportError if NumPy is not installed"""
+    if numpy is None:
+        raise ImportError("{:s} requires NumPy (pip install numpy)".format(feature))
+
+
+MAX_CACHED_NUMBERS = 4096
+_number_strings = {}
+
+
 def round_format_str(number, decimals=5):
-    """Round a number and remove trailing zeros"""
+    """Round a number and remove trailing zeros
+
+    The number is rounded to the digits of its integer part (as in
+    str(float(number)), with the sign) plus `decimals` significant
+    digits. Frequent values are cached.
+    """
+    x = float(number)
+    key = x, decimals
+    result = _number_strings.get(key) if x else None
+    if result is not None:
+        return result
+    # Python formats the exact value of the float rounded half to even,
+    # the same that Decimal
+    size = abs(x)
+    if 1 <= size < 2**53:
+        # The integer digits are significant, only `decimals` (+1 for the
+        # sign) digits are left for the fraction
+        result = "%.*f" % (decimals + (x < 0), x)
+    elif 1e-4 <= size < 1:
+        # repr "0.000ddd", "-0.000ddd": 1 (+1) + decimals significant digits
+        mantissa, exponent = ("%.*e" % (decimals + (x < 0), x)).split("e")
+        sign = ""
+        if mantissa[0] == "-":
+            sign, mantissa = "-", mantissa[1:]
+        digits = mantissa.replace(".", "")
+        zeros = -int(exponent) - 1
+        if zeros < 0:  # rounded up to 1
+            result = sign + digits[0] + "." + digits[1:]
+        else:
+            result = sign + "0." + "0" * zeros + digits
+    else:
+        # zero (and -0), nan, inf and the numbers with exponent in repr
+        return _round_format_str_decimal(x, decimals)
+    if "." in result:
+        result = result.rstrip("0").rstrip(".")
+    if len(_number_strings) >= MAX_CACHED_NUMBERS:
+        _number_strings.clear()
+    _number_strings[key] = result
+    return result
+
+
+def _round_format_str_decimal(number, decimals=5):
+    """round_format_str with Decimal, for the values out of the fast path"""
     prec = len(str(float(number)).split(".")[0]) + decimals
     context = decimal.Context(prec=prec)
     dec = context.create_decimal_from_float(float(number))
@@ -120,3 +177,61 @@ def start_file(filename):
         os.startfile(filename)
     elif os.name == "posix":
         subprocess.call(("xdg-open", filename))
+
+
+def _benchmark_round_format_str(n=200000):
+    """Compare round_format_str with the Decimal version on random values"""
+    import random
+
+    rnd = random.Random(0)
+    values = []
+    for _ in range(n):
+        kind = rnd.random()
+        if kind < 0.3:
+            value = rnd.uniform(-2000, 2000)
+        elif kind < 0.5:
+            value = round(rnd.uniform(-2000, 2000), rnd.randint(0, 4))
+        elif kind < 0.7:
+            value = rnd.randint(-5000, 5000) + rnd.choice((0, 0.5, 0.25, 0.125))
+        elif kind < 0.9:
+            value = rnd.uniform(-1, 1) * 10 ** rnd.randint(-8, 17)
+        else:
+            value = rnd.choice((0, -0.0, 1, -1, 0.5, 1e16, 2**53, 1e-5, 123456789))
+        values.append((value, rnd.randint(0, 8)))
+
+    def result(func, value, decimals):
+        try:
+            return func(value, decimals)
+        except ValueError as error:  # e.g. the repr of 1e16 has no "."
+            return type(error)
+
+    mismatches = [
+        (value, decimals)
+        for value, decimals in values
+        if result(round_format_str, value, decimals)
+        != result(_round_format_str_decimal, value, decimals)
+    ]
+    print("{:d} values, {:d} mismatches".format(n, len(mismatches)))
+    values = [v for v in values if isinstance(result(round_format_str, *v), str)]
+    n = len(values)
+    for func in (_round_format_str_decimal, round_format_str):
+        _number_strings.clear()
+        start = time.perf_counter()
+        for value, decimals in values:
+            func(value, decimals)
+        cold = (time.perf_counter() - start) / n * 1e6
+        repeated = values[:1000] * 10
+        _number_strings.clear()
+        start = time.perf_counter()
+        for value, decimals in repeated:
+            func(value, decimals)
+        cached = (time.perf_counter() - start) / len(repeated) * 1e6
+        print(
+            "{:<26s} {:6.2f} us/call, {:6.2f} us/call repeated values".format(
+                func.__name__, cold, cached
+            )
+        )
+
+
+if __name__ == "__main__":
+    _benchmark_round_format_str()
@@ -1,268 +1,752 @@
-#!/usr/bin/env python2
-# -*- coding:utf-8 -*-
-from __future__ import absolute_import, division, print_function, with_statement
-
-import math
-
-""""
-Simple interpolation
-"""
-
-# Equations
-# http://codeplea.com/simple-interpolation
-# http://algorithmist.wordpress.com/
-
-_fact_cache = {}
-
-
-def fact(n):
-    """Memoized factorial function"""
-    try:
-        return _fact_cache[n]
-    except KeyError:
-        if n == 1 or n == 0:
-            result = 1
-        else:
-            result = n * fact(n - 1)
-        _fact_cache[n] = result
-        return result
-
-
-# fact = math.factorial
-
-
-# NyuFx
-# Binomial coefficient
-def binomial(i, n):
-    return fact(n) / (fact(i) * fact(n - i))
-
-
-# Bernstein polynom
-def bernstein(t, i, n):
-    return binomial(i, n) * pow(t, i) * pow((1 - t), n - i)
-
-
-def bezier_curve(t, p):
-    """Bezier Curve"""
-    # Calculate coordinate
-    n = len(p) - 1
-    num = 0
-    for i, position in enumerate(p):
-        num += position * bernstein(t, i, n)
-    return num
-
-
-# Interpolate funcs
-def linear(t, start, end):
-    return t * (end - start) + start
-
-
-# For gradient Color correction
-# https://youtu.be/LKnqECcg6Gw
-def linear_squared(t, start, end):
-    return math.sqrt(linear(t, start**2, end**2))
-
-
-def cosine(t, start, end, repeat=None):
-    if not repeat:
-        repeat = 1
-    t = 0.5 - (math.cos(repeat * math.pi * t) / 2)
-    return linear(t, start, end)
-
-
-def sine(t, start, end):
-    t = math.sin((math.pi * t) / 2)
-    return linear(t, start, end)
-
-
-def smooth_step(t, start, end):
-    t = (t**2) * (3 - (2 * t))
-    return linear(t, start, end)
-
-
-def smooth_step_double(t, start, end):
-    t = smooth_step(t, start, end)
-    return smooth_step(t, start, end)
-
-
-def acceleration(t, start, end):
-    t **= 2
-    return linear(t, start, end)
-
-
-def cubic_acceleration(t, start, end):
-    t **= 3
-    return linear(t, start, end)
-
-
-def deccelaration(t, start, end):
-    t = 1 - (1 - t) ** 2
-    return linear(t, start, end)
-
-
-def cubic_deccelaration(t, start, end):
-    t = 1 - (1 - t) ** 3
-    return linear(t, start, end)
-
-
-def sigmoid(t, start, end):
-    t = 1 / (1 + math.exp(-t))
-    return linear(t, start, end)
-
-
-# http://cubic-bezier.com
-
-
-def custom_curve(t, curve, start, end):
-    t = bezier_curve(t, curve)
-    return linear(t, start, end)
-
-
-# http://matthewlein.com/ceaser/
-def ease(t, start, end):
-    return custom_curve(t, (0.25, 0.1, 0.25, 1), start, end)
-
-
-def ease_in(t, start, end):
-    return custom_curve(t, (0.42, 0, 1, 1), start, end)
-
-
-def ease_out(t, start, end):
-    return custom_curve(t, (0, 0, 0.58, 1), start, end)
-
-
-def ease_in_out(t, start, end):
-    return custom_curve(t, (0.420, 0.000, 0.580, 1.000), start, end)
-
-
-# Penner Equation (aproximated)
-def ease_in_quad(t, start, end):
-    return custom_curve(t, (0.550, 0.085, 0.680, 0.530), start, end)
-
-
-def ease_in_cubic(t, start, end):
-    return custom_curve(t, (0.550, 0.055, 0.675, 0.190), start, end)
-
-
-def ease_in_quart(t, start, end):
-    return custom_curve(t, (0.895, 0.030, 0.685, 0.220), start, end)
-
-
-def ease_in_quint(t, start, end):
-    return custom_curve(t, (0.755, 0.050, 0.855, 0.060), start, end)
-
-
-def ease_in_sine(t, start, end):
-    return custom_curve(t, (0.470, 0.000, 0.745, 0.715), start, end)
-
-
-def ease_in_expo(t, start, end):
-    return custom_curve(t, (0.950, 0.050, 0.795, 0.035), start, end)
-
-
-def ease_in_circ(t, start, end):
-    return custom_curve(t, (0.600, 0.040, 0.980, 0.335), start, end)
-
-
-def ease_out_quad(t, start, end):
-    return custom_curve(t, (0.250, 0.460, 0.450, 0.940), start, end)
-
-
-def ease_out_cubic(t, start, end):
-    return custom_curve(t, (0.215, 0.610, 0.355, 1.000), start, end)
-
-
-def ease_out_quart(t, start, end):
-    return custom_curve(t, (0.165, 0.840, 0.440, 1.000), start, end)
-
-
-def ease_out_quint(t, start, end):
-    return custom_curve(t, (0.230, 1.000, 0.320, 1.000), start, end)
-
-
-def ease_out_sine(t, start, end):
-    return custom_curve(t, (0.390, 0.575, 0.565, 1.000), start, end)
-
-
-def ease_out_expo(t, start, end):
-    return custom_curve(t, (0.190, 1.000, 0.220, 1.000), start, end)
-
-
-def ease_out_circ(t, start, end):
-    return custom_curve(t, (0.075, 0.820, 0.165, 1.000), start, end)
-
-
-def ease_in_out_quad(t, start, end):
-    return custom_curve(t, (0.455, 0.030, 0.515, 0.955), start, end)
-
-
-def ease_in_out_cubic(t, start, end):
-    return custom_curve(t, (0.645, 0.045, 0.355, 1.000), start, end)
-
-
-def ease_in_out_quart(t, start, end):
-    return custom_curve(t, (0.770, 0.000, 0.175, 1.000), start, end)
-
-
-def ease_in_out_quint(t, start, end):
-    return custom_curve(t, (0.860, 0.000, 0.070, 1.000), start, end)
-
-
-def ease_in_out_sine(t, start, end):
-    return custom_curve(t, (0.445, 0.050, 0.550, 0.950), start, end)
-
-
-def ease_in_out_expo(t, start, end):
-    return custom_curve(t, (1.000, 0.000, 0.000, 1.000), start, end)
-
-
-def ease_in_out_circ(t, start, end):
-    return custom_curve(t, (0.785, 0.135, 0.150, 0.860), start, end)
-
-
-# KAFX Equations
-def backstart(t, start, end):
-    return custom_curve(t, (0, 0, 0.2, -0.3, 0.6, 0.26, 1, 1), start, end)
-
-
-def boing(t, start, end):
-    return custom_curve(t, (0, 0, 0.42, 0.0, 0.58, 1.5, 1, 1), start, end)
-
-
-def interpolate_range(start, end, steps, func=linear, repeat=None):
-    nsteps = steps - 1
-    for i in range(steps):
-        t = i / nsteps
-        if repeat:
-            yield func(t, start, end, repeat)
-        else:
-            yield func(t, start, end)
-
-
-def interpolate_circle_range(steps, func=linear):
-    return list(interpolate_range(0, 360, steps + 1, func))[:steps]
-
-
-def bezier_curve_range(steps, points):
-    """Range of points in a curve bezier"""
-    points = list(zip(*points))
-    for i in range(steps):
-        t = i / float(steps - 1)
-        yield [bezier_curve(t, points[i]) for i in range(len(points))]
-
-
-DEFAULT_INTERPOLATE = linear
-
-if __name__ == "__main__":
-    # print(
-    #     list(interpolate_range(
-    #         start=0, end=10, steps=20, func=cosine, repeat=8)))
-    # print(list(interpolate_range(start=0, end=10, steps=20, func=sine)))
-    vueltas = 3
-    n = 10
-    print(
-        list(
-            int(round(math.degrees(radian), 0))
-            for radian in interpolate_range(0, vueltas * 2 * math.pi, n + 1)
-        )
-    )
+#!/usr/bin/env python2
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, with_statement
+
+import math
+import time
+from collections import OrderedDict
+from functools import partial
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+""""
+Simple interpolation
+"""
+
+# Equations
+# http://codeplea.com/simple-interpolation
+# http://algorithmist.wordpress.com/
+
+_fact_cache = {}
+
+
+def fact(n):
+    """Memoized factorial function"""
+    try:
+        return _fact_cache[n]
+    except KeyError:
+        if n == 1 or n == 0:
+            result = 1
+        else:
+            result = n * fact(n - 1)
+        _fact_cache[n] = result
+        return result
+
+
+# fact = math.factorial
+
+
+# NyuFx
+# Binomial coefficient
+def binomial(i, n):
+    return fact(n) / (fact(i) * fact(n - i))
+
+
+_binomials_cache = {}
+
+
+def binomials(n):
+    """Memoized tuple of the binomial coefficients of degree n"""
+    try:
+        return _binomials_cache[n]
+    except KeyError:
+        result = _binomials_cache[n] = tuple(binomial(i, n) for i in range(n + 1))
+        return result
+
+
+# Bernstein polynom
+def bernstein(t, i, n):
+    return binomial(i, n) * pow(t, i) * pow((1 - t), n - i)
+
+
+def bezier_curve(t, p):
+    """Bezier Curve"""
+    # Calculate coordinate, same as the sum of position * bernstein(t, i, n)
+    n = len(p) - 1
+    coefficients = binomials(n)
+    num = 0
+    for i, position in enumerate(p):
+        num += position * (coefficients[i] * pow(t, i) * pow((1 - t), n - i))
+    return num
+
+
+# Interpolate funcs
+def linear(t, start, end):
+    return t * (end - start) + start
+
+
+# For gradient Color correction
+# https://youtu.be/LKnqECcg6Gw
+def linear_squared(t, start, end):
+    return math.sqrt(linear(t, start**2, end**2))
+
+
+def cosine(t, start, end, repeat=None):
+    if not repeat:
+        repeat = 1
+    t = 0.5 - (math.cos(repeat * math.pi * t) / 2)
+    return linear(t, start, end)
+
+
+def sine(t, start, end):
+    t = math.sin((math.pi * t) / 2)
+    return linear(t, start, end)
+
+
+def smooth_step(t, start, end):
+    t = (t**2) * (3 - (2 * t))
+    return linear(t, start, end)
+
+
+def smooth_step_double(t, start, end):
+    t = smooth_step(t, start, end)
+    return smooth_step(t, start, end)
+
+
+def acceleration(t, start, end):
+    t **= 2
+    return linear(t, start, end)
+
+
+def cubic_acceleration(t, start, end):
+    t **= 3
+    return linear(t, start, end)
+
+
+def deccelaration(t, start, end):
+    t = 1 - (1 - t) ** 2
+    return linear(t, start, end)
+
+
+def cubic_deccelaration(t, start, end):
+    t = 1 - (1 - t) ** 3
+    return linear(t, start, end)
+
+
+def sigmoid(t, start, end):
+    t = 1 / (1 + math.exp(-t))
+    return linear(t, start, end)
+
+
+# Control values of the bezier easings
+CURVES = {
+    # http://matthewlein.com/ceaser/
+    "ease": (0.25, 0.1, 0.25, 1),
+    "ease_in": (0.42, 0, 1, 1),
+    "ease_out": (0, 0, 0.58, 1),
+    "ease_in_out": (0.420, 0.000, 0.580, 1.000),
+    # Penner Equation (aproximated)
+    "ease_in_quad": (0.550, 0.085, 0.680, 0.530),
+    "ease_in_cubic": (0.550, 0.055, 0.675, 0.190),
+    "ease_in_quart": (0.895, 0.030, 0.685, 0.220),
+    "ease_in_quint": (0.755, 0.050, 0.855, 0.060),
+    "ease_in_sine": (0.470, 0.000, 0.745, 0.715),
+    "ease_in_expo": (0.950, 0.050, 0.795, 0.035),
+    "ease_in_circ": (0.600, 0.040, 0.980, 0.335),
+    "ease_out_quad": (0.250, 0.460, 0.450, 0.940),
+    "ease_out_cubic": (0.215, 0.610, 0.355, 1.000),
+    "ease_out_quart": (0.165, 0.840, 0.440, 1.000),
+    "ease_out_quint": (0.230, 1.000, 0.320, 1.000),
+    "ease_out_sine": (0.390, 0.575, 0.565, 1.000),
+    "ease_out_expo": (0.190, 1.000, 0.220, 1.000),
+    "ease_out_circ": (0.075, 0.820, 0.165, 1.000),
+    "ease_in_out_quad": (0.455, 0.030, 0.515, 0.955),
+    "ease_in_out_cubic": (0.645, 0.045, 0.355, 1.000),
+    "ease_in_out_quart": (0.770, 0.000, 0.175, 1.000),
+    "ease_in_out_quint": (0.860, 0.000, 0.070, 1.000),
+    "ease_in_out_sine": (0.445, 0.050, 0.550, 0.950),
+    "ease_in_out_expo": (1.000, 0.000, 0.000, 1.000),
+    "ease_in_out_circ": (0.785, 0.135, 0.150, 0.860),
+    # KAFX Equations
+    "backstart": (0, 0, 0.2, -0.3, 0.6, 0.26, 1, 1),
+    "boing": (0, 0, 0.42, 0.0, 0.58, 1.5, 1, 1),
+}
+
+
+# http://cubic-bezier.com
+def custom_curve(t, curve, start, end):
+    t = bezier_curve(t, curve)
+    return linear(t, start, end)
+
+
+# http://matthewlein.com/ceaser/
+def ease(t, start, end):
+    return custom_curve(t, CURVES["ease"], start, end)
+
+
+def ease_in(t, start, end):
+    return custom_curve(t, CURVES["ease_in"], start, end)
+
+
+def ease_out(t, start, end):
+    return custom_curve(t, CURVES["ease_out"], start, end)
+
+
+def ease_in_out(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out"], start, end)
+
+
+# Penner Equation (aproximated)
+def ease_in_quad(t, start, end):
+    return custom_curve(t, CURVES["ease_in_quad"], start, end)
+
+
+def ease_in_cubic(t, start, end):
+    return custom_curve(t, CURVES["ease_in_cubic"], start, end)
+
+
+def ease_in_quart(t, start, end):
+    return custom_curve(t, CURVES["ease_in_quart"], start, end)
+
+
+def ease_in_quint(t, start, end):
+    return custom_curve(t, CURVES["ease_in_quint"], start, end)
+
+
+def ease_in_sine(t, start, end):
+    return custom_curve(t, CURVES["ease_in_sine"], start, end)
+
+
+def ease_in_expo(t, start, end):
+    return custom_curve(t, CURVES["ease_in_expo"], start, end)
+
+
+def ease_in_circ(t, start, end):
+    return custom_curve(t, CURVES["ease_in_circ"], start, end)
+
+
+def ease_out_quad(t, start, end):
+    return custom_curve(t, CURVES["ease_out_quad"], start, end)
+
+
+def ease_out_cubic(t, start, end):
+    return custom_curve(t, CURVES["ease_out_cubic"], start, end)
+
+
+def ease_out_quart(t, start, end):
+    return custom_curve(t, CURVES["ease_out_quart"], start, end)
+
+
+def ease_out_quint(t, start, end):
+    return custom_curve(t, CURVES["ease_out_quint"], start, end)
+
+
+def ease_out_sine(t, start, end):
+    return custom_curve(t, CURVES["ease_out_sine"], start, end)
+
+
+def ease_out_expo(t, start, end):
+    return custom_curve(t, CURVES["ease_out_expo"], start, end)
+
+
+def ease_out_circ(t, start, end):
+    return custom_curve(t, CURVES["ease_out_circ"], start, end)
+
+
+def ease_in_out_quad(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out_quad"], start, end)
+
+
+def ease_in_out_cubic(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out_cubic"], start, end)
+
+
+def ease_in_out_quart(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out_quart"], start, end)
+
+
+def ease_in_out_quint(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out_quint"], start, end)
+
+
+def ease_in_out_sine(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out_sine"], start, end)
+
+
+def ease_in_out_expo(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out_expo"], start, end)
+
+
+def ease_in_out_circ(t, start, end):
+    return custom_curve(t, CURVES["ease_in_out_circ"], start, end)
+
+
+# KAFX Equations
+def backstart(t, start, end):
+    return custom_curve(t, CURVES["backstart"], start, end)
+
+
+def boing(t, start, end):
+    return custom_curve(t, CURVES["boing"], start, end)
+
+
+# CSS cubic-bezier(x1, y1, x2, y2) timing functions
+# https://www.w3.org/TR/css-easing-1/#cubic-bezier-easing-functions
+class CubicBezier(object):
+
+    """Cubic bezier easing from (0, 0) to (1, 1), as in CSS
+
+    Unlike `custom_curve`, the control values are (x, y) points: for an
+    input t (the x axis) the curve parameter is solved with Newton's
+    method (bisection when it does not converge) and the y value of that
+    parameter is the eased t.
+
+    A table of `samples` solved values is built on first use and shared
+    by the instances of the same curve (the last MAX_CACHED_TABLES
+    curves used are kept), calls interpolate in the table.
+    The instances are interpolation functions (t, start, end) and take
+    NumPy arrays too.
+
+    Parameters:
+    :param x1, y1, x2, y2: control points, x1 and x2 in [0, 1]
+    :param samples: size of the lookup table
+
+    Example:
+    >>> ease = CubicBezier(0.25, 0.1, 0.25, 1)
+    >>> round(ease(0.5, 0, 100), 2)
+    80.24
+    """
+
+    MAX_CACHED_TABLES = 256
+    _tables = OrderedDict()
+    epsilon = 1e-7
+
+    def __init__(self, x1, y1, x2, y2, samples=1025):
+        if not (0 <= x1 <= 1 and 0 <= x2 <= 1):
+            raise ValueError("x1 and x2 must be in the range [0, 1]")
+        if samples < 2:
+            raise ValueError("samples must be greater than 1")
+        self.points = float(x1), float(y1), float(x2), float(y2)
+        self.samples = samples
+        self._table = None
+        self._arrays = None
+        # Polynomial coefficients of x(t) and y(t)
+        self._cx = 3 * x1
+        self._bx = 3 * (x2 - x1) - self._cx
+        self._ax = 1 - self._cx - self._bx
+        self._cy = 3 * y1
+        self._by = 3 * (y2 - y1) - self._cy
+        self._ay = 1 - self._cy - self._by
+
+    def _x(self, t):
+        return ((self._ax * t + self._bx) * t + self._cx) * t
+
+    def _y(self, t):
+        return ((self._ay * t + self._by) * t + self._cy) * t
+
+    def _dx(self, t):
+        return (3 * self._ax * t + 2 * self._bx) * t + self._cx
+
+    def solve_t(self, x):
+        """Curve parameter of the point with the given x"""
+        t = x
+        for _ in range(8):
+            error = self._x(t) - x
+            if abs(error) < self.epsilon:
+                return t
+            slope = self._dx(t)
+            if abs(slope) < 1e-6:
+                break
+            t -= error / slope
+        low, high = 0.0, 1.0
+        t = min(max(x, low), high)
+        while high - low > self.epsilon:
+            if self._x(t) < x:
+                low = t
+            else:
+                high = t
+            t = (low + high) / 2
+        return t
+
+    def solve(self, x):
+        """Exact eased value (y) of x, without the lookup table"""
+        return self._y(self.solve_t(min(max(x, 0.0), 1.0)))
+
+    @property
+    def table(self):
+        """Eased values of x = i / (samples - 1), cached per curve"""
+        if self._table is None:
+            key = self.points, self.samples
+            tables = CubicBezier._tables
+            try:
+                self._table = tables[key]
+            except KeyError:
+                n = self.samples - 1
+                self._table = tables[key] = [self.solve(i / n) for i in range(n + 1)]
+                if len(tables) > self.MAX_CACHED_TABLES:
+                    tables.popitem(last=False)
+            else:
+                tables.move_to_end(key)
+        return self._table
+
+    def ease(self, t):
+        """Eased value of t, interpolated in the lookup table
+
+        Curves with a vertical tangent (e.g. x1 = 1, x2 = 0) are only
+        approximated around it, `solve` gives the exact values.
+        """
+        table = self._table or self.table
+        if t <= 0:
+            return table[0]
+        if t >= 1:
+            return table[-1]
+        position = t * (self.samples - 1)
+        i = int(position)
+        y0 = table[i]
+        return y0 + (table[i + 1] - y0) * (position - i)
+
+    def __call__(self, t, start, end):
+        if numpy is not None and isinstance(t, numpy.ndarray):
+            if self._arrays is None:
+                x = numpy.linspace(0, 1, self.samples)
+                self._arrays = x, numpy.array(self.table)
+            t = numpy.interp(t, *self._arrays)
+        else:
+            t = self.ease(t)
+        return linear(t, start, end)
+
+    def __eq__(self, other):
+        if isinstance(other, CubicBezier):
+            return (self.points, self.samples) == (other.points, other.samples)
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.points, self.samples))
+
+    def __repr__(self):
+        return "<{:s}({:g}, {:g}, {:g}, {:g})>".format(
+            self.__class__.__name__, *self.points
+        )
+
+
+def cubic_bezier(x1, y1, x2, y2):
+    """CSS cubic-bezier(x1, y1, x2, y2) interpolation function
+
+    Example:
+    >>> list(interpolate_range(0, 10, 3, cubic_bezier(0.42, 0, 0.58, 1)))
+    [0.0, 5.0, 10.0]
+    """
+    return CubicBezier(x1, y1, x2, y2)
+
+
+def css_easing(name):
+    """Cubic bezier easing of the control values of CURVES[name]
+
+    The ease_* functions use the values as a 1-D curve, this is the real
+    CSS easing of the same name.
+
+    Example:
+    >>> css_easing("ease_in_out")
+    <CubicBezier(0.42, 0, 0.58, 1)>
+    """
+    try:
+        curve = CURVES[name]
+    except KeyError:
+        raise ValueError("Unknown easing: {!r}".format(name))
+    if len(curve) != 4:
+        raise ValueError("{!r} is not a cubic bezier easing".format(name))
+    return CubicBezier(*curve)
+
+
+def interpolate_range(start, end, steps, func=linear, repeat=None):
+    nsteps = steps - 1
+    for i in range(steps):
+        t = i / nsteps
+        if repeat:
+            yield func(t, start, end, repeat)
+        else:
+            yield func(t, start, end)
+
+
+def interpolate_circle_range(steps, func=linear):
+    return list(interpolate_range(0, 360, steps + 1, func))[:steps]
+
+
+def bezier_curve_range(steps, points):
+    """Range of points in a curve bezier"""
+    if numpy is not None:
+        for point in bezier_curve_array(steps, points).tolist():
+            yield point
+        return
+    points = list(zip(*points))
+    for i in range(steps):
+        t = i / float(steps - 1)
+        yield [bezier_curve(t, points[i]) for i in range(len(points))]
+
+
+# Curves of a higher degree use de Casteljau, the Bernstein basis loses
+# precision with the big binomial coefficients
+MAX_BERNSTEIN_DEGREE = 32
+# Max number of values kept in the cached matrices (8 bytes each)
+MAX_CACHED_BASIS_SIZE = 2**22
+_bernstein_cache = {}
+
+
+def bernstein_matrix(degree, steps):
+    """Memoized (steps, degree + 1) matrix of the Bernstein basis
+
+    Row s has the basis values at t = s / (steps - 1), so a curve of
+    control points P (degree + 1, dims) is bernstein_matrix(...) x P.
+    The matrices are read only.
+    """
+    key = degree, steps
+    try:
+        return _bernstein_cache[key]
+    except KeyError:
+        pass
+    t = _range_t(steps)
+    u = 1 - t
+    coefficients = binomials(degree)
+    matrix = numpy.empty((steps, degree + 1))
+    for i in range(degree + 1):
+        matrix[:, i] = coefficients[i] * numpy.power(t, i) * numpy.power(u, degree - i)
+    matrix.setflags(write=False)
+    cached = sum(basis.size for basis in _bernstein_cache.values())
+    if cached + matrix.size > MAX_CACHED_BASIS_SIZE:
+        _bernstein_cache.clear()
+    _bernstein_cache[key] = matrix
+    return matrix
+
+
+def _range_t(steps):
+    """t values of the steps of a range (the same that i / (steps - 1))"""
+    if steps == 1:
+        return numpy.zeros(1)
+    return numpy.arange(steps) / float(steps - 1)
+
+
+def de_casteljau(t, points):
+    """Points of a bezier curve at the values of an array `t`
+
+    Numerically stable for any degree. Return a (len(t), dims) array.
+    """
+    t = numpy.asarray(t, dtype=float)[:, None, None]
+    level = numpy.asarray(points, dtype=float)[None, :, :]
+    while level.shape[1] > 1:
+        level = (1 - t) * level[:, :-1] + t * level[:, 1:]
+    return level[:, 0]
+
+
+def bezier_curve_array(steps, points):
+    """Same as `bezier_curve_range` but return a (steps, dims) NumPy array
+
+    The curve is the product of the cached Bernstein basis matrix and the
+    control points, summed term by term in the order of `bezier_curve`,
+    so the values are the same up to rounding. Curves of a degree higher than
+    MAX_BERNSTEIN_DEGREE use `de_casteljau`.
+    """
+    if numpy is None:
+        raise ImportError("bezier_curve_array requires NumPy")
+    points = numpy.array([tuple(point) for point in points], dtype=float)
+    degree = len(points) - 1
+    if degree > MAX_BERNSTEIN_DEGREE:
+        return de_casteljau(_range_t(steps), points)
+    matrix = bernstein_matrix(degree, steps)
+    curve = 0
+    for i in range(degree + 1):
+        curve = curve + points[i] * matrix[:, i, None]
+    return curve
+
+
+# Array interpolation
+# The _*_array functions take NumPy arrays (t, start and end broadcast) and
+# compute all the samples at once with NumPy ufuncs. The operations are the
+# ones of the scalar functions, the results can differ from them in the
+# last bits (numpy.cos, numpy.exp... are not the libm functions).
+
+
+def _bezier_curve_array(t, p):
+    n = len(p) - 1
+    coefficients = binomials(n)
+    u = 1 - t
+    num = 0
+    for i, position in enumerate(p):
+        num = num + position * (
+            coefficients[i] * numpy.power(t, i) * numpy.power(u, n - i)
+        )
+    return num
+
+
+def _linear_array(t, start, end):
+    return t * (end - start) + start
+
+
+def _linear_squared_array(t, start, end):
+    return numpy.sqrt(_linear_array(t, start * start, end * end))
+
+
+def _cosine_array(t, start, end, repeat=None):
+    if not repeat:
+        repeat = 1
+    t = 0.5 - (numpy.cos(repeat * math.pi * t) / 2)
+    return _linear_array(t, start, end)
+
+
+def _sine_array(t, start, end):
+    t = numpy.sin((math.pi * t) / 2)
+    return _linear_array(t, start, end)
+
+
+def _smooth_step_array(t, start, end):
+    t = (t * t) * (3 - (2 * t))
+    return _linear_array(t, start, end)
+
+
+def _smooth_step_double_array(t, start, end):
+    # Same as smooth_step_double, the first step value is used as t
+    t = _smooth_step_array(t, start, end)
+    return _smooth_step_array(t, start, end)
+
+
+def _acceleration_array(t, start, end):
+    return _linear_array(t * t, start, end)
+
+
+def _cubic_acceleration_array(t, start, end):
+    return _linear_array(t * t * t, start, end)
+
+
+def _deccelaration_array(t, start, end):
+    u = 1 - t
+    return _linear_array(1 - u * u, start, end)
+
+
+def _cubic_deccelaration_array(t, start, end):
+    u = 1 - t
+    return _linear_array(1 - u * u * u, start, end)
+
+
+def _sigmoid_array(t, start, end):
+    t = 1 / (1 + numpy.exp(-t))
+    return _linear_array(t, start, end)
+
+
+def _custom_curve_array(t, curve, start, end):
+    return _linear_array(_bezier_curve_array(t, curve), start, end)
+
+
+def _curve_array(curve):
+    def func(t, start, end):
+        return _custom_curve_array(t, curve, start, end)
+
+    return func
+
+
+# Interpolation function -> array interpolation function
+ARRAY_FUNCS = {
+    linear: _linear_array,
+    linear_squared: _linear_squared_array,
+    cosine: _cosine_array,
+    sine: _sine_array,
+    smooth_step: _smooth_step_array,
+    smooth_step_double: _smooth_step_double_array,
+    acceleration: _acceleration_array,
+    cubic_acceleration: _cubic_acceleration_array,
+    deccelaration: _deccelaration_array,
+    cubic_deccelaration: _cubic_deccelaration_array,
+    sigmoid: _sigmoid_array,
+    custom_curve: _custom_curve_array,
+}
+for _name, _curve in CURVES.items():
+    ARRAY_FUNCS[globals()[_name]] = _curve_array(_curve)
+
+
+def array_func(func):
+    """Array version of an interpolation function, None if there is none
+
+    Partials of the interpolation functions (e.g. partial(cosine,
+    repeat=4)) get a partial of the array version.
+    """
+    if isinstance(func, CubicBezier):
+        return func
+    if isinstance(func, partial):
+        afunc = array_func(func.func)
+        if afunc is None:
+            return None
+        return partial(afunc, *func.args, **(func.keywords or {}))
+    try:
+        return ARRAY_FUNCS.get(func)
+    except TypeError:  # unhashable
+        return None
+
+
+def interpolate_array(t, start, end, func=linear, repeat=None):
+    """Interpolate all the values of a NumPy array `t` (0 to 1) at once
+
+    `func` is any interpolation function of this module, the result is
+    the same (up to rounding) that calling it for every value. Other
+    functions are applied element by element.
+
+    Example:
+    >>> interpolate_array(numpy.linspace(0, 1, 3), 0, 10, cosine)
+    array([ 0.,  5., 10.])
+    """
+    if numpy is None:
+        raise ImportError("interpolate_array requires NumPy")
+    t = numpy.asarray(t, dtype=float)
+    afunc = array_func(func)
+    if afunc is None:
+        afunc = numpy.vectorize(func, otypes=[float])
+    if repeat:
+        return afunc(t, start, end, repeat)
+    return afunc(t, start, end)
+
+
+def interpolate_range_array(start, end, steps, func=linear, repeat=None):
+    """Same as `interpolate_range` but return a NumPy array"""
+    if numpy is None:
+        raise ImportError("interpolate_range_array requires NumPy")
+    t = numpy.arange(steps) / (steps - 1)
+    return interpolate_array(t, start, end, func, repeat)
+
+
+def _benchmark_interpolate(samples=10**6, scalar_samples=10**5):
+    """Time the scalar and the array version of every easing
+
+    The scalar functions run over `scalar_samples` values only (they take
+    seconds per 10^6 samples), the times are shown per 10^6 samples.
+    """
+    t = numpy.random.RandomState(0).random_sample(samples)
+    ts = t[:scalar_samples].tolist()
+    scale = samples / scalar_samples
+    print("{:<22s} {:>10s} {:>10s} {:>8s}".format("func", "scalar", "array", "x"))
+    for func, afunc in ARRAY_FUNCS.items():
+        if func is custom_curve:
+            continue
+        start = time.perf_counter()
+        for value in ts:
+            func(value, 0.0, 1.0)
+        scalar = (time.perf_counter() - start) * scale
+        start = time.perf_counter()
+        afunc(t, 0.0, 1.0)
+        vector = time.perf_counter() - start
+        print(
+            "{:<22s} {:>9.3f}s {:>9.4f}s {:>8.0f}".format(
+                func.__name__, scalar, vector, scalar / vector
+            )
+        )
+
+
+DEFAULT_INTERPOLATE = linear
+
+if __name__ == "__main__":
+    if numpy is not None:
+        _benchmark_interpolate()
+    # print(
+    #     list(interpolate_range(
+    #         start=0, end=10, steps=20, func=cosine, repeat=8)))
+    # print(list(interpolate_range(start=0, end=10, steps=20, func=sine)))
+    vueltas = 3
+    n = 10
+    print(
+        list(
+            int(round(math.degrees(radian), 0))
+            for radian in interpolate_range(0, vueltas * 2 * math.pi, n + 1)
+        )
+    )
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Karaoke timing of the syllables and letters of a line
+
+The times and positions of the syllables/letters are kept as columns
+(one array per value) and the phase intervals of a whole line are
+computed at once, without a `Time` per operation. `Fx` calls the hooks
+of an effect with those intervals.
+"""
+from array import array
+from collections import namedtuple
+
+try:
+    from asstime import Time
+except ImportError:
+    from .asstime import Time
+
+_POSITION_COLUMNS = ("left", "center", "right", "top", "middle", "bottom", "width")
+
+
+class Columns(
+    namedtuple("Columns", "start, end, left, center, right, top, middle, bottom, width")
+):
+
+    """Values of the syllables or letters of a line as columns
+
+    Times are `array("l")` of milliseconds and positions `array("d")` of
+    pixels, with one value per syllable/letter.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_items(cls, items):
+        """Create new `Columns` from a list of syllables or letters"""
+        return cls(
+            array("l", (item.start.ms for item in items)),
+            array("l", (item.end.ms for item in items)),
+            *(
+                array("d", (getattr(item, name) for item in items))
+                for name in _POSITION_COLUMNS
+            )
+        )
+
+    def numpy(self):
+        """Columns as NumPy arrays (without copying the data)"""
+        import numpy
+
+        return Columns(*(numpy.frombuffer(col, col.typecode) for col in self))
+
+
+def shift_times(times, ms):
+    """Add ms to all the times"""
+    return array("l", (t + ms for t in times))
+
+
+def clamp_times(times, low=None, high=None):
+    """Limit all the times to the interval [low, high]"""
+    if low is not None:
+        times = array("l", (t if t > low else low for t in times))
+    if high is not None:
+        times = array("l", (t if t < high else high for t in times))
+    return times
+
+
+def delay_times(times, delay, limit):
+    """Add delay to all the times, keeping the times where the delayed
+    time reach the limit (e.g. the letter end against the line end)"""
+    return array("l", (t + delay if t + delay < limit else t for t in times))
+
+
+def fill_times(ms, n):
+    """Column of n times with the same value"""
+    return array("l", [ms]) * n
+
+
+Phases = namedtuple("Phases", "sleep, active, dead, in_, out")
+
+
+def karaoke_phases(line, columns, delay=50, in_dur=0, out_dur=0):
+    """Phase intervals of the syllables or letters of a line
+
+    Every phase is a pair of (starts, ends) time columns, with one value
+    per syllable/letter of `columns`:
+
+    sleep: line start -> start
+    active: start -> end + delay (end if it pass the line end)
+    dead: end + delay -> line end
+    in_: line start - in_dur -> line start
+    out: line end -> line end + out_dur
+
+    Example:
+    >>> phases = karaoke_phases(line, line.char_columns)
+    >>> starts, ends = phases.dead
+    """
+    lstart, lend = line.start.ms, line.end.ms
+    n = len(columns.start)
+    delayed = delay_times(columns.end, delay, lend)
+    line_starts = fill_times(lstart, n)
+    line_ends = fill_times(lend, n)
+    return Phases(
+        sleep=(line_starts, columns.start),
+        active=(columns.start, delayed),
+        dead=(delayed, line_ends),
+        in_=(fill_times(lstart - in_dur, n), line_starts),
+        out=(line_ends, fill_times(lend + out_dur, n)),
+    )
+
+
+class Fx(object):
+
+    """Event driven karaoke effect
+
+    Subclass and override the hooks of the wanted phases. Every hook gets a
+    copy of the dialog, syllable or letter with the start and end already
+    set to the phase interval, and returns the dialog to add to the script,
+    a list of dialogs, or None to add nothing. Hooks that are not
+    overridden are never called.
+
+    `self.line` is the current line and `self.index` the position of the
+    syllable/letter in the line. `prepare` is called once per line, before
+    any hook.
+
+    Parameters:
+    :param generator: `Generator` where the events are added (anything
+        with `lines` and `extend`)
+    :param delay: ms the active phase lasts after the syllable/letter end
+    :param in_dur: duration of the in phase (before the line start)
+    :param out_dur: duration of the out phase (after the line end)
+    """
+
+    def __init__(self, generator, delay=50, in_dur=0, out_dur=0):
+        self.sub = generator
+        self.delay = delay
+        self.in_dur = in_dur
+        self.out_dur = out_dur
+        self.line = None
+        self.index = 0
+
+    def prepare(self, line):
+        pass
+
+    def OnDialogue(self, diag):
+        pass
+
+    def OnDialogueIn(self, diag):
+        pass
+
+    def OnDialogueOut(self, diag):
+        pass
+
+    def OnSyllable(self, sil):
+        pass
+
+    def OnSyllableSleep(self, sil):
+        pass
+
+    def OnSyllableDead(self, sil):
+        pass
+
+    def OnSyllableIn(self, sil):
+        pass
+
+    def OnSyllableOut(self, sil):
+        pass
+
+    def OnLetter(self, let):
+        pass
+
+    def OnLetterSleep(self, let):
+        pass
+
+    def OnLetterDead(self, let):
+        pass
+
+    def OnLetterIn(self, let):
+        pass
+
+    def OnLetterOut(self, let):
+        pass
+
+    def _hooks(self, prefix):
+        """Overridden hooks of an item type as (phase, hook) pairs"""
+        hooks = []
+        for phase, suffix in (
+            ("sleep", "Sleep"),
+            ("in_", "In"),
+            ("active", ""),
+            ("dead", "Dead"),
+            ("out", "Out"),
+        ):
+            name = prefix + suffix
+            base = getattr(Fx, name, None)  # dialogs don't sleep or die
+            if base is not None and getattr(type(self), name) is not base:
+                hooks.append((phase, getattr(self, name)))
+        return hooks
+
+    def _dispatch(self, items, phases, hooks, events):
+        hooks = [(getattr(phases, phase), hook) for phase, hook in hooks]
+        for i, item in enumerate(items):
+            self.index = i
+            for (starts, ends), hook in hooks:
+                d = item.copy()
+                d.start = Time(starts[i])
+                d.end = Time(ends[i])
+                result = hook(d)
+                if result is None:
+                    continue
+                elif hasattr(result, "as_dict"):  # a single dialog
+                    events.append(result)
+                else:
+                    events.extend(result)
+
+    def run(self):
+        """Call the hooks for every line and add the events to the script"""
+        dialogue_hooks = self._hooks("OnDialogue")
+        syllable_hooks = self._hooks("OnSyllable")
+        letter_hooks = self._hooks("OnLetter")
+        delay, in_dur, out_dur = self.delay, self.in_dur, self.out_dur
+
+        for line in self.sub.lines:
+            self.line = line
+            self.prepare(line)
+            events = []
+            if dialogue_hooks:
+                columns = Columns.from_items([line])
+                phases = karaoke_phases(line, columns, 0, in_dur, out_dur)
+                self._dispatch([line], phases, dialogue_hooks, events)
+            if syllable_hooks:
+                columns = line.syl_columns
+                phases = karaoke_phases(line, columns, delay, in_dur, out_dur)
+                self._dispatch(line.syls, phases, syllable_hooks, events)
+            if letter_hooks:
+                columns = line.char_columns
+                phases = karaoke_phases(line, columns, delay, in_dur, out_dur)
+                self._dispatch(line.chars, phases, letter_hooks, events)
+            self.sub.extend(events)
@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Override tag optimizer for generated scripts
+
+Merges adjacent override blocks, removes the tags without effect (see
+tagbuilder.TagBuilder), empty \\t or \\t that never start, \\fad(0,0),
+turns static \\move into \\pos, rounds the numbers of the tags to the
+precision of their tag, and removes the events of zero duration or
+fully transparent.
+
+Usage:
+    python optimize.py input.ass output.ass
+"""
+from __future__ import absolute_import, division, print_function, with_statement
+
+import codecs
+import re
+import sys
+from collections import namedtuple
+
+try:
+    import asstime
+    from reader import parse_style
+    from tagbuilder import TagBuilder, parse_tags, style_defaults
+except ImportError:
+    from . import asstime
+    from .reader import parse_style
+    from .tagbuilder import TagBuilder, parse_tags, style_defaults
+
+RE_BLOCK = re.compile(r"\{([^{}]*)\}")
+RE_DECIMAL = re.compile(r"-?\d*\.\d+")
+RE_ALPHA_TAG = re.compile(r"\\(?:alpha|[1-4]a)")
+
+# Tag name -> decimals of its numbers (the times of \t, \move, \fad and
+# \k are integers in the scripts written by Generator)
+PRECISION = {
+    "pos": 2,
+    "move": 2,
+    "org": 2,
+    "clip": 2,
+    "iclip": 2,
+    "t": 2,
+    "fad": 0,
+    "fade": 0,
+    "fs": 2,
+    "fsp": 2,
+    "fscx": 2,
+    "fscy": 2,
+    "frx": 2,
+    "fry": 2,
+    "frz": 2,
+    "fr": 2,
+    "fax": 3,
+    "fay": 3,
+    "blur": 2,
+    "be": 2,
+    "bord": 2,
+    "xbord": 2,
+    "ybord": 2,
+    "shad": 2,
+    "xshad": 2,
+    "yshad": 2,
+    "k": 0,
+    "K": 0,
+    "kf": 0,
+    "ko": 0,
+}
+
+
+class OptimizeReport(
+    namedtuple(
+        "OptimizeReport",
+        "events_before, events_after, zero_duration, invisible, "
+        "bytes_before, bytes_after",
+    )
+):
+
+    """Result of an optimization
+
+    events_*: number of events, zero_duration/invisible: events removed,
+    bytes_*: size of the texts (of the files for optimize_file)
+    """
+
+    @property
+    def saved(self):
+        """Fraction of the size saved"""
+        if not self.bytes_before:
+            return 0.0
+        return 1 - self.bytes_after / self.bytes_before
+
+    def __str__(self):
+        return (
+            "{0.events_before:d} -> {0.events_after:d} events "
+            "({0.zero_duration:d} of zero duration, {0.invisible:d} invisible "
+            "removed), {0.bytes_before:d} -> {0.bytes_after:d} bytes "
+            "({1:.1%} saved)".format(self, self.saved)
+        )
+
+
+def _fixed(value, decimals):
+    text = "%.*f" % (decimals, value)
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def clamp_precision(name, tag, precision=PRECISION):
+    """Round the decimals of a tag to the precision of its name"""
+    decimals = precision.get(name)
+    if decimals is None or "." not in tag:
+        return tag
+
+    def replace(m):
+        return _fixed(float(m.group(0)), decimals)
+
+    start = len(name) + 1
+    return tag[:start] + RE_DECIMAL.sub(replace, tag[start:])
+
+
+def _arguments(name, tag):
+    """Arguments of a tag with parentheses"""
+    return tag[len(name) + 2 :].rstrip(")").split(",")
+
+
+def _optimize_transform(tag, duration, precision):
+    """\\t tag optimized, "" if it has no effect"""
+    content = tag[3:-1] if tag.endswith(")") else tag[3:]
+    start = content.find("\\")
+    if start < 0:
+        return ""
+    header, body = content[:start], content[start:]
+    body = _optimize_tags(body, {}, set(), duration, precision)
+    if not body:
+        return ""
+    times = [value for value in header.split(",") if value.strip()]
+    if duration is not None and len(times) >= 2:
+        try:
+            if float(times[0]) >= duration:
+                return ""
+        except ValueError:
+            pass
+    header = clamp_precision("t", "\\t(" + header, precision)
+    return header + body + ")"
+
+
+def _optimize_tags(content, defaults, seen, duration, precision):
+    """Optimized content of an override block"""
+    tags = []
+    for name, tag in parse_tags(content):
+        if name == "t":
+            tag = _optimize_transform(tag, duration, precision)
+        elif name is not None:
+            tag = clamp_precision(name, tag, precision)
+            if name == "fad" and all(
+                value.strip() in ("0", "") for value in _arguments(name, tag)
+            ):
+                tag = ""
+            elif name == "move":
+                values = _arguments(name, tag)
+                if len(values) in (4, 6) and values[0:2] == values[2:4]:
+                    tag = "\\pos({:s},{:s})".format(values[0], values[1])
+        tags.append(tag)
+    return TagBuilder(defaults, base=None).add("".join(tags)).build(seen)
+
+
+def _segments(text):
+    """(block, string) parts of a text, the adjacent tag blocks merged
+
+    block is True for the content of an override block.
+    """
+    segments = []
+    position = 0
+    for m in RE_BLOCK.finditer(text):
+        if m.start() > position:
+            segments.append((False, text[position : m.start()]))
+        content = m.group(1)
+        if content.startswith("\\"):
+            if segments and segments[-1][0] and m.start() == position:
+                if segments[-1][1].startswith("\\"):
+                    content = segments.pop()[1] + content
+            segments.append((True, content))
+        elif content:
+            # Comments are kept as is
+            segments.append((True, content))
+        position = m.end()
+    if position < len(text):
+        segments.append((False, text[position:]))
+    return segments
+
+
+def optimize_text(text, duration=None, defaults=None, precision=None):
+    """Optimized text of an event
+
+    Parameters:
+    :param duration: event duration in ms (removes \\t that never start)
+    :param defaults: TagBuilder defaults of the event style, tags equal
+        to them in the first override block are removed
+    :param precision: dict of tag name -> decimals (PRECISION)
+    """
+    if "{" not in text:
+        return text
+    if precision is None:
+        precision = PRECISION
+    if defaults is None:
+        defaults = {}
+    parts = []
+    seen = set()
+    first = True
+    for block, content in _segments(text):
+        if not block:
+            parts.append(content)
+        elif not content.startswith("\\"):
+            parts.append("{" + content + "}")
+        else:
+            content = _optimize_tags(
+                content, defaults if first else {}, seen, duration, precision
+            )
+            first = False
+            if content:
+                parts.append("{" + content + "}")
+    return "".join(parts)
+
+
+def _alpha(tag, name):
+    return int(tag[len(name) + 1 :].strip("&Hh"), 16) & 0xFF
+
+
+def is_visible(text, alphas=(0, 0, 0, 0)):
+    """Whether an event can be drawn: False only if all its text (or
+    drawing) is drawn with every alpha at &HFF&
+
+    @alphas: alphas of the primary, secondary, border and shadow colors
+    of the style
+
+    Transforms and fades of alpha count as visible, events without text
+    too (they are never removed).
+    """
+    alpha = list(alphas)
+    drawn = False
+    for block, content in _segments(text):
+        if not block:
+            if any(value != 0xFF for value in alpha):
+                return True
+            drawn = True
+            continue
+        for name, tag in parse_tags(content):
+            try:
+                if name == "alpha":
+                    alpha = [_alpha(tag, name)] * 4
+                elif name in ("1a", "2a", "3a", "4a"):
+                    alpha[int(name[0]) - 1] = _alpha(tag, name)
+                elif name == "r":
+                    if tag.strip() != "\\r":
+                        return True
+                    alpha = list(alphas)
+                elif name == "fade" or (name == "t" and RE_ALPHA_TAG.search(tag)):
+                    return True
+            except ValueError:
+                return True
+    return not drawn
+
+
+def style_info(style_item, alignment=None):
+    """(TagBuilder defaults, alphas) of a style dict"""
+    colors = style_item["color"]
+    alphas = tuple(
+        int(colors[key].strip("&Hh"), 16) >> 24
+        for key in ("primary", "secondary", "bord", "shadow")
+    )
+    return style_defaults(style_item, alignment), alphas
+
+
+class _Optimizer(object):
+
+    """Optimizes events one at a time and counts the results"""
+
+    def __init__(self, precision=None):
+        self.precision = precision
+        self.events_before = 0
+        self.events_after = 0
+        self.zero_duration = 0
+        self.invisible = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def event(self, text, start, end, info=None, comment=False):
+        """Optimized text of an event, None to remove it"""
+        self.events_before += 1
+        self.bytes_before += len(text.encode("utf-8"))
+        if not comment:
+            duration = end - start
+            if duration <= 0:
+                self.zero_duration += 1
+                return None
+            defaults, alphas = info if info is not None else ({}, (0, 0, 0, 0))
+            text = optimize_text(text, duration, defaults, self.precision)
+            if not is_visible(text, alphas):
+                self.invisible += 1
+                return None
+        self.events_after += 1
+        self.bytes_after += len(text.encode("utf-8"))
+        return text
+
+    def report(self):
+        return OptimizeReport(
+            self.events_before,
+            self.events_after,
+            self.zero_duration,
+            self.invisible,
+            self.bytes_before,
+            self.bytes_after,
+        )
+
+
+def _optimize_dialogs(dialogs, optimizer, alignment, styles):
+    """Optimize a list of dialog dicts, return the ones kept"""
+    kept = []
+    for d in dialogs:
+        name = d["style"]["name"]
+        if name not in styles:
+            styles[name] = style_info(d["style"], alignment)
+        text = optimizer.event(
+            d["text"],
+            asstime.strtime_to_ms(d["start"]),
+            asstime.strtime_to_ms(d["end"]),
+            styles[name],
+            d["comment"],
+        )
+        if text is not None:
+            d["text"] = text
+            kept.append(d)
+    return kept
+
+
+def optimize_dialogs(dialogs, precision=None, alignment=None):
+    """Optimize a list of dialog dicts
+
+    @alignment: alignment of the written styles (Generator writes 5)
+
+    Return (the dialogs kept, OptimizeReport).
+    """
+    optimizer = _Optimizer(precision)
+    kept = _optimize_dialogs(dialogs, optimizer, alignment, {})
+    return kept, optimizer.report()
+
+
+def optimize_buffer(buffer, precision=None, alignment=None):
+    """Optimize the events of an EventBuffer in place, one batch at a time
+
+    Return an OptimizeReport.
+    """
+    optimizer = _Optimizer(precision)
+    styles = {}
+
+    def optimize(dialogs):
+        return _optimize_dialogs(dialogs, optimizer, alignment, styles)
+
+    buffer.transform(optimize)
+    return optimizer.report()
+
+
+def _file_style_info(value):
+    """style_info of the value of a "Style:" line"""
+    fields = value.split(",")
+    defaults, alphas = style_info(parse_style(value))
+    # Fields not kept by the Reader
+    defaults["u"] = int(bool(int(fields[9])))
+    defaults["s"] = int(bool(int(fields[10])))
+    defaults["frz"] = float(fields[14])
+    return defaults, alphas
+
+
+def optimize_file(input_script, output_script, precision=None):
+    """Optimize the events of an ASS script, streaming it line by line
+
+    Return an OptimizeReport (sizes of the whole files).
+    """
+    optimizer = _Optimizer(precision)
+    styles = {}
+    size_before = size_after = 0
+    with codecs.open(input_script, "rb", "utf-8-sig") as fin:
+        with codecs.open(output_script, "wb", "utf-8-sig") as fout:
+            for line in fin:
+                size_before += len(line.encode("utf-8"))
+                key, sep, value = line.partition(":")
+                if key == "Style":
+                    try:
+                        info = _file_style_info(value.strip())
+                    except (IndexError, ValueError):
+                        pass
+                    else:
+                        styles[value.strip().split(",", 1)[0]] = info
+                elif key in ("Dialogue", "Comment") and value.count(",") >= 9:
+                    body = value.rstrip("\r\n")
+                    fields = body.lstrip().split(",", 9)
+                    text = optimizer.event(
+                        fields[9],
+                        asstime.strtime_to_ms(fields[1]),
+                        asstime.strtime_to_ms(fields[2]),
+                        styles.get(fields[3]),
+                        key == "Comment",
+                    )
+                    if text is None:
+                        continue
+                    fields[9] = text
+                    line = "{:s}: {:s}{:s}".format(
+                        key, ",".join(fields), value[len(body) :]
+                    )
+                size_after += len(line.encode("utf-8"))
+                fout.write(line)
+    report = optimizer.report()
+    return report._replace(bytes_before=size_before, bytes_after=size_after)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__.strip())
+        sys.exit(1)
+    print(optimize_file(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import codecs
+import re
+import zlib
+from collections import Counter, namedtuple
+
+try:
+    import color
+    from tagbuilder import parse_tags
+except ImportError:
+    from . import color
+    from .tagbuilder import parse_tags
+
+# \c, \1c-\4c color tags (&HBBGGRR&, the closing & is optional)
+RE_COLOR = re.compile(r"\\([1-4]?c)&H([0-9A-Fa-f]{1,6})&?")
+RE_BLOCK = re.compile(r"\{([^{}]*)\}")
+COLOR_TAGS = frozenset(("c", "1c", "2c", "3c", "4c"))
+
+
+class QuantizeReport(
+    namedtuple(
+        "QuantizeReport",
+        "colors, palette, kept, tags, changed, removed, max_error, "
+        "bytes_before, bytes_after, compressed_before, compressed_after",
+    )
+):
+
+    """Result of a color quantization
+
+    colors: distinct colors before, palette: palette size, kept: colors
+    out of the error budget left as is, tags: color tags, changed: tags
+    rewritten, removed: tags that repeated the color in use, max_error:
+    largest OKLab error, bytes_*: size of the texts, compressed_*: size of
+    the texts compressed with zlib
+
+    Quantized colors have the same length: the raw size only goes down
+    by the removed tags, most of the size saved shows up compressed (and
+    in the renderer caches), where repeated tags are cheap.
+    """
+
+    @property
+    def distinct(self):
+        """Distinct colors after the quantization"""
+        return self.palette + self.kept
+
+    @property
+    def saved(self):
+        """Fraction of the compressed size saved"""
+        if not self.compressed_before:
+            return 0.0
+        return 1 - self.compressed_after / self.compressed_before
+
+    def __str__(self):
+        return (
+            "{0.colors:d} colors -> {0.distinct:d} ({0.palette:d} palette, "
+            "{0.kept:d} kept), {0.changed:d}/{0.tags:d} tags changed, "
+            "{0.removed:d} removed, max error {0.max_error:.4f}, {0.bytes_before:d} -> "
+            "{0.bytes_after:d} bytes, {0.compressed_before:d} -> "
+            "{0.compressed_after:d} compressed ({1:.1%} saved)".format(self, self.saved)
+        )
+
+
+class _Size(object):
+
+    """Raw and zlib compressed size (and color tags) of a stream of texts"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.tags = 0
+        self._compressed = 0
+        self._zlib = zlib.compressobj()
+
+    def add(self, text):
+        data = text.encode("utf-8")
+        self.bytes += len(data)
+        if "\\" in text:
+            self.tags += len(RE_COLOR.findall(text))
+        self._compressed += len(self._zlib.compress(data))
+
+    def compressed(self):
+        return self._compressed + len(self._zlib.flush())
+
+
+def count_colors(texts):
+    """Counter of the BGR values of the color tags of `texts`"""
+    counts = Counter()
+    for text in texts:
+        if "\\" in text:
+            counts.update(int(m.group(2), 16) for m in RE_COLOR.finditer(text))
+    return counts
+
+
+def color_map(counts, ncolors=64, max_error=0.02):
+    """Map the BGR values of `counts` to their quantized ASS colors
+
+    The colors are clustered with `color.quantize_array`, weighted by
+    the number of tags that use them.
+
+    Return (mapping, quantization): mapping is {bgr: "&HBBGGRR&"} for the
+    colors that change.
+    """
+    values = list(counts)
+    rgb = [(v & 0xFF, (v >> 8) & 0xFF, v >> 16) for v in values]
+    weights = [counts[v] for v in values]
+    result = color.quantize_array(rgb, ncolors, max_error, weights)
+    mapping = {}
+    for value, (r, g, b) in zip(values, result.rgb.tolist()):
+        bgr = (b << 16) | (g << 8) | r
+        if bgr != value:
+            mapping[value] = "&H%06X&" % bgr
+    return mapping, result
+
+
+def _slot(name):
+    return "1c" if name == "c" else name
+
+
+def drop_repeated_colors(text):
+    """Remove the color tags that set the color already in use
+
+    Neighbour chars of a gradient often get the same palette color. A
+    \\t with a color tag makes that color unknown until the next tag,
+    \\r resets the colors to the style. Empty override blocks are removed.
+    """
+    current = {}
+
+    def block(m):
+        tags = []
+        for name, tag in parse_tags(m.group(1)):
+            if name == "r":
+                current.clear()
+            elif name == "t":
+                for c in RE_COLOR.finditer(tag):
+                    current.pop(_slot(c.group(1)), None)
+            elif name in COLOR_TAGS:
+                slot = _slot(name)
+                c = RE_COLOR.match(tag)
+                if c is None:
+                    current.pop(slot, None)
+                else:
+                    value = int(c.group(2), 16)
+                    if current.get(slot) == value:
+                        continue
+                    current[slot] = value
+            tags.append(tag)
+        content = "".join(tags)
+        return "{" + content + "}" if content else ""
+
+    if "\\" not in text:
+        return text
+    return RE_BLOCK.sub(block, text)
+
+
+def quantize_tags(text, mapping):
+    """Replace the color tags of `text` found in `mapping`, and remove the
+    ones that repeat the color in use (see drop_repeated_colors)
+    """
+
+    def replace(m):
+        try:
+            return "\\" + m.group(1) + mapping[int(m.group(2), 16)]
+        except KeyError:
+            return m.group(0)
+
+    if "\\" not in text:
+        return text
+    return drop_repeated_colors(RE_COLOR.sub(replace, text))
+
+
+def quantize_dialogs(dialogs, mapping):
+    """Quantize the color tags of a list of dialog dicts, in place"""
+    for d in dialogs:
+        d["text"] = quantize_tags(d["text"], mapping)
+    return dialogs
+
+
+def _report(counts, mapping, result, before, after):
+    """QuantizeReport of a quantization, `before`/`after` are _Size"""
+    return QuantizeReport(
+        len(counts),
+        len(result.palette),
+        int((result.index < 0).sum()),
+        sum(counts.values()),
+        sum(counts[value] for value in mapping),
+        before.tags - after.tags,
+        result.max_error,
+        before.bytes,
+        after.bytes,
+        before.compressed(),
+        after.compressed(),
+    )
+
+
+def quantize_texts(texts, ncolors=64, max_error=0.02):
+    """Quantize the color tags of a list of texts
+
+    Return (new texts, QuantizeReport).
+    """
+    counts = count_colors(texts)
+    mapping, result = color_map(counts, ncolors, max_error)
+    new_texts = [quantize_tags(text, mapping) for text in texts]
+    before, after = _Size(), _Size()
+    for text, new_text in zip(texts, new_texts):
+        before.add(text)
+        after.add(new_text)
+    return new_texts, _report(counts, mapping, result, before, after)
+
+
+def quantize_buffer(buffer, ncolors=64, max_error=0.02):
+    """Quantize the color tags of an EventBuffer in place
+
+    The events are read once to count the colors and then rewritten with
+    `EventBuffer.transform`, one batch at a time. Return a QuantizeReport.
+    """
+    counts = count_colors(d["text"] for d in buffer)
+    mapping, result = color_map(counts, ncolors, max_error)
+    before, after = _Size(), _Size()
+
+    def quantize(dialogs):
+        for d in dialogs:
+            before.add(d["text"])
+        quantize_dialogs(dialogs, mapping)
+        for d in dialogs:
+            after.add(d["text"])
+        return dialogs
+
+    buffer.transform(quantize)
+    return _report(counts, mapping, result, before, after)
+
+
+def _event_text(line):
+    """Text field of a Dialogue/Comment line, None for other lines"""
+    key, sep, value = line.partition(":")
+    if key in ("Dialogue", "Comment") and value.count(",") >= 9:
+        return value.split(",", 9)[9]
+    return None
+
+
+def quantize_file(input_script, output_script, ncolors=64, max_error=0.02):
+    """Quantize the color tags of an ASS script
+
+    The script is read twice, once to count the colors and once to
+    rewrite the events, so it is never loaded in memory.
+
+    Return a QuantizeReport (sizes of the whole files).
+    """
+    counts = Counter()
+    with codecs.open(input_script, "rb", "utf-8-sig") as fin:
+        for line in fin:
+            text = _event_text(line)
+            if text is not None:
+                counts.update(count_colors([text]))
+    mapping, result = color_map(counts, ncolors, max_error)
+    before, after = _Size(), _Size()
+    with codecs.open(input_script, "rb", "utf-8-sig") as fin:
+        with codecs.open(output_script, "wb", "utf-8-sig") as fout:
+            for line in fin:
+                before.add(line)
+                text = _event_text(line)
+                if text is not None:
+                    head = line[: len(line) - len(text)]
+                    line = head + quantize_tags(text, mapping)
+                after.add(line)
+                fout.write(line)
+    return _report(counts, mapping, result, before, after)
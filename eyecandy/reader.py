@@ -45,6 +45,37 @@ VIDEO_ZOOM_INV = {
 }
 
 
+def parse_style(value):
+    """Style dict of the value of a "Style:" line (V4+ Styles format)"""
+    value = value.split(",", 22)
+    return {
+        "name": value[0],
+        "font": {"name": value[1], "size": int(value[2])},
+        "color": {
+            "primary": value[3],
+            "secondary": value[4],
+            "bord": value[5],
+            "shadow": value[6],
+        },
+        "bold": bool(int(value[7])),
+        "italic": bool(int(value[8])),
+        # Underline, StrikeOut = False (-1)
+        "scale": [float(value[11]), float(value[12])],
+        "spacing": int(value[13]),
+        # Angle = 0
+        # BorderStyle = 1 (Border + Shadow)
+        "bord": float(value[16]),
+        "shadow": float(value[17]),
+        "alignment": int(value[18]),
+        "margin": {
+            "l": int(value[19]),
+            "r": int(value[20]),
+            "v": int(value[21]),
+        },
+        # Encoding = 0,
+    }
+
+
 class Reader(object):
 
     """Simple ASS reader
@@ -119,34 +150,8 @@ class Reader(object):
                     }
                     temp_dialog.append(dialog_item)
                 elif key == "style":
-                    value = value.split(",", 22)
-                    style_item = {
-                        "name": value[0],
-                        "font": {"name": value[1], "size": int(value[2])},
-                        "color": {
-                            "primary": value[3],
-                            "secondary": value[4],
-                            "bord": value[5],
-                            "shadow": value[6],
-                        },
-                        "bold": bool(int(value[7])),
-                        "italic": bool(int(value[8])),
-                        # Underline, StrikeOut = False (-1)
-                        "scale": [float(value[11]), float(value[12])],
-                        "spacing": int(value[13]),
-                        # Angle = 0
-                        # BorderStyle = 1 (Border + Shadow)
-                        "bord": float(value[16]),
-                        "shadow": float(value[17]),
-                        "alignment": int(value[18]),
-                        "margin": {
-                            "l": int(value[19]),
-                            "r": int(value[20]),
-                            "v": int(value[21]),
-                        },
-                        # Encoding = 0,
-                    }
-                    style[value[0]] = style_item
+                    style_item = parse_style(value)
+                    style[style_item["name"]] = style_item
                 elif key == "playresx":
                     playresx = int(value)
                 elif key == "playresy":
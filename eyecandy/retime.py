@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import codecs
+import re
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import asstime
+except ImportError:
+    from . import asstime
+
+_NUM = r"\s*(-?\d+(?:\.\d+)?)\s*"
+
+# Override tags with times relative to the line start
+RE_TRANSFORM = re.compile(r"\\t\(" + _NUM + "," + _NUM + ",")
+RE_MOVE = re.compile(r"\\move\(([^,()]+,[^,()]+,[^,()]+,[^,()]+)," + _NUM + "," + _NUM)
+RE_FAD = re.compile(r"\\fad\(" + _NUM + "," + _NUM + r"\)")
+RE_FADE = re.compile(
+    r"\\fade\(([^,()]+,[^,()]+,[^,()]+)," + ",".join([_NUM] * 4) + r"\)"
+)
+RE_KARAOKE = re.compile(r"\\(k[of]?|K)(\d+)")
+
+
+def retime_factor(scale=1, source_fps=None, target_fps=None):
+    """Factor of the times for a scale and a framerate conversion
+
+    @source_fps, @target_fps: e.g. FPS_NTSC_FILM to FPS_PAL (speedup)
+    """
+    factor = scale
+    if source_fps and target_fps:
+        factor = factor * source_fps / target_fps
+    return float(factor)
+
+
+def retime_column(times, factor=1, shift=0):
+    """Retime a sequence of times in ms (time * factor + shift)
+
+    Negative times are clamped to 0. Return a list of integer ms.
+    """
+    if numpy is not None:
+        times = numpy.asarray(times, dtype=numpy.float64) * factor + shift
+        return numpy.maximum(numpy.rint(times), 0).astype(numpy.int64).tolist()
+    return [max(int(round(t * factor + shift)), 0) for t in times]
+
+
+def retime_tags(text, factor):
+    """Scale the relative times of \\t, \\move, \\fad, \\fade and \\k tags"""
+
+    def scale(value):
+        return str(int(round(float(value) * factor)))
+
+    def transform(m):
+        return "\\t({:s},{:s},".format(scale(m.group(1)), scale(m.group(2)))
+
+    def move(m):
+        return "\\move({:s},{:s},{:s}".format(
+            m.group(1), scale(m.group(2)), scale(m.group(3))
+        )
+
+    def fad(m):
+        return "\\fad({:s},{:s})".format(scale(m.group(1)), scale(m.group(2)))
+
+    def fade(m):
+        times = ",".join(scale(t) for t in m.group(2, 3, 4, 5))
+        return "\\fade({:s},{:s})".format(m.group(1), times)
+
+    # The \k durations follow each other: the cumulative times are
+    # rounded, so the rounding errors do not add up along the line
+    elapsed = [0, 0]  # original, scaled (centiseconds)
+
+    def karaoke(m):
+        elapsed[0] += int(m.group(2))
+        end = int(round(elapsed[0] * factor))
+        duration = end - elapsed[1]
+        elapsed[1] = end
+        return "\\" + m.group(1) + str(duration)
+
+    if "\\" not in text:
+        return text
+    text = RE_TRANSFORM.sub(transform, text)
+    text = RE_MOVE.sub(move, text)
+    text = RE_FAD.sub(fad, text)
+    text = RE_FADE.sub(fade, text)
+    return RE_KARAOKE.sub(karaoke, text)
+
+
+def retime_dialogs(dialogs, shift=0, scale=1, source_fps=None, target_fps=None):
+    """Shift, scale and convert the framerate of a list of dialog dicts
+
+    The start/end columns are retimed at once, and the relative times
+    of the override tags are scaled. The dicts are changed in place.
+
+    @shift: ms added to the times (after scaling)
+    @scale: factor of the times
+    @source_fps, @target_fps: framerate conversion
+    """
+    factor = retime_factor(scale, source_fps, target_fps)
+    starts = asstime.strtime_array_to_ms([d["start"] for d in dialogs])
+    ends = asstime.strtime_array_to_ms([d["end"] for d in dialogs])
+    starts = asstime.ms_array_to_strtime(retime_column(starts, factor, shift))
+    ends = asstime.ms_array_to_strtime(retime_column(ends, factor, shift))
+    for d, start, end in zip(dialogs, starts, ends):
+        d["start"] = start
+        d["end"] = end
+        if factor != 1:
+            d["text"] = retime_tags(d["text"], factor)
+    return dialogs
+
+
+def retime_file(
+    input_script,
+    output_script,
+    shift=0,
+    scale=1,
+    source_fps=None,
+    target_fps=None,
+    batch=10000,
+):
+    """Retime an ASS script, streaming it in batches of events
+
+    Only `batch` events are kept in memory, so scripts larger than memory
+    can be retimed. Everything but the event times and the override tags
+    is copied as is.
+    """
+    kwargs = dict(
+        shift=shift, scale=scale, source_fps=source_fps, target_fps=target_fps
+    )
+    with codecs.open(input_script, "rb", "utf-8-sig") as fin:
+        with codecs.open(output_script, "wb", "utf-8-sig") as fout:
+            pending = []
+            for line in fin:
+                key, sep, value = line.partition(":")
+                if key in ("Dialogue", "Comment") and value.count(",") >= 9:
+                    pending.append((key, value))
+                    if len(pending) >= batch:
+                        _write_retimed(fout, pending, kwargs)
+                        pending = []
+                else:
+                    _write_retimed(fout, pending, kwargs)
+                    pending = []
+                    fout.write(line)
+            _write_retimed(fout, pending, kwargs)
+
+
+def _write_retimed(f, events, kwargs):
+    """Write a batch of (key, value) Dialogue/Comment lines retimed"""
+    if not events:
+        return
+    rows = []
+    dialogs = []
+    for key, value in events:
+        body = value.rstrip("\r\n")
+        fields = body.lstrip().split(",", 9)
+        rows.append((key, fields, value[len(body) :]))
+        dialogs.append({"start": fields[1], "end": fields[2], "text": fields[9]})
+    retime_dialogs(dialogs, **kwargs)
+    for (key, fields, newline), d in zip(rows, dialogs):
+        fields[1], fields[2], fields[9] = d["start"], d["end"], d["text"]
+        f.write("{:s}: {:s}{:s}".format(key, ",".join(fields), newline))
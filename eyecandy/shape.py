@@ -0,0 +1,631 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ASS drawings as numeric shapes
+
+A Shape parses a drawing ("m 0 0 l 10 0 10 10") once into its commands
+and an (N, 2) array of points. Transforms are 3x3 affine matrices that
+are composed, the points are transformed once when they are needed, and
+the drawing is formatted once at the end.
+
+Example:
+>>> square = Shape.from_ass("m 0 0 l 10 0 10 10 0 10")
+>>> str(square.rotate(45).translate(100, 50))
+'m 105 47.93 l 112.07 55 105 62.07 97.93 55'
+"""
+from __future__ import absolute_import, division, print_function, with_statement
+
+import math
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from color import CacheInfo
+    from helpers import require_numpy
+except ImportError:
+    from .color import CacheInfo
+    from .helpers import require_numpy
+
+# Drawing commands: move, move (without closing), line, cubic bezier,
+# b-spline, extend b-spline, close b-spline
+COMMANDS = frozenset("mnlbspc")
+
+# Max lines of a flattened bezier curve
+MAX_CURVE_SEGMENTS = 1024
+
+
+class DrawingStats(
+    namedtuple("DrawingStats", "points_before, points_after, bytes_before, bytes_after")
+):
+
+    """Points and size of a drawing before and after simplify_drawing"""
+
+    def __str__(self):
+        return (
+            "{0.points_before:d} -> {0.points_after:d} points, "
+            "{0.bytes_before:d} -> {0.bytes_after:d} bytes".format(self)
+        )
+
+
+def _parse(drawing):
+    """([command, number of points], ...), [x, y, x, y, ...] of a drawing"""
+    commands = []
+    values = []
+    for token in drawing.split():
+        if token in COMMANDS:
+            if len(values) % 2:
+                raise ValueError("Odd number of coordinates in {!r}".format(drawing))
+            commands.append([token, 0])
+            continue
+        if not commands:
+            raise ValueError("Drawing must start with a command: {!r}".format(drawing))
+        try:
+            values.append(float(token))
+        except ValueError:
+            raise ValueError("Invalid drawing token: {!r}".format(token))
+        if not len(values) % 2:
+            commands[-1][1] += 1
+    if len(values) % 2:
+        raise ValueError("Odd number of coordinates in {!r}".format(drawing))
+    commands = tuple(
+        (command, count) for command, count in commands if count or command == "c"
+    )
+    return commands, values
+
+
+def _number(value, decimals):
+    if value.is_integer():
+        return "%d" % value
+    return ("%.*f" % (decimals, value)).rstrip("0")
+
+
+def _join_drawing(commands, numbers):
+    parts = []
+    position = 0
+    for command, count in commands:
+        parts.append(command)
+        parts.extend(numbers[position : position + count * 2])
+        position += count * 2
+    return " ".join(parts)
+
+
+def format_drawing(commands, values, decimals=2):
+    """ASS drawing of ((command, number of points), ...) and the
+    coordinates [x, y, x, y, ...], without NumPy
+
+    The numbers are rounded as numpy.round, so the drawing is the same
+    that Shape.to_ass.
+    """
+    return _join_drawing(commands, [format_number(value, decimals) for value in values])
+
+
+def format_number(value, decimals=2):
+    """Number of a drawing rounded as Shape.to_ass, without NumPy"""
+    scale = 10.0**decimals
+    return _number(round(value * scale) / scale, decimals)
+
+
+def _merge_commands(commands):
+    """Commands without empty ones, consecutive lines joined"""
+    merged = []
+    for command, count in commands:
+        if not count and command != "c":
+            continue
+        if command == "l" and merged and merged[-1][0] == "l":
+            merged[-1] = ("l", merged[-1][1] + count)
+        else:
+            merged.append((command, count))
+    return tuple(merged)
+
+
+def flatten_beziers(p0, p1, p2, p3, tolerance=0.25):
+    """Points of cubic bezier curves flattened to lines
+
+    Each curve is split in n lines, n from the bound of its second
+    derivative (Wang's formula), so no point of the curve is farther
+    than `tolerance` from the lines. All the curves are evaluated at
+    once.
+
+    Parameters:
+    :param p0, p1, p2, p3: (S, 2) arrays of the control points
+    :param tolerance: max distance to the curve (pixels)
+    :return: ((sum n, 2) array of the line ends (p0 excluded), n of each
+        curve)
+    """
+    p0, p1, p2, p3 = (numpy.asarray(p, dtype=numpy.float64) for p in (p0, p1, p2, p3))
+    dd = numpy.maximum(
+        numpy.hypot(*(p0 - 2 * p1 + p2).T), numpy.hypot(*(p1 - 2 * p2 + p3).T)
+    )
+    segments = numpy.ceil(numpy.sqrt(0.75 * dd / tolerance))
+    segments = numpy.clip(segments, 1, MAX_CURVE_SEGMENTS).astype(numpy.int64)
+    curve = numpy.repeat(numpy.arange(len(segments)), segments)
+    starts = numpy.cumsum(segments) - segments
+    t = (numpy.arange(len(curve)) - starts[curve] + 1) / segments[curve]
+    t = t[:, None]
+    mt = 1 - t
+    points = (
+        mt * mt * mt * p0[curve]
+        + 3 * mt * mt * t * p1[curve]
+        + 3 * mt * t * t * p2[curve]
+        + t * t * t * p3[curve]
+    )
+    return points, segments
+
+
+def rdp(points, tolerance=0.25):
+    """Ramer-Douglas-Peucker: mask of the points of a polyline to keep
+
+    The points farther than `tolerance` from the simplified polyline are
+    kept, the first and the last one always.
+    """
+    points = numpy.asarray(points, dtype=numpy.float64)
+    n = len(points)
+    keep = numpy.zeros(n, dtype=bool)
+    if n:
+        keep[0] = keep[-1] = True
+    stack = [(0, n - 1)] if n > 2 else []
+    while stack:
+        start, end = stack.pop()
+        a, b = points[start], points[end]
+        inner = points[start + 1 : end]
+        dx, dy = b - a
+        length = math.hypot(dx, dy)
+        if length:
+            distance = numpy.abs(dx * (inner[:, 1] - a[1]) - dy * (inner[:, 0] - a[0]))
+            distance /= length
+        else:
+            distance = numpy.hypot(*(inner - a).T)
+        index = int(distance.argmax())
+        if distance[index] > tolerance:
+            index += start + 1
+            keep[index] = True
+            if index - start > 1:
+                stack.append((start, index))
+            if end - index > 1:
+                stack.append((index, end))
+    return keep
+
+
+def _translation(x, y):
+    return numpy.array([[1.0, 0.0, x], [0.0, 1.0, y], [0.0, 0.0, 1.0]])
+
+
+class Shape(object):
+
+    """ASS drawing as commands and an (N, 2) array of points
+
+    Shapes are immutable: the transforms return a new Shape, that shares
+    the points and only keeps the composed affine matrix. The points,
+    the bounding box and the drawing strings are computed once.
+
+    Parameters:
+    :param commands: sequence of (command, number of points)
+    :param points: (N, 2) array of the points of the commands
+    :param matrix: 3x3 affine matrix of the points (None: identity)
+    """
+
+    def __init__(self, commands, points, matrix=None):
+        require_numpy("Shape")
+        self.commands = tuple((command, int(count)) for command, count in commands)
+        points = numpy.array(points, dtype=numpy.float64).reshape(-1, 2)
+        if len(points) != sum(count for command, count in self.commands):
+            raise ValueError("The commands and the points do not match")
+        points.flags.writeable = False
+        self._base = points
+        self._matrix = None if matrix is None else numpy.asarray(matrix, float)
+        self._points = None
+        self._bbox = None
+        self._strings = {}
+
+    @classmethod
+    def from_ass(cls, drawing):
+        """Shape of an ASS drawing string"""
+        commands, values = _parse(drawing)
+        return cls(commands, values)
+
+    @classmethod
+    def from_points(cls, points, command="l"):
+        """Path through (x, y) points: "m" the first one, `command` the rest"""
+        points = numpy.asarray(points, dtype=numpy.float64).reshape(-1, 2)
+        commands = [("m", 1)]
+        if len(points) > 1:
+            commands.append((command, len(points) - 1))
+        return cls(commands if len(points) else (), points)
+
+    @property
+    def points(self):
+        """(N, 2) read-only array of the transformed points"""
+        if self._points is None:
+            if self._matrix is None:
+                self._points = self._base
+            else:
+                linear, offset = self._matrix[:2, :2], self._matrix[:2, 2]
+                points = self._base.dot(linear.T) + offset
+                points.flags.writeable = False
+                self._points = points
+        return self._points
+
+    @property
+    def bbox(self):
+        """(min x, min y, max x, max y) of the points, control points
+        included
+        """
+        if self._bbox is None:
+            points = self.points
+            if not len(points):
+                self._bbox = (0.0, 0.0, 0.0, 0.0)
+            else:
+                (minx, miny), (maxx, maxy) = points.min(0), points.max(0)
+                self._bbox = (float(minx), float(miny), float(maxx), float(maxy))
+        return self._bbox
+
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def height(self):
+        return self.bbox[3] - self.bbox[1]
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    @property
+    def center(self):
+        """Center of the bounding box"""
+        minx, miny, maxx, maxy = self.bbox
+        return (minx + maxx) / 2, (miny + maxy) / 2
+
+    def transform(self, matrix):
+        """Shape with an affine transform applied after the current ones
+
+        @matrix: 2x2 (linear), 2x3 or 3x3 affine matrix
+        """
+        matrix = numpy.asarray(matrix, dtype=numpy.float64)
+        if matrix.shape == (2, 2):
+            matrix = numpy.vstack(
+                (numpy.hstack((matrix, [[0.0], [0.0]])), [0.0, 0.0, 1.0])
+            )
+        elif matrix.shape == (2, 3):
+            matrix = numpy.vstack((matrix, [0.0, 0.0, 1.0]))
+        elif matrix.shape != (3, 3):
+            raise ValueError("Affine matrix must be 2x2, 2x3 or 3x3")
+        if self._matrix is not None:
+            matrix = matrix.dot(self._matrix)
+        return self.__class__(self.commands, self._base, matrix)
+
+    def _around(self, matrix, origin):
+        """Transform with `origin` as the fixed point (default: center)"""
+        x, y = self.center if origin is None else origin
+        return self.transform(_translation(x, y).dot(matrix).dot(_translation(-x, -y)))
+
+    def translate(self, x, y=0):
+        return self.transform(_translation(x, y))
+
+    def move_to(self, x, y):
+        """Shape translated so its bounding box starts at (x, y)"""
+        minx, miny = self.bbox[:2]
+        return self.translate(x - minx, y - miny)
+
+    def scale(self, x, y=None, origin=(0, 0)):
+        """Scale by factors `x`, `y` (default: x) from `origin`
+        (None: the center of the bounding box)
+        """
+        if y is None:
+            y = x
+        return self._around(numpy.diag([x, y, 1.0]), origin)
+
+    def rotate(self, angle, origin=None):
+        """Rotate `angle` degrees around `origin` (None: the center of the
+        bounding box), in the direction of asstags.rotate_shape
+        """
+        theta = math.radians(angle)
+        cos, sin = math.cos(theta), math.sin(theta)
+        matrix = numpy.array([[cos, -sin, 0.0], [sin, cos, 0.0], [0.0, 0.0, 1.0]])
+        return self._around(matrix, origin)
+
+    def flip(self, horizontal=True, vertical=False, origin=None):
+        """Mirror the shape around `origin` (None: the center of the
+        bounding box)
+        """
+        matrix = numpy.diag(
+            [-1.0 if horizontal else 1.0, -1.0 if vertical else 1.0, 1.0]
+        )
+        return self._around(matrix, origin)
+
+    def flatten(self, tolerance=0.25):
+        """Shape with the bezier curves ("b") replaced by lines within
+        `tolerance` pixels of the curves (see flatten_beziers)
+
+        B-splines ("s", "p") are kept as is.
+        """
+        points = self.points
+        curves = []
+        position = 0
+        for command, count in self.commands:
+            if command == "b":
+                if position == 0 or count % 3:
+                    raise ValueError("Invalid bezier command in the shape")
+                curves.extend(range(position, position + count, 3))
+            position += count
+        if not curves:
+            return self
+        curves = numpy.array(curves)
+        flat, segments = flatten_beziers(
+            points[curves - 1],
+            points[curves],
+            points[curves + 1],
+            points[curves + 2],
+            tolerance,
+        )
+        commands = []
+        parts = []
+        position = curve = offset = 0
+        for command, count in self.commands:
+            if command == "b":
+                n = int(segments[curve : curve + count // 3].sum())
+                parts.append(flat[offset : offset + n])
+                commands.append(("l", n))
+                curve += count // 3
+                offset += n
+            else:
+                parts.append(points[position : position + count])
+                commands.append((command, count))
+            position += count
+        return self.__class__(_merge_commands(commands), numpy.concatenate(parts))
+
+    def simplify(self, tolerance=0.25):
+        """Shape with the runs of lines simplified by Ramer-Douglas-Peucker
+        (see rdp), the other commands are kept as is
+        """
+        points = self.points
+        keep = numpy.ones(len(points), dtype=bool)
+        runs = []
+        position = 0
+        for command, count in self.commands:
+            if command == "l" and position:
+                if runs and runs[-1][1] == position - 1:
+                    runs[-1][1] = position + count - 1
+                else:
+                    runs.append([position - 1, position + count - 1])
+            position += count
+        for start, end in runs:
+            keep[start : end + 1] &= rdp(points[start : end + 1], tolerance)
+        if keep.all():
+            return self
+        commands = []
+        position = 0
+        for command, count in self.commands:
+            commands.append((command, int(keep[position : position + count].sum())))
+            position += count
+        return self.__class__(_merge_commands(commands), points[keep])
+
+    def __add__(self, other):
+        """Shape with the drawing of both shapes"""
+        if isinstance(other, str):
+            other = Shape.from_ass(other)
+        return self.__class__(
+            self.commands + other.commands,
+            numpy.concatenate((self.points, other.points)),
+        )
+
+    def to_ass(self, decimals=2):
+        """ASS drawing string, the numbers rounded to `decimals`"""
+        try:
+            return self._strings[decimals]
+        except KeyError:
+            pass
+        values = numpy.round(self.points, decimals).ravel().tolist()
+        numbers = [_number(value, decimals) for value in values]
+        string = self._strings[decimals] = _join_drawing(self.commands, numbers)
+        return string
+
+    def __str__(self):
+        return self.to_ass()
+
+    def __len__(self):
+        return len(self._base)
+
+    def __repr__(self):
+        return "<{:s} {:d} commands, {:d} points>".format(
+            self.__class__.__name__, len(self.commands), len(self)
+        )
+
+
+# Drawings of 100x100 and 30x30 (the ones of asstags)
+CIRCLE_DRAWING = (
+    "m 50 0 b 22 0 0 22 0 50 b 0 78 22 100 50 100 b "
+    "78 100 100 78 100 50 b 100 22 78 0 50 0"
+)
+HEART_DRAWING = (
+    "m 15 30 b 27 22 30 18 30 14 30 8 22 0 15 10 8 0 0 8 0 14 0 18 3 22 15 30"
+)
+
+MAX_UNIT_SHAPES = 256
+_unit_shapes = {}
+
+
+def _regular_points(radius, sides, start, count):
+    """`count` points of a regular polygon of radius `radius` centered
+    at (1, 1), from the angle `start` (degrees)
+    """
+    angles = numpy.radians(start + numpy.arange(count) * (360 / sides))
+    return numpy.column_stack(
+        (1 + radius * numpy.cos(angles), 1 + radius * numpy.sin(angles))
+    )
+
+
+def _build_unit(kind, params):
+    # The unit points are computed once here, the scaled shapes are then
+    # the drawings of asstags without NumPy
+    if kind == "circle":
+        # Diameter 1, subtract: swapped coordinates (reversed direction)
+        circle = Shape.from_ass(CIRCLE_DRAWING).scale(0.01)
+        if params[0]:
+            return Shape(circle.commands, circle.points[:, ::-1])
+        return Shape(circle.commands, circle.points)
+    if kind == "heart":
+        heart = Shape.from_ass(HEART_DRAWING).scale(1 / 30)
+        return Shape(heart.commands, heart.points)
+    if kind == "polygon":
+        # Radius 1 centered at (1, 1), as asstags.shape_poligon
+        (sides,) = params
+        iangle = 360 / sides
+        start = 90 + iangle / 2 if sides % 2 else 90
+        points = _regular_points(1, sides, start, sides + 1)
+        return Shape.from_points(points)
+    if kind == "star":
+        # Outer radius 1 centered at (1, 1), as asstags.shape_star
+        spikes, ratio = params
+        iangle = 360 / spikes
+        start = 90 + iangle / 2 if spikes % 2 == 0 else 90
+        inner = _regular_points(ratio, spikes, start, spikes + 1)
+        outer = _regular_points(1, spikes, start + iangle / 2, spikes + 1)
+        points = numpy.empty((2 * (spikes + 1), 2))
+        points[0::2], points[1::2] = inner, outer
+        return Shape.from_points(points)
+    raise ValueError("Unknown unit shape: {!r}".format(kind))
+
+
+def unit_shape(kind, *params):
+    """Cached Shape of unit size, scaled by ShapeCache
+
+    circle(subtract): diameter 1, heart(): 1x1, polygon(sides) and
+    star(spikes, inner radius ratio): radius 1 centered at (1, 1)
+    """
+    key = (kind,) + params
+    try:
+        return _unit_shapes[key]
+    except KeyError:
+        pass
+    shape = _build_unit(kind, params)
+    if len(_unit_shapes) >= MAX_UNIT_SHAPES:
+        _unit_shapes.clear()
+    _unit_shapes[key] = shape
+    return shape
+
+
+class ShapeCache(object):
+
+    """Memoized parametric shapes with LRU eviction
+
+    Shapes are keyed by their type and their parameters rounded to
+    `decimals`, and built by scaling the cached unit shapes, so effects
+    that draw thousands of particles with a few sizes build each shape
+    (and format its drawing) once. The shapes are immutable, str() of a
+    cached shape is the cached drawing.
+
+    Parameters:
+    :param maxsize: max number of shapes kept in the cache
+    :param decimals: decimals of the parameters in the keys
+
+    Example:
+    >>> str(shape_cache.circle(5))
+    'm 5 0 b 2.2 0 0 2.2 0 5 b 0 7.8 2.2 10 5 10 b 7.8 10 10 7.8 10 5 b 10 2.2 7.8 0 5 0'
+    """
+
+    def __init__(self, maxsize=256, decimals=3):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._shapes = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _get(self, kind, *params):
+        params = tuple(round(param, self.decimals) for param in params)
+        key = (kind,) + params
+        try:
+            shape = self._shapes[key]
+        except KeyError:
+            self._misses += 1
+            shape = getattr(self, "_build_" + kind)(*params)
+            self._shapes[key] = shape
+            if len(self._shapes) > self.maxsize:
+                self._shapes.popitem(last=False)
+        else:
+            self._hits += 1
+            self._shapes.move_to_end(key)
+        return shape
+
+    def _build_circle(self, radius, subtract):
+        return unit_shape("circle", bool(subtract)).scale(radius * 2)
+
+    def _build_ring(self, radius, width):
+        inner = radius - width
+        circle = self._get("circle", inner, True).translate(width, width)
+        return self._get("circle", radius, False) + circle
+
+    def _build_heart(self, size):
+        return unit_shape("heart").scale(size)
+
+    def _build_polygon(self, radius, sides):
+        return unit_shape("polygon", int(sides)).scale(radius)
+
+    def _build_star(self, radius1, radius2, spikes):
+        inner, outer = sorted((radius1, radius2))
+        ratio = inner / outer if outer else 0.0
+        return unit_shape("star", int(spikes), ratio).scale(outer)
+
+    def circle(self, radius, subtract=False):
+        """Circle of `radius` in the box (0, 0, 2 * radius, 2 * radius),
+        subtract: drawn in the other direction (a hole)
+        """
+        return self._get("circle", radius, bool(subtract))
+
+    def ring(self, radius, width):
+        """Circle of `radius` with a hole, `width` is the ring width"""
+        return self._get("ring", radius, width)
+
+    def heart(self, size=30):
+        return self._get("heart", size)
+
+    def polygon(self, radius, sides):
+        """Regular polygon of `radius` centered at (radius, radius)"""
+        return self._get("polygon", radius, sides)
+
+    def star(self, radius1, radius2, spikes):
+        """Star with inner and outer radius (in any order) centered at
+        (outer radius, outer radius)
+        """
+        return self._get("star", radius1, radius2, spikes)
+
+    def cache_info(self):
+        """Hits, misses, max size and current size of the cache"""
+        return CacheInfo(self._hits, self._misses, self.maxsize, len(self._shapes))
+
+    def cache_clear(self):
+        self._shapes.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+shape_cache = ShapeCache()
+
+
+def simplify_drawing(drawing, tolerance=0.25, scale=1, flatten=True, decimals=2):
+    """Flatten and simplify an ASS drawing (shape or vector clip)
+
+    Parameters:
+    :param tolerance: max distance to the original drawing in pixels
+    :param scale: scale of the drawing coordinates, the \\p or \\clip
+        scale (coordinates in 1 / 2 ** (scale - 1) pixels)
+    :param flatten: replace the bezier curves by lines first (they take
+        longer to rasterize than a few lines)
+    :return: (drawing, DrawingStats)
+    """
+    shape = Shape.from_ass(drawing)
+    tolerance = tolerance * 2 ** (scale - 1)
+    simplified = shape.flatten(tolerance) if flatten else shape
+    simplified = simplified.simplify(tolerance)
+    result = simplified.to_ass(decimals)
+    if len(simplified) > len(shape):
+        # The curves take more lines than points, keep them
+        result = drawing.strip()
+        simplified = shape
+    stats = DrawingStats(len(shape), len(simplified), len(drawing), len(result))
+    return result, stats
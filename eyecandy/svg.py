@@ -0,0 +1,550 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+SVG import: paths and basic shapes to ASS drawings
+
+The path data is tokenized by a generator, converted to ASS commands
+(quadratic curves and arcs as cubic "b" curves) and the transforms of
+the elements are applied to the points with one matrix product per
+element. The documents are read with iterparse, so large files are not
+kept in memory. Conversions are cached by the hash of the content.
+
+Example:
+>>> str(path_to_shape("M 0 0 H 10 V 10 Q 0 10 0 0 Z"))
+'m 0 0 l 10 0 10 10 b 3.33 10 0 6.67 0 0'
+"""
+from __future__ import absolute_import, division, print_function, with_statement
+
+import hashlib
+import io
+import math
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict, namedtuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from color import CacheInfo
+    from helpers import require_numpy
+    from shape import Shape, simplify_drawing
+except ImportError:
+    from .color import CacheInfo
+    from .helpers import require_numpy
+    from .shape import Shape, simplify_drawing
+
+RE_COMMAND = re.compile(r"[\s,]*([MmLlHhVvCcSsQqTtAaZz])")
+RE_NUMBER = re.compile(r"[\s,]*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)")
+RE_FLAG = re.compile(r"[\s,]*([01])")
+RE_END = re.compile(r"[\s,]*$")
+RE_TRANSFORM = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+
+# Number of arguments of the path commands
+ARGUMENTS = {"m": 2, "l": 2, "h": 1, "v": 1, "c": 6, "s": 4, "q": 4, "t": 2, "a": 7}
+
+# Elements whose content is not drawn
+SKIP_ELEMENTS = frozenset(
+    ("defs", "clipPath", "mask", "marker", "pattern", "symbol", "metadata", "title")
+)
+
+SvgShape = namedtuple("SvgShape", "tag, id, fill, shape")
+
+
+def parse_path(d):
+    """Yield the (command, arguments) of SVG path data
+
+    Implicit repetitions are split ("L 1 2 3 4" yields two "L"), and
+    the ones after a moveto are linetos.
+    """
+    position = 0
+    command = None
+    while not RE_END.match(d, position):
+        m = RE_COMMAND.match(d, position)
+        if m is not None:
+            command = m.group(1)
+            position = m.end()
+            if command in "Zz":
+                yield command, ()
+                continue
+        elif command is None or command in "Zz":
+            raise ValueError(
+                "Invalid SVG path data at {:d}: {!r}".format(
+                    position, d[position : position + 20]
+                )
+            )
+        args = []
+        for i in range(ARGUMENTS[command.lower()]):
+            regex = RE_FLAG if command in "Aa" and i in (3, 4) else RE_NUMBER
+            m = regex.match(d, position)
+            if m is None:
+                raise ValueError(
+                    "Invalid SVG path data at {:d}: {!r}".format(
+                        position, d[position : position + 20]
+                    )
+                )
+            args.append(float(m.group(1)))
+            position = m.end()
+        yield command, tuple(args)
+        if command == "M":
+            command = "L"
+        elif command == "m":
+            command = "l"
+
+
+def _quadratic(p0, q, p):
+    """Control points of the cubic curve of a quadratic one"""
+    return (
+        (p0[0] + 2 / 3 * (q[0] - p0[0]), p0[1] + 2 / 3 * (q[1] - p0[1])),
+        (p[0] + 2 / 3 * (q[0] - p[0]), p[1] + 2 / 3 * (q[1] - p[1])),
+        p,
+    )
+
+
+def arc_to_beziers(p0, rx, ry, rotation, large, sweep, p):
+    """Cubic curves of an SVG elliptical arc (endpoint parameterization)
+
+    The arc is split in parts of at most 90 degrees. Return a list of
+    control points (c1, c2, end), empty for a zero length arc, or None
+    if a radius is zero (the arc is a line).
+    """
+    x1, y1 = p0
+    x2, y2 = p
+    if (x1, y1) == (x2, y2):
+        return []
+    rx, ry = abs(rx), abs(ry)
+    if not rx or not ry:
+        return None
+    phi = math.radians(rotation)
+    cos, sin = math.cos(phi), math.sin(phi)
+    # Center parameterization (SVG 1.1 F.6.5)
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p, y1p = cos * dx + sin * dy, -sin * dx + cos * dy
+    scale = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+    if scale > 1:
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+    num = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    den = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    factor = math.sqrt(max(num / den, 0)) if den else 0.0
+    if large == sweep:
+        factor = -factor
+    cxp, cyp = factor * rx * y1p / ry, -factor * ry * x1p / rx
+    cx = cos * cxp - sin * cyp + (x1 + x2) / 2
+    cy = sin * cxp + cos * cyp + (y1 + y2) / 2
+    theta = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    delta = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - theta
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+    parts = max(int(math.ceil(abs(delta) / (math.pi / 2) - 1e-9)), 1)
+    step = delta / parts
+    k = 4 / 3 * math.tan(step / 4)
+
+    def point(angle, derivative=False):
+        ex, ey = rx * math.cos(angle), ry * math.sin(angle)
+        if derivative:
+            ex, ey = -rx * math.sin(angle), ry * math.cos(angle)
+            return cos * ex - sin * ey, sin * ex + cos * ey
+        return cx + cos * ex - sin * ey, cy + sin * ex + cos * ey
+
+    curves = []
+    for i in range(parts):
+        a1 = theta + i * step
+        a2 = a1 + step
+        (sx, sy), (tx, ty) = point(a1), point(a2)
+        (dx1, dy1), (dx2, dy2) = point(a1, True), point(a2, True)
+        end = (x2, y2) if i == parts - 1 else (tx, ty)
+        curves.append(((sx + k * dx1, sy + k * dy1), (tx - k * dx2, ty - k * dy2), end))
+    return curves
+
+
+def _absolute(command, args, x0, y0):
+    """Absolute arguments of a relative command from (x0, y0)"""
+    if command == "H":
+        return (x0 + args[0],)
+    if command == "V":
+        return (y0 + args[0],)
+    if command == "A":
+        return args[:5] + (x0 + args[5], y0 + args[6])
+    return tuple(value + (y0 if i % 2 else x0) for i, value in enumerate(args))
+
+
+class _ShapeBuilder(object):
+
+    """Commands and points of a drawing, consecutive l and b joined"""
+
+    def __init__(self):
+        self.commands = []
+        self.points = []
+
+    def add(self, command, *points):
+        if command in "lb" and self.commands and self.commands[-1][0] == command:
+            self.commands[-1][1] += len(points)
+        else:
+            self.commands.append([command, len(points)])
+        self.points.extend(points)
+
+    def shape(self):
+        return Shape(self.commands, self.points)
+
+
+def path_to_shape(d, matrix=None):
+    """Shape of SVG path data, transformed by an affine matrix"""
+    builder = _ShapeBuilder()
+    current = start = (0.0, 0.0)
+    control = None  # last control point, for S and T
+    previous = ""
+    closed = False
+    for command, args in parse_path(d):
+        upper = command.upper()
+        relative = command != upper
+        x0, y0 = current
+        if upper == "Z":
+            current = start
+            closed = True
+            previous = upper
+            continue
+        if upper == "M":
+            x, y = args
+            current = start = (x0 + x, y0 + y) if relative else (x, y)
+            builder.add("m", current)
+            closed = False
+            previous = upper
+            continue
+        if closed:
+            # Drawing after a closepath starts at the subpath start
+            builder.add("m", start)
+            closed = False
+        if relative:
+            args = _absolute(upper, args, x0, y0)
+        if upper == "L":
+            current = args
+            builder.add("l", current)
+        elif upper == "H":
+            current = (args[0], y0)
+            builder.add("l", current)
+        elif upper == "V":
+            current = (x0, args[0])
+            builder.add("l", current)
+        elif upper in "CS":
+            if upper == "C":
+                c1, c2, current = args[0:2], args[2:4], args[4:6]
+            else:
+                if previous in ("C", "S"):
+                    c1 = (2 * x0 - control[0], 2 * y0 - control[1])
+                else:
+                    c1 = current
+                c2, current = args[0:2], args[2:4]
+            builder.add("b", c1, c2, current)
+            control = c2
+        elif upper in "QT":
+            if upper == "Q":
+                q, end = args[0:2], args[2:4]
+            else:
+                if previous in ("Q", "T"):
+                    q = (2 * x0 - control[0], 2 * y0 - control[1])
+                else:
+                    q = current
+                end = args[0:2]
+            builder.add("b", *_quadratic(current, q, end))
+            current = end
+            control = q
+        elif upper == "A":
+            end = args[5:7]
+            curves = arc_to_beziers(current, *args[:5], p=end)
+            if curves is None:
+                builder.add("l", end)
+            for curve in curves or ():
+                builder.add("b", *curve)
+            current = end
+        previous = upper
+    shape = builder.shape()
+    if matrix is not None:
+        shape = shape.transform(matrix)
+    return shape
+
+
+def parse_transform(transform):
+    """3x3 affine matrix of an SVG transform attribute"""
+    require_numpy("SVG transforms")
+    matrix = numpy.identity(3)
+    for name, values in RE_TRANSFORM.findall(transform or ""):
+        values = [float(v) for v in RE_NUMBER.findall(values)]
+        if name == "matrix":
+            a, b, c, d, e, f = values
+            step = [[a, c, e], [b, d, f], [0, 0, 1]]
+        elif name == "translate":
+            x, y = (values + [0])[:2]
+            step = [[1, 0, x], [0, 1, y], [0, 0, 1]]
+        elif name == "scale":
+            x = values[0]
+            y = values[1] if len(values) > 1 else x
+            step = [[x, 0, 0], [0, y, 0], [0, 0, 1]]
+        elif name == "rotate":
+            angle = math.radians(values[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            step = numpy.array([[cos, -sin, 0], [sin, cos, 0], [0, 0, 1]])
+            if len(values) == 3:
+                x, y = values[1:]
+                step = (
+                    numpy.array([[1, 0, x], [0, 1, y], [0, 0, 1]])
+                    .dot(step)
+                    .dot(numpy.array([[1, 0, -x], [0, 1, -y], [0, 0, 1]]))
+                )
+        elif name == "skewX":
+            step = [[1, math.tan(math.radians(values[0])), 0], [0, 1, 0], [0, 0, 1]]
+        else:
+            step = [[1, 0, 0], [math.tan(math.radians(values[0])), 1, 0], [0, 0, 1]]
+        matrix = matrix.dot(numpy.asarray(step, dtype=numpy.float64))
+    return matrix
+
+
+def _length(value, default=0.0):
+    if value is None:
+        return default
+    m = RE_NUMBER.match(value)
+    return float(m.group(1)) if m else default
+
+
+def _points_path(points, close):
+    values = [float(v) for v in RE_NUMBER.findall(points or "")]
+    if len(values) < 2:
+        return ""
+    pairs = [
+        "{!r} {!r}".format(*values[i : i + 2]) for i in range(0, len(values) - 1, 2)
+    ]
+    return "M " + " L ".join(pairs) + (" Z" if close else "")
+
+
+def element_path(tag, attrib):
+    """SVG path data of a path or a basic shape element, None for others"""
+    if tag == "path":
+        return attrib.get("d", "")
+    if tag == "polygon" or tag == "polyline":
+        return _points_path(attrib.get("points"), tag == "polygon")
+    if tag == "line":
+        return "M {!r} {!r} L {!r} {!r}".format(
+            *(_length(attrib.get(name)) for name in ("x1", "y1", "x2", "y2"))
+        )
+    if tag == "rect":
+        x, y = _length(attrib.get("x")), _length(attrib.get("y"))
+        w, h = _length(attrib.get("width")), _length(attrib.get("height"))
+        if w <= 0 or h <= 0:
+            return ""
+        rx = attrib.get("rx", attrib.get("ry"))
+        ry = attrib.get("ry", attrib.get("rx"))
+        rx = min(_length(rx), w / 2)
+        ry = min(_length(ry), h / 2)
+        if not rx or not ry:
+            return "M {0!r} {1!r} H {2!r} V {3!r} H {0!r} Z".format(x, y, x + w, y + h)
+        return (
+            "M {0!r} {1!r} H {2!r} A {4!r} {5!r} 0 0 1 {6!r} {7!r} V {8!r} "
+            "A {4!r} {5!r} 0 0 1 {2!r} {3!r} H {0!r} A {4!r} {5!r} 0 0 1 "
+            "{9!r} {8!r} V {7!r} A {4!r} {5!r} 0 0 1 {0!r} {1!r} Z".format(
+                x + rx, y, x + w - rx, y + h, rx, ry, x + w, y + ry, y + h - ry, x
+            )
+        )
+    if tag == "circle" or tag == "ellipse":
+        cx, cy = _length(attrib.get("cx")), _length(attrib.get("cy"))
+        if tag == "circle":
+            rx = ry = _length(attrib.get("r"))
+        else:
+            rx, ry = _length(attrib.get("rx")), _length(attrib.get("ry"))
+        if rx <= 0 or ry <= 0:
+            return ""
+        return (
+            "M {0!r} {1!r} A {2!r} {3!r} 0 1 0 {4!r} {1!r} "
+            "A {2!r} {3!r} 0 1 0 {0!r} {1!r} Z".format(cx - rx, cy, rx, ry, cx + rx)
+        )
+    return None
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _fill(attrib, inherited):
+    fill = attrib.get("fill")
+    style = attrib.get("style")
+    if style:
+        for item in style.split(";"):
+            key, sep, value = item.partition(":")
+            if key.strip() == "fill":
+                fill = value.strip()
+    return inherited if fill is None else fill
+
+
+def svg_shapes(source):
+    """Yield a SvgShape for each drawn path or basic shape of an SVG
+    document (filename or file object)
+
+    The transforms of the element and its groups are applied, the
+    elements in <defs>, <clipPath>... and with display="none" are
+    skipped. fill is the fill attribute or style (inherited).
+    """
+    require_numpy("SVG import")
+    matrices = [numpy.identity(3)]
+    fills = [None]
+    skip = 0
+    for event, element in ElementTree.iterparse(source, events=("start", "end")):
+        tag = _local_name(element.tag)
+        attrib = element.attrib
+        if event == "start":
+            hidden = tag in SKIP_ELEMENTS or attrib.get("display") == "none"
+            if skip or hidden:
+                skip += 1
+                continue
+            transform = attrib.get("transform")
+            if transform:
+                matrices.append(matrices[-1].dot(parse_transform(transform)))
+            else:
+                matrices.append(matrices[-1])
+            fills.append(_fill(attrib, fills[-1]))
+            continue
+        if skip:
+            skip -= 1
+            element.clear()
+            continue
+        d = element_path(tag, attrib)
+        matrix, fill = matrices.pop(), fills.pop()
+        if d:
+            shape = path_to_shape(d, matrix)
+            if len(shape):
+                yield SvgShape(tag, attrib.get("id"), fill, shape)
+        if tag != "svg":
+            element.clear()
+
+
+def join_shapes(shapes):
+    """Shape with the drawings of all the shapes, built once"""
+    commands = []
+    points = []
+    for shape in shapes:
+        commands.extend(shape.commands)
+        points.append(shape.points)
+    if not points:
+        return Shape((), ())
+    return Shape(commands, numpy.concatenate(points))
+
+
+def _source_data(svg):
+    """Bytes of an SVG (filename, document, bytes or file object)"""
+    if hasattr(svg, "read"):
+        data = svg.read()
+    elif isinstance(svg, bytes):
+        data = svg
+    elif svg.lstrip().startswith("<"):
+        data = svg.encode("utf-8")
+    else:
+        with open(svg, "rb") as f:
+            data = f.read()
+    return data if isinstance(data, bytes) else data.encode("utf-8")
+
+
+class SvgCache(object):
+
+    """SVG conversions to ASS drawings, keyed by the hash of the content
+
+    The same file (or an identical copy) is converted once: the drawings
+    are kept in memory with LRU eviction and, with `cache_dir`, written
+    to files named by the SHA-1 of the content and the options.
+
+    Parameters:
+    :param maxsize: max number of drawings kept in memory
+    :param cache_dir: directory of the cached drawings (None: memory only)
+    """
+
+    def __init__(self, maxsize=64, cache_dir=None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._drawings = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".txt")
+
+    def drawing(self, svg, tolerance=None, decimals=2):
+        """ASS drawing of an SVG document (all its shapes)
+
+        @tolerance: simplify the drawing (see shape.simplify_drawing)
+        """
+        data = _source_data(svg)
+        options = "{!r},{!r}".format(tolerance, decimals).encode("ascii")
+        key = hashlib.sha1(data + b"\0" + options).hexdigest()
+        try:
+            drawing = self._drawings[key]
+        except KeyError:
+            pass
+        else:
+            self._hits += 1
+            self._drawings.move_to_end(key)
+            return drawing
+        drawing = None
+        if self.cache_dir and os.path.isfile(self._path(key)):
+            with io.open(self._path(key), encoding="utf-8") as f:
+                drawing = f.read()
+        if drawing is None:
+            self._misses += 1
+            shape = join_shapes(s.shape for s in svg_shapes(io.BytesIO(data)))
+            drawing = shape.to_ass(decimals)
+            if tolerance and drawing:
+                drawing = simplify_drawing(drawing, tolerance, decimals=decimals)[0]
+            if self.cache_dir:
+                if not os.path.isdir(self.cache_dir):
+                    os.makedirs(self.cache_dir)
+                with io.open(self._path(key), "w", encoding="utf-8") as f:
+                    f.write(drawing)
+        else:
+            self._hits += 1
+        self._drawings[key] = drawing
+        if len(self._drawings) > self.maxsize:
+            self._drawings.popitem(last=False)
+        return drawing
+
+    def cache_info(self):
+        """Hits, misses, max size and current size of the memory cache"""
+        return CacheInfo(self._hits, self._misses, self.maxsize, len(self._drawings))
+
+    def cache_clear(self):
+        self._drawings.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+svg_cache = SvgCache()
+
+
+def _is_path_data(svg):
+    """Whether a string is SVG path data (all of it), not a filename"""
+    if not RE_COMMAND.match(svg):
+        return False
+    try:
+        for command in parse_path(svg):
+            pass
+    except ValueError:
+        return False
+    return True
+
+
+def svg_to_ass(svg, tolerance=None, decimals=2, cache=svg_cache):
+    """ASS drawing of SVG path data, an SVG document or an SVG file
+
+    Parameters:
+    :param svg: path data ("M 0 0 L 10 0..."), document text, bytes, file
+        object or filename (an existing file is never read as path data)
+    :param tolerance: simplify the drawing (see shape.simplify_drawing)
+    :param cache: SvgCache of the documents (None: no cache)
+    """
+    if isinstance(svg, str) and not os.path.isfile(svg) and _is_path_data(svg):
+        drawing = path_to_shape(svg).to_ass(decimals)
+        if tolerance and drawing:
+            drawing = simplify_drawing(drawing, tolerance, decimals=decimals)[0]
+        return drawing
+    if cache is None:
+        cache = SvgCache(maxsize=0)
+    return cache.drawing(svg, tolerance, decimals)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Override tag builder
+
+Collects the tags of an event (strings of the asstags functions),
+removes the overrides that have no effect and joins the rest once.
+
+Example:
+>>> from asstags import an, blur, pos
+>>> tags = TagBuilder(defaults={"blur": 0, "an": 5})
+>>> tags.add(pos(10, 20), blur(), an(5), blur(2), pos(0, 0))
+>>> tags.build()
+'\\\\pos(10,20)\\\\blur2'
+"""
+from __future__ import absolute_import, division, print_function, with_statement
+
+import re
+
+# Longest names first, \fscx is not \fs + "cx"
+RE_TAG = re.compile(
+    r"\\(1c|2c|3c|4c|1a|2a|3a|4a|alpha|an|fscx|fscy|fsp|fs|frx|fry|frz|fr|"
+    r"fax|fay|fn|fe|blur|be|bord|xbord|ybord|shad|xshad|yshad|pos|move|org|"
+    r"fade|fad|t|iclip|clip|kf|ko|k|K|q|pbo|p|b|i|u|s|r|c|a)"
+)
+
+# Only the first one of these has effect
+FIRST_WINS = frozenset(("pos", "move", "org", "an", "a", "fad", "fade"))
+# \pos and \move, \fad and \fade set the same thing
+_SAME = {"c": "1c", "fr": "frz", "move": "pos", "fade": "fad"}
+# Tags that accumulate or are applied in order, never removed
+KEEP_ALL = frozenset(("t", "k", "K", "kf", "ko", "p", "r"))
+# Tags that set a part of the value of another (\bord sets \xbord and
+# \ybord), a tag equal to its default is kept after one of its group
+_GROUPS = {
+    "bord": "bord",
+    "xbord": "bord",
+    "ybord": "bord",
+    "shad": "shad",
+    "xshad": "shad",
+    "yshad": "shad",
+}
+
+# Defaults of the scripts written by Generator (Angle, Underline and
+# StrikeOut are always 0)
+DEFAULTS = {
+    "blur": 0,
+    "be": 0,
+    "frx": 0,
+    "fry": 0,
+    "frz": 0,
+    "fax": 0,
+    "fay": 0,
+    "u": 0,
+    "s": 0,
+    "xbord": None,
+    "ybord": None,
+}
+
+
+def parse_tags(text):
+    """Split a string of override tags into (name, tag) tuples
+
+    Arguments in parentheses (\\t, \\clip, \\move...) are kept whole,
+    text that is not a tag is returned with the name None.
+
+    Example:
+    >>> parse_tags("\\\\pos(1,2)\\\\t(\\\\blur2)\\\\c&HFF&")
+    [('pos', '\\\\pos(1,2)'), ('t', '\\\\t(\\\\blur2)'), ('c', '\\\\c&HFF&')]
+    """
+    tags = []
+    position = 0
+    length = len(text)
+    while position < length:
+        m = RE_TAG.match(text, position)
+        if m is None:
+            end = text.find("\\", position + 1)
+            end = length if end < 0 else end
+            tags.append((None, text[position:end]))
+            position = end
+            continue
+        name = m.group(1)
+        end = m.end()
+        if end < length and text[end] == "(":
+            depth = 0
+            while end < length:
+                if text[end] == "(":
+                    depth += 1
+                elif text[end] == ")":
+                    depth -= 1
+                    if not depth:
+                        end += 1
+                        break
+                end += 1
+        else:
+            next_tag = text.find("\\", end)
+            end = length if next_tag < 0 else next_tag
+        tags.append((name, text[position:end]))
+        position = end
+    return tags
+
+
+def _ass_value(ass):
+    """Int of an ASS color/alpha string (&HAABBGGRR)"""
+    return int(ass.strip("&Hh"), 16)
+
+
+def style_defaults(style_item, alignment=None):
+    """TagBuilder defaults of a style dict (Style.as_dict, Reader)
+
+    @alignment: alignment of the written style (Generator writes 5)
+    """
+    defaults = dict(DEFAULTS)
+    colors = style_item["color"]
+    defaults.update(
+        {
+            "fn": style_item["font"]["name"],
+            "fs": style_item["font"]["size"],
+            "1c": _ass_value(colors["primary"]) & 0xFFFFFF,
+            "2c": _ass_value(colors["secondary"]) & 0xFFFFFF,
+            "3c": _ass_value(colors["bord"]) & 0xFFFFFF,
+            "4c": _ass_value(colors["shadow"]) & 0xFFFFFF,
+            "b": int(bool(style_item["bold"])),
+            "i": int(bool(style_item["italic"])),
+            "fscx": style_item["scale"][0],
+            "fscy": style_item["scale"][1],
+            "fsp": style_item["spacing"],
+            "bord": style_item["bord"],
+            "shad": style_item["shadow"],
+            "an": style_item["alignment"] if alignment is None else alignment,
+        }
+    )
+    return defaults
+
+
+def _argument(name, tag):
+    return tag[len(name) + 1 :].strip()
+
+
+def _equal_default(name, tag, default):
+    """Whether the tag sets the value `default`"""
+    argument = _argument(name, tag)
+    if name in ("1c", "2c", "3c", "4c", "c"):
+        try:
+            return int(argument.strip("&Hh"), 16) == default
+        except ValueError:
+            return False
+    if name == "fn":
+        return argument == default
+    try:
+        return float(argument) == float(default)
+    except (TypeError, ValueError):
+        return False
+
+
+class TagBuilder(object):
+
+    """Override tags of an event, without the redundant ones
+
+    Tags are added as strings (e.g. from the asstags functions) and
+    parsed. build() removes:
+    - repeated tags: the first \\pos/\\move, \\org, \\an, \\fad/\\fade, the
+      last of the other tags (unless a \\t is between them)
+    - tags equal to the defaults (e.g. the style), unless a \\t before
+      them could have changed the value, or they reset a related tag
+      before them (\\bord after \\xbord, \\shad after \\yshad...)
+    and joins the rest once.
+
+    Parameters:
+    :param defaults: dict of tag name -> default value, colors as BGR ints,
+        added to `base`
+    :param base: defaults extended by `defaults` (None for no defaults but
+        `defaults`, e.g. for override blocks after the first one)
+
+    Example:
+    >>> tags = TagBuilder.from_style(line.style, alignment=5)
+    >>> tags.add(pos(x, y), blur(), an(5))
+    >>> let.tag = tags.build()
+    """
+
+    def __init__(self, defaults=None, base=DEFAULTS):
+        self.defaults = dict(base or {})
+        if defaults:
+            self.defaults.update(defaults)
+        self._tags = []
+
+    @classmethod
+    def from_style(cls, style, alignment=None, **defaults):
+        """Builder with the defaults of an effector.Style
+
+        @alignment: alignment of the written style (Generator writes 5)
+        """
+        values = style_defaults(style.as_dict(), alignment)
+        values.update(defaults)
+        return cls(values)
+
+    def add(self, *tags):
+        """Add strings of override tags"""
+        for text in tags:
+            if text:
+                self._tags.extend(parse_tags(text))
+        return self
+
+    def __iadd__(self, text):
+        return self.add(text)
+
+    def clear(self):
+        self._tags = []
+
+    def _kept(self, first):
+        """Indexes of the tags with effect"""
+        keep = [True] * len(self._tags)
+        last = {}
+        groups = set()
+        transform = False
+        for index, (name, tag) in enumerate(self._tags):
+            if name is None or name in KEEP_ALL:
+                if name in ("t", "r"):
+                    # the values before a \t or a \r are used
+                    transform = True
+                    last = {}
+                continue
+            key = _SAME.get(name, name)
+            if key in FIRST_WINS:
+                if key in first:
+                    keep[index] = False
+                    continue
+                first.add(key)
+            elif key in last:
+                keep[last[key]] = False
+            last[key] = index
+            group = _GROUPS.get(key)
+            default = self.defaults.get(key)
+            if default is not None and group not in groups:
+                if key == "an" or not (transform or key in FIRST_WINS):
+                    if _equal_default(name, tag, default):
+                        keep[index] = False
+            if group is not None and keep[index]:
+                groups.add(group)
+        return keep
+
+    def build(self, seen=None):
+        """String of the tags with effect
+
+        @seen: set of the first wins tags (see FIRST_WINS) of the previous
+        override blocks of the line, updated with the ones of this block
+        """
+        keep = self._kept(set() if seen is None else seen)
+        return "".join(tag for (name, tag), k in zip(self._tags, keep) if k)
+
+    def __str__(self):
+        return self.build()
+
+    def __len__(self):
+        return len(self._tags)
+
+    def __repr__(self):
+        return "<{:s} {!r}>".format(self.__class__.__name__, self.build())
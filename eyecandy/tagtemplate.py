@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compiled override tag templates
+
+A template is a string of override tags with {name} placeholders. It is
+parsed once: the constant parts are kept as strings and each placeholder
+gets the formatter of the tag it belongs to (the same formatting as the
+asstags functions), so rendering only formats the placeholders.
+
+Example:
+>>> template = tag_template("\\\\pos({x},{y})\\\\blur{b}\\\\c{col}\\\\an1")
+>>> template(x=10.5, y=20, b=2, col="ff0000")
+'\\\\pos(10.5,20)\\\\blur2\\\\c&H0000FF&\\\\an1'
+"""
+from __future__ import absolute_import, division, print_function, with_statement
+
+import math
+import re
+
+try:
+    from color import Color, hex_color
+    from helpers import round_format_str
+    from tagbuilder import RE_TAG
+except ImportError:
+    from .color import Color, hex_color
+    from .helpers import round_format_str
+    from .tagbuilder import RE_TAG
+
+# {name} or {name:format_spec}, "{\p1}" and other braces are left as is
+RE_PLACEHOLDER = re.compile(r"\{([A-Za-z_]\w*)(?::([^{}]*))?\}")
+
+
+def _number(decimals):
+    def format(value):
+        return round_format_str(value, decimals)
+
+    return format
+
+
+def _ceil(value):
+    return str(int(math.ceil(value)))
+
+
+def _integer(value):
+    return str(int(round(value)))
+
+
+def _color(value):
+    if not isinstance(value, Color):
+        value = hex_color(value)
+    return value.ass
+
+
+def _alpha(value):
+    try:
+        return "&H{:02X}&".format(int(value))
+    except ValueError:
+        return "&H{:02X}&".format(int(value, 16))
+
+
+def _value(value):
+    """Placeholder out of a tag: strings as is, numbers rounded"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, Color):
+        return value.ass
+    return round_format_str(value)
+
+
+_COORDINATE = _number(4)
+
+# Tag name -> formatter of its argument, or list of formatters of the
+# arguments in parentheses (the last one is used for the rest)
+FORMATTERS = {
+    "pos": [_COORDINATE],
+    "org": [_COORDINATE],
+    "move": [_COORDINATE] * 4 + [_integer],
+    "t": [_number(5)],
+    "fad": [_integer],
+    "fade": [_integer] * 3 + [_number(2)],
+    "clip": [_ceil],
+    "iclip": [_ceil],
+    "bord": _number(2),
+    "xbord": _number(2),
+    "ybord": _number(2),
+    "shad": _number(2),
+    "xshad": _number(2),
+    "yshad": _number(2),
+    "blur": _number(2),
+    "be": _ceil,
+    "fscx": _ceil,
+    "fscy": _ceil,
+    "fs": _number(2),
+    "fsp": _number(2),
+    "frx": _number(8),
+    "fry": _number(8),
+    "frz": _number(8),
+    "fr": _number(8),
+    "fax": _number(5),
+    "fay": _number(5),
+    "fn": str,
+}
+for _tag in ("c", "1c", "2c", "3c", "4c"):
+    FORMATTERS[_tag] = _color
+for _tag in ("alpha", "1a", "2a", "3a", "4a"):
+    FORMATTERS[_tag] = _alpha
+for _tag in ("an", "a", "b", "i", "u", "s", "q", "k", "K", "kf", "ko", "p", "fe"):
+    FORMATTERS[_tag] = _integer
+
+
+def _spec_formatter(spec):
+    def format(value):
+        return "{:{:s}}".format(value, spec)
+
+    return format
+
+
+def _formatter(tag, argument):
+    """Formatter of the argument number `argument` of a tag"""
+    formatters = FORMATTERS.get(tag, _value)
+    if argument is None:
+        return _value if isinstance(formatters, list) else formatters
+    if not isinstance(formatters, list):
+        return _value
+    return formatters[min(argument, len(formatters) - 1)]
+
+
+def _context(literal, tag, argument):
+    """(tag, argument) of a placeholder that follows `literal`
+
+    argument is None for a tag without parentheses, tag is None for a
+    placeholder that is not the argument of a tag.
+    """
+    m = None
+    for m in RE_TAG.finditer(literal):
+        pass
+    if m is not None:
+        tag, rest = m.group(1), literal[m.end() :]
+        if not rest:
+            return tag, None
+        if rest[0] == "(" and ")" not in rest and rest[-1] in "(,":
+            return tag, rest.count(",")
+        return None, None
+    if tag is not None and argument is not None:
+        # Placeholders of the same parentheses: "," between them
+        if literal and ")" not in literal and literal[-1] == ",":
+            return tag, argument + literal.count(",")
+    return None, None
+
+
+class TagTemplate(object):
+
+    """Override tags with placeholders, compiled once
+
+    The placeholders are formatted as the argument of their tag (e.g.
+    \\pos with 4 decimals, \\c from a Color or a hex string), a format
+    spec ({x:.1f}) overrides it. Values are not validated.
+
+    Parameters:
+    :param template: string of override tags with {name} placeholders
+
+    Example:
+    >>> template = TagTemplate("\\\\pos({x},{y})\\\\t(0,{t},\\\\frz{angle})")
+    >>> template.names
+    ('x', 'y', 't', 'angle')
+    >>> template(12, 30.25, 500, 90)
+    '\\\\pos(12,30.25)\\\\t(0,500,\\\\frz90)'
+    """
+
+    def __init__(self, template):
+        self.template = template
+        parts = []
+        fields = []
+        names = []
+        literal = ""
+        tag = argument = None
+        position = 0
+        for m in RE_PLACEHOLDER.finditer(template):
+            text = template[position : m.start()]
+            literal += text
+            tag, argument = _context(text, tag, argument)
+            name, spec = m.group(1, 2)
+            if spec is None:
+                format = _formatter(tag, argument)
+            else:
+                format = _spec_formatter(spec)
+            parts.append(literal)
+            literal = ""
+            fields.append((len(parts), name, format))
+            parts.append(None)
+            if name not in names:
+                names.append(name)
+            position = m.end()
+        parts.append(literal + template[position:])
+        self.names = tuple(names)
+        self._parts = parts
+        self._fields = tuple(fields)
+
+    def render(self, values):
+        """Tags with the placeholders replaced by values[name]"""
+        parts = self._parts[:]
+        for index, name, format in self._fields:
+            parts[index] = format(values[name])
+        return "".join(parts)
+
+    def __call__(self, *args, **kwargs):
+        """Render with the values as arguments, in the order of `names`,
+        or as keyword arguments
+        """
+        if args:
+            if len(args) > len(self.names):
+                raise TypeError(
+                    "{:d} placeholders, {:d} values given".format(
+                        len(self.names), len(args)
+                    )
+                )
+            kwargs.update(zip(self.names, args))
+        return self.render(kwargs)
+
+    def __repr__(self):
+        return "<{:s} {!r}>".format(self.__class__.__name__, self.template)
+
+
+MAX_CACHED_TEMPLATES = 256
+_templates = {}
+
+
+def tag_template(template):
+    """Compiled TagTemplate of a string, cached
+
+    Can be called in the per line or per char loops of an effect, the
+    template is only compiled the first time.
+    """
+    try:
+        return _templates[template]
+    except KeyError:
+        pass
+    compiled = TagTemplate(template)
+    if len(_templates) >= MAX_CACHED_TEMPLATES:
+        _templates.clear()
+    _templates[template] = compiled
+    return compiled
@@ -10,13 +10,6 @@ except ImportError:
     from . import asstime, helpers
 
 STYLE_FORMAT = (
-<<<<<<< HEAD
-    "Name", "Fontname", "Fontsize", "PrimaryColour", "SecondaryColour",
-"OutlineColour", "BackColour", "Bold", "Italic", "Underline",
-    "StrikeOut", "ScaleX", "ScaleY", "Spacing", "Angle", "BorderStyle",
-    "Outline", "Shadow", "Alignment", "MarginL", "MarginR",
-    "MarginV", "Encoding")
-=======
     "Name",
     "Fontname",
     "Fontsize",
@@ -41,7 +34,6 @@ STYLE_FORMAT = (
     "MarginV",
     "Encoding",
 )
->>>>>>> 52398b7 (formateo)
 DIALOG_FORMAT = (
     "Layer",
     "Start",
@@ -102,15 +94,15 @@ class Writer(object):
                 }
             ]
 
-    def _dialog(self):
-        dialog_fmt = []
+    def _dialog_lines(self):
+        """Format the dialogs one line at a time"""
         for dialog in helpers.progressbar(self._assdict["dialog"], prefix="Writing"):
             if dialog["comment"]:
                 key = "Comment"
             else:
                 key = "Dialogue"
             if dialog["text"]:
-                dialog_fmt.append(
+                yield (
                     "{:s}: {:d},{:s},{:s},{:s},{:s},{:s},{:s},{:s},{:s},"
                     "{:s}".format(
                         key,
@@ -126,19 +118,32 @@ class Writer(object):
                         dialog["text"],
                     )
                 )
-        return "\n".join(dialog_fmt)
+
+    def _dialog(self):
+        return "\n".join(self._dialog_lines())
+
+    def _dialog_styles(self):
+        """Names of the styles used in the dialog"""
+        dialogs = self._assdict["dialog"]
+        # EventBuffer keeps track of the styles, avoid a pass over the events
+        if hasattr(dialogs, "styles"):
+            return dialogs.styles
+        return set(d["style"]["name"] for d in dialogs)
+
+    def _dialog_end(self):
+        """ASS string time of the end of the last dialog"""
+        dialogs = self._assdict["dialog"]
+        if hasattr(dialogs, "end"):
+            return dialogs.end
+        return dialogs[-1]["end"]
 
     def _format(self, values):
         return "Format: {:s}".format(", ".join(values))
 
     def _style(self):
         # List only used styles in the dialog
-        dialog_styles = set()
-        for d in self._assdict["dialog"]:
-            style_name = d["style"]["name"]
-            dialog_styles.add(style_name)
         styles = []
-        for sty_name in dialog_styles:
+        for sty_name in self._dialog_styles():
             sty = self._assdict["style"][sty_name]
             styles.append(
                 "Style: {:s},{:s},{:d},{:s},{:s},{:s},{:s},{:s},{:s},{:s},"
@@ -214,11 +219,11 @@ class Writer(object):
                 )
         else:
             # Dummy video
-            framerate = round(asstimr.FPS_NTSC_FILM, 3)
+            framerate = round(asstime.FPS_NTSC_FILM, 3)
             w, h = self._assdict["resolution"]
             r, g, b = (0, 0, 0)
             checkboard = ""  # checkbord=True "c", checkboard=False ""
-            frames = asstime.strtime_to_frames(self._assdict["dialog"][-1]["end"])
+            frames = asstime.strtime_to_frames(self._dialog_end())
             video = "?dummy:{:.6f}:{:d}:{:d}:{:d}:{:d}:{:d}:{:d}{:s}:".format(
                 framerate, frames, w, h, r, g, b, checkboard
             )
@@ -239,8 +244,8 @@ class Writer(object):
     def _resolution(self):
         return "PlayResX: {:d}\nPlayResY: {:d}".format(*self._assdict["resolution"])
 
-    def _tostring(self):
-        ass = (
+    def _header(self):
+        return (
             "[Script Info]\n"
             "; Script generated by Eyecandy\n"
             "ScriptType: v4.00+\n"
@@ -256,28 +261,37 @@ class Writer(object):
             "{styles}\n"
             "\n[Events]\n"
             "{dialog_format}\n"
-            "{dialogs}\n\n"
         ).format(
             meta=self._metadata(),
             resolution=self._resolution(),
             aegisub=self._aegisub(),
             styles=self._style(),
-            dialogs=self._dialog(),
             style_format=self._format(STYLE_FORMAT),
             dialog_format=self._format(DIALOG_FORMAT),
         )
-        return ass
+
+    def _tostring(self):
+        return self._header() + self._dialog() + "\n\n"
 
     def save(self, filename=None):
         """ "Save to file the ASS script
 
+        The dialogs are written one line at a time, so an `EventBuffer`
+        is streamed to the file without being loaded in memory.
+
         Parameters:
         :param filename: filename of the script to read
         """
         if not filename:
             filename = self._filename
         with codecs.open(filename, "wb", "utf-8-sig") as f:
-            f.write(self._tostring())
+            f.write(self._header())
+            sep = ""
+            for line in self._dialog_lines():
+                f.write(sep)
+                f.write(line)
+                sep = "\n"
+            f.write("\n\n")
 
     def __repr__(self):
         return "<class '{:s}'>".format(self.__class__.__name__)
@@ -29,6 +29,7 @@ setup(
     author_email="alquimistaotaku@gmail.com",
     license="MIT",
     packages=["eyecandy"],
+    extras_require={"numpy": ["numpy"]},
     entry_points={"console_scripts": ["eyecandy = eyecandy.helpers:generate_effect"]},
     zip_safe=False,
     keywords="eyecandy text karaoke .ass",
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+# The package imports PyQt (effector), the modules are imported directly
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "eyecandy"))
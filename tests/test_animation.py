@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import math
+
+import pytest
+
+from animation import AnimatedEvent, Segment, compile_animation, fit_segments
+
+TIMES = [i * 40 for i in range(26)]
+
+
+def _value(segment, time):
+    s = ((time - segment.t1) / (segment.t2 - segment.t1)) ** segment.accel
+    return [a + (b - a) * s for a, b in zip(segment.start, segment.end)]
+
+
+def test_linear_track():
+    scale = [100 + i * 4 for i in range(26)]
+    assert compile_animation(TIMES, {"fscx": scale}) == [
+        AnimatedEvent(0, 1040, "\\fscx100\\t(0,1000,\\fscx200)")
+    ]
+
+
+def test_accelerated_track():
+    blur = [10 * (t / 1000.0) ** 2 for t in TIMES]
+    (segment,) = fit_segments(TIMES, blur, 0.05)
+    assert segment.accel == pytest.approx(2)
+    assert compile_animation(TIMES, {"blur": blur}) == [
+        AnimatedEvent(0, 1040, "\\blur0\\t(0,1000,2,\\blur10)")
+    ]
+    assert len(fit_segments(TIMES, blur, 0.05, accel=False)) > 1
+
+
+@pytest.mark.parametrize("tolerance", [0.05, 0.5, 2])
+def test_fit_segments_tolerance(tolerance):
+    values = [30 * math.sin(t / 150.0) for t in TIMES]
+    segments = fit_segments(TIMES, values, tolerance)
+    assert segments[0].t1 == TIMES[0] and segments[-1].t2 == TIMES[-1]
+    for a, b in zip(segments, segments[1:]):
+        assert a.t2 == b.t1
+    for segment in segments:
+        for time, value in zip(TIMES, values):
+            if segment.t1 <= time <= segment.t2:
+                assert abs(_value(segment, time)[0] - value) <= tolerance + 1e-9
+
+
+def test_single_sample():
+    assert fit_segments([0], [5], 1) == [Segment(0, 0, (5,), (5,), 1)]
+    assert compile_animation([0], {"frz": [5]}, end=40) == [
+        AnimatedEvent(0, 40, "\\frz5")
+    ]
+
+
+def test_move_windows():
+    pos = [(i * 10, 0) if i <= 10 else (100, (i - 10) * 10) for i in range(21)]
+    alpha = [i * 20 for i in range(21)]
+    events = compile_animation(TIMES[:21], {"pos": pos, "alpha": alpha})
+    assert events == [
+        AnimatedEvent(
+            0, 400, "\\move(0,0,100,0,0,400)\\alpha&H00&\\t(0,400,\\alpha&HC8&)"
+        ),
+        AnimatedEvent(
+            400, 840, "\\move(100,0,100,100,0,400)\\alpha&HC8&\\t(0,400,\\alpha&HFF&)"
+        ),
+    ]
+
+
+def test_colors_and_errors():
+    colors = [(255, i * 10, 0) for i in range(26)]
+    assert compile_animation(TIMES, {"color": colors}) == [
+        AnimatedEvent(0, 1040, "\\1c&H0000FF&\\t(0,1000,\\1c&H00FAFF&)")
+    ]
+    with pytest.raises(ValueError):
+        compile_animation(TIMES, {"foo": TIMES})
+    with pytest.raises(ValueError):
+        compile_animation(TIMES, {"fscx": TIMES[1:]})
+    assert compile_animation([], {}) == []
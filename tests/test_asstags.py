@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import asstags
+
+SHAPES = [
+    ("shape_poligon", (10, 3)),
+    ("shape_poligon", (15.5, 6)),
+    ("shape_poligon", (33.3, 11)),
+    ("shape_star", (5, 10, 5)),
+    ("shape_star", (40, 7.5, 8)),
+    ("shape_star", (3, 1, 3)),
+    ("shape_circle", (15.5, False)),
+    ("shape_circle", (7.7, True)),
+    ("shape_circle", (0.125, False)),
+    ("shape_ring", (15.5, 3)),
+    ("shape_ring", (40, 2.25)),
+    ("shape_heart", (30,)),
+    ("shape_heart", (44.44,)),
+]
+
+
+@pytest.mark.parametrize("name, args", SHAPES)
+def test_shapes_with_and_without_numpy(monkeypatch, name, args):
+    numpy = pytest.importorskip("numpy")
+    function = getattr(asstags, name)
+    monkeypatch.setattr(asstags, "numpy", numpy)
+    cached = function(*args)
+    monkeypatch.setattr(asstags, "numpy", None)
+    assert function(*args) == cached
+
+
+def test_shapes_without_numpy(monkeypatch):
+    monkeypatch.setattr(asstags, "numpy", None)
+    assert asstags.shape_poligon(10, 3) == "m 1.34 15 l 10 0 18.66 15 1.34 15 "
+    assert asstags.shape_ring(15.5, 3).split(" m ")[1].startswith("3 15.5 b ")
+    assert asstags.shape_star(1, 3, 3).startswith("m 3 4 l 0.4 4.5 ")
+
+
+def test_translate_shape_decimals():
+    assert asstags.translate_shape("m 1.5 -2.25 l 10 0", 1, 1) == "m 2.5 -1.25 l 11 1"
+    assert asstags.shape_max("m -1.5 0.25 l 10.75 3") == (10.75, 3)
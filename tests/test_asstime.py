@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+import pytest
+
+import asstime
+from asstime import Time
+
+
+class SubTime(Time):
+    pass
+
+
+def test_time_is_immutable():
+    time = Time(1234)
+    with pytest.raises(AttributeError):
+        time._ms = 0
+    with pytest.raises(AttributeError):
+        time._strtime = "0:00:00.00"
+    with pytest.raises(AttributeError):
+        del time._ms
+    assert time.ms == 1234
+    assert time.strtime == "0:00:01.23"
+
+
+def test_time_hash_and_pickle():
+    time = Time(1500)
+    assert hash(time) == hash(1500)
+    assert {time: 1}[1500] == 1
+    assert pickle.loads(pickle.dumps(time)) == time
+
+
+def test_time_subclasses():
+    assert Time(5) == SubTime(5)
+    assert SubTime(3) < Time(4) <= SubTime(4)
+    assert (Time(5) + SubTime(5)).ms == 10
+    assert (Time(5) - SubTime(2)).ms == 3
+    assert Time(5) * SubTime(2) == 10
+
+
+def test_time_int_fast_paths():
+    assert (Time(100) + 5).ms == 105
+    assert (5 + Time(100)).ms == 105
+    assert (200 - Time(50)).ms == 150
+    assert (Time(100) + 0.6).ms == 101
+
+
+def _strtime_or_error(ms):
+    try:
+        return asstime.ms_to_strtime(ms)
+    except ValueError:
+        return ValueError
+
+
+@pytest.mark.parametrize("values", [(1000, 1000.0), (1000.0, 1000), (1, True)])
+def test_ms_to_strtime_cache_keeps_types_apart(values):
+    asstime._strtime_cache.clear()
+    cached = [_strtime_or_error(ms) for ms in values]
+    asstime._strtime_cache.clear()
+    uncached = []
+    for ms in values:
+        uncached.append(_strtime_or_error(ms))
+        asstime._strtime_cache.clear()
+    assert cached == uncached
+
+
+def test_ms_array_to_strtime():
+    times = [0, 1000, 61230, 3600000, 1000]
+    assert asstime.ms_array_to_strtime(times) == [
+        "0:00:00.00",
+        "0:00:01.00",
+        "0:01:01.23",
+        "1:00:00.00",
+        "0:00:01.00",
+    ]
+    assert asstime.strtime_to_ms("0:01:01.23") == 61230
+
+
+XVID = """# XviD 2pass stat file (core version 1.2.2)
+# Please do not modify this file
+
+Frame statistics
+i 1 0 0 9000 8000 0 0
+p 1 0 0 500 400 0 0
+b 1 0 0 300 200 0 0
+# comment
+p 1 0 0 500 400 0 0
+i 1 0 0 9000 8000 0 0
+p 1 0 0 500 400 0 0
+"""
+
+
+def test_keyframes_xvid_counts_only_frame_lines(tmp_path):
+    filename = tmp_path / "pass.stats"
+    filename.write_text(XVID)
+    keyframes = asstime.Keyframes.from_file(str(filename))
+    assert list(keyframes.frames) == [0, 4]
+
+
+def test_keyframes_aegisub_constant_fps(tmp_path):
+    filename = tmp_path / "keyframes.txt"
+    filename.write_text("# keyframe format v1\nfps 25\n0\n250\n100000\n")
+    keyframes = asstime.Keyframes.from_file(str(filename))
+    assert list(keyframes.times) == [0, 10000, 4000000]
+    assert keyframes.nearest(9000) == 10000
+    assert list(keyframes.snap([9850, 5000, 3999900], 200)) == [10000, 5000, 4000000]
+
+
+def test_timecodes_from_fps():
+    timecodes = asstime.Timecodes.from_fps(asstime.FPS_NTSC_FILM, 1000)
+    assert len(timecodes) == 1000
+    assert timecodes.frame_to_ms(999) == pytest.approx(999 * 1001 / 24)
+    assert timecodes.frame_start(24) == 1000
+    assert timecodes.ms_to_frame(1001.5) == 24
+
+
+def test_timecodes_v2_file(tmp_path):
+    filename = tmp_path / "timecodes.txt"
+    filename.write_text("# timecode format v2\n0\n40\n# comment\n80\n200\n240\n")
+    timecodes = asstime.Timecodes.from_file(str(filename))
+    assert list(timecodes.timestamps) == [0, 40, 80, 200, 240]
+    assert [timecodes.ms_to_frame(ms) for ms in (-5, 0, 39, 150, 240, 330)] == [
+        0,
+        0,
+        0,
+        2,
+        4,
+        6,
+    ]
+    assert timecodes.frame_to_ms(6) == 320
+    assert timecodes.snap(41, 199) == (80, 200)
+    assert list(timecodes.frame_range(30, 210)) == [
+        (1, 40, 80),
+        (2, 80, 200),
+        (3, 200, 240),
+    ]
+
+
+def test_timecodes_v1_file(tmp_path):
+    filename = tmp_path / "timecodes.txt"
+    filename.write_text("# timecode format v1\nAssume 25\n2,3,50\n")
+    timecodes = asstime.Timecodes.from_file(str(filename), frames=6)
+    assert list(timecodes.timestamps) == [0, 40, 80, 100, 120, 160]
+    with pytest.raises(ValueError):
+        filename.write_text("0\n40\n")
+        asstime.Timecodes.from_file(str(filename))
+
+
+@pytest.mark.parametrize("numpy", [None, "numpy"])
+def test_timecodes_sequences(monkeypatch, numpy):
+    if numpy is not None:
+        numpy = pytest.importorskip(numpy)
+    monkeypatch.setattr(asstime, "numpy", numpy)
+    timecodes = asstime.Timecodes([0, 40, 80, 200, 240])
+    assert list(timecodes.frames_to_ms([-1, 0, 3, 6])) == [-40, 0, 200, 320]
+    assert list(timecodes.ms_to_frames([-5, 39, 150, 240, 330])) == [0, 0, 2, 4, 6]
+
+
+@pytest.mark.parametrize("numpy", [None, "numpy"])
+def test_timecodes_snap_array_matches_snap(monkeypatch, numpy):
+    if numpy is not None:
+        numpy = pytest.importorskip(numpy)
+    monkeypatch.setattr(asstime, "numpy", numpy)
+    timecodes = asstime.Timecodes([0, 41.7, 83.4, 200, 240.5])
+    times = [-30, 0, 1, 41.7, 41.8, 83.4, 150, 200, 239, 240.5, 241, 330, 1000]
+    starts, ends = timecodes.snap_array(times, times[::-1])
+    expected = [timecodes.snap(s, e) for s, e in zip(times, times[::-1])]
+    assert list(zip(starts, ends)) == expected
+    assert timecodes.snap_array([], []) == (asstime.array("l"), asstime.array("l"))
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import buffer as buffer_module
+from buffer import EventBuffer
+
+STYLE = {"name": "Default", "font": {"name": "Arial", "size": 40}}
+
+
+def _dialog(layer, start, text, end="0:00:09.00"):
+    return {"layer": layer, "start": start, "end": end, "style": STYLE, "text": text}
+
+
+DIALOGS = [
+    _dialog(1, "0:00:03.00", "a"),
+    _dialog(0, "0:00:02.00", "b"),
+    _dialog(0, "0:00:01.00", "c", end="0:01:00.00"),
+    _dialog(1, "0:00:00.00", "d"),
+    _dialog(0, "0:00:02.00", "e"),
+]
+
+
+def test_limit():
+    with pytest.raises(ValueError):
+        EventBuffer(limit=0)
+
+
+def test_insertion_order_with_runs():
+    buffer = EventBuffer(limit=2)
+    buffer.extend(DIALOGS)
+    assert buffer.runs == 2
+    assert len(buffer) == 5
+    assert [d["text"] for d in buffer] == ["a", "b", "c", "d", "e"]
+    assert buffer.end == "0:01:00.00"
+    assert buffer.styles == {"Default"}
+    buffer.close()
+    assert len(buffer) == 0 and buffer.runs == 0
+
+
+@pytest.mark.parametrize("limit", [None, 1, 2, 3])
+def test_sorted_merge(limit):
+    buffer = EventBuffer(limit=limit, sort=True)
+    buffer.extend(DIALOGS)
+    # layer, start, then insertion order
+    assert [d["text"] for d in buffer] == ["c", "b", "e", "d", "a"]
+
+
+def test_runs_keep_the_style_dicts():
+    buffer = EventBuffer(limit=1)
+    buffer.extend(DIALOGS[:2])
+    assert all(d["style"] is STYLE for d in buffer)
+
+
+def test_transform():
+    buffer = EventBuffer(limit=2)
+    buffer.extend(DIALOGS)
+
+    def drop_layer_1(dialogs):
+        return [d for d in dialogs if d["layer"] == 0]
+
+    buffer.transform(drop_layer_1)
+    assert [d["text"] for d in buffer] == ["b", "c", "e"]
+    assert len(buffer) == 3
+    assert buffer.end == "0:01:00.00"
+
+
+def test_times_parsed_lazily(monkeypatch):
+    parsed = []
+    strtime_to_ms = buffer_module.asstime.strtime_to_ms
+
+    def parse(strtime):
+        parsed.append(strtime)
+        return strtime_to_ms(strtime)
+
+    monkeypatch.setattr(buffer_module.asstime, "strtime_to_ms", parse)
+    buffer = EventBuffer()
+    buffer.extend(DIALOGS)
+    assert parsed == []
+    assert buffer.end == "0:01:00.00"
+    assert buffer.end == "0:01:00.00"
+    assert len(parsed) == 5
+    buffer.append(_dialog(0, "0:00:01.00", "f", end="0:02:00.00"))
+    assert buffer.end == "0:02:00.00"
+    assert len(parsed) == 6
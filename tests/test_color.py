@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import functools
+import pickle
+
+import pytest
+
+import color
+import interpolate
+from color import Color, GradientCache, gradient
+
+
+def _partial_with_list(t, start, end, weights=None):
+    return interpolate.linear(t, start, end)
+
+
+def test_gradient_cache_hits():
+    cache = GradientCache(maxsize=2)
+    colors = (Color(255, 255, 255), Color(0, 0, 0))
+    first = cache.ass(colors, 5)
+    assert cache.ass(list(colors), 5) is first
+    assert cache.cache_info() == (1, 1, 2, 1)
+    cache.ass(colors, 6)
+    cache.ass(colors, 7)
+    assert cache.cache_info().currsize == 2
+
+
+def test_gradient_cache_accepts_iterators():
+    cache = GradientCache()
+    colors = [Color(255, 0, 0), Color(0, 0, 255), Color(0, 255, 0)]
+    expected = tuple(c.ass for c in gradient(colors, 9))
+    assert cache.ass(iter(colors), 9) == expected
+    assert cache.ass((c for c in colors), 9) == expected
+    assert cache.cache_info().hits == 1
+
+
+def test_gradient_cache_unhashable_partial_is_not_cached():
+    cache = GradientCache()
+    func = functools.partial(_partial_with_list, weights=[1, 2])
+    colors = (Color(255, 255, 255), Color(0, 0, 0))
+    assert cache.ass(colors, 3, func) == cache.ass(colors, 3, interpolate.linear)
+    assert cache.cache_info().currsize == 1
+
+
+def test_named_colors_star_import():
+    namespace = {}
+    exec("from color import *", namespace)
+    assert namespace["red"].ass == "&H0000FF&"
+    assert namespace["cornflowerblue"] == color.named_color("cornflowerblue")
+    assert "Color" in namespace and "gradient_ass" in namespace
+    assert color.navy.hex == "#000080"
+
+
+def test_gradient_defaults_match_gradient_array():
+    colors = (Color(255, 0, 0), Color(0, 0, 255))
+    cache = GradientCache()
+    for space in ("rgb", "oklab", "lch"):
+        assert list(cache.ass(colors, 7, space=space)) == color.gradient_ass(
+            colors, 7, space=space
+        )
+    assert cache.ass(colors, 7, space="oklab") is cache.ass(
+        colors, 7, interpolate.linear, "oklab"
+    )
+
+
+def test_gradient_array_matches_color_gradient():
+    numpy = pytest.importorskip("numpy")
+    for c1, c2, steps in (
+        ((10, 200, 30), (250, 5, 128), 7),
+        ((0, 0, 0), (255, 128, 1), 20),
+    ):
+        c1, c2 = Color(*c1), Color(*c2)
+        expected = [tuple(c)[:3] for c in c1.gradient(c2, steps)]
+        array = color.gradient_array((c1, c2), steps)
+        assert array.dtype == numpy.uint8
+        assert [tuple(rgb) for rgb in array.tolist()] == expected
+
+
+def test_gradient_array_stops():
+    pytest.importorskip("numpy")
+    colors = (Color(255, 0, 0), Color(0, 255, 0), Color(0, 0, 255))
+    ass = color.gradient_ass(colors, 5, interpolate.linear)
+    assert ass == ["&H0000FF&", "&H007F7F&", "&H00FF00&", "&H7F7F00&", "&HFF0000&"]
+    assert color.gradient_ass(colors[:1], 2) == ["&H0000FF&", "&H0000FF&"]
+    assert color.rgb_array_to_ass([[1, 2, 3]]) == ["&H030201&"]
+
+
+def test_frozen_color():
+    frozen = Color(255, 0, 128).freeze()
+    assert frozen.ass == "&H8000FF&" and frozen.hex == "#FF0080"
+    assert frozen == Color(255, 0, 128)
+    assert hash(frozen) == hash(color.FrozenColor(255, 0, 128))
+    assert pickle.loads(pickle.dumps(frozen)) == frozen
+    with pytest.raises(TypeError):
+        frozen[0] = 0
+    with pytest.raises(ValueError):
+        color.FrozenColor(256, 0, 0)
+    assert color.hex_color("#ff0080") is color.hex_color("#ff0080")
+    assert color.named_color("red") is color.red
+    with pytest.raises(ValueError):
+        color.named_color("nocolor")
+
+
+@pytest.mark.parametrize("space", ["linear", "oklab", "oklch", "lab", "lch"])
+def test_color_space_round_trip(space):
+    numpy = pytest.importorskip("numpy")
+    to_space, from_space, hue = color.COLOR_SPACES[space]
+    values = numpy.arange(0, 256, 15)
+    rgb = numpy.stack(numpy.meshgrid(values, values, values), -1).reshape(-1, 3)
+    rgb = rgb.astype(numpy.uint8)
+    back = from_space(to_space(rgb)).astype(int)
+    assert numpy.abs(back - rgb).max() <= 1
+
+
+def test_perceptual_gradients():
+    numpy = pytest.importorskip("numpy")
+    white = color.rgb_to_oklab([255, 255, 255])
+    numpy.testing.assert_allclose(white, [1, 0, 0], atol=1e-4)
+    # Red to blue: the LCh hues go the short way, through magenta
+    lch = color.gradient_array((Color(255, 0, 0), Color(0, 0, 255)), 3, space="lch")
+    r, g, b = lch[1].tolist()
+    assert r > g and b > g
+    with pytest.raises(ValueError):
+        color.gradient_array((Color(255, 0, 0), Color(0, 0, 255)), 3, space="hsv")
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+# Needs PyQt (text metrics)
+effector = pytest.importorskip("effector")
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "test.ass")
+
+
+def test_fx_calls_only_overridden_hooks(tmp_path):
+    sub = effector.Generator(
+        SCRIPT, str(tmp_path / "out.ass"), progressbar=False, original=False
+    )
+    calls = []
+
+    class Effect(effector.Fx):
+        def OnSyllable(self, syl):
+            calls.append(("syl", self.index, syl.start.ms, syl.end.ms))
+            return syl
+
+        def OnLetterOut(self, let):
+            calls.append(("out", self.index, let.start.ms, let.end.ms))
+
+    Effect(sub, delay=0, out_dur=100).run()
+    lines = list(sub.lines)
+    syls = [call for call in calls if call[0] == "syl"]
+    outs = [call for call in calls if call[0] == "out"]
+    assert len(syls) == sum(len(line.syls) for line in lines)
+    assert len(outs) == sum(len(line.chars) for line in lines)
+    line = lines[0]
+    first = line.syls[0]
+    assert syls[0] == ("syl", 0, first.start.ms, first.end.ms)
+    assert outs[0] == ("out", 0, line.end.ms, line.end.ms + 100)
+    # Only the syllables are returned
+    assert len(sub._dialog) == len(syls)
+
+
+def test_main(tmp_path, monkeypatch):
+    output = str(tmp_path / "main.ass")
+    counts = []
+    Generator = effector.Generator
+
+    def generator(input_script, output_script=None):
+        sub = Generator(SCRIPT, output, progressbar=False, open=False)
+        counts.append(sum(len(line.chars) for line in sub.lines))
+        return sub
+
+    monkeypatch.setattr(effector, "Generator", generator)
+    effector.main()
+    (chars,) = counts
+    with open(output) as f:
+        dialogs = [row for row in f if row.startswith("Dialogue:")]
+    # 5 phases per letter: sleep, in, active, dead and out
+    assert len(dialogs) == 5 * chars
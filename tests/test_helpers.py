@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+import helpers
+from helpers import _round_format_str_decimal, round_format_str
+
+VALUES = [
+    0,
+    -0.0,
+    1,
+    -1,
+    0.5,
+    2.675,
+    -2.675,
+    0.000123456,
+    -0.00099999,
+    0.99999999,
+    -0.999995,
+    12345.678901,
+    1e-5,
+    2.5e-7,
+    2**53,
+    123456789.987654321,
+]
+
+
+def _random_values(count=2000):
+    rng = random.Random(42)
+    values = []
+    for _ in range(count):
+        exponent = rng.randint(-6, 9)
+        values.append(rng.uniform(-1, 1) * 10**exponent)
+        # Halves and other short decimals, the rounding cases
+        values.append(rng.randint(-99999, 99999) / 10 ** rng.randint(0, 6))
+    return values
+
+
+def _result(function, value, decimals):
+    # Some tiny numbers raise ValueError ("1e-05" has no "."), as before
+    try:
+        return function(value, decimals)
+    except ValueError:
+        return ValueError
+
+
+@pytest.mark.parametrize("decimals", [1, 2, 3, 5, 8])
+def test_round_format_str_matches_decimal(decimals):
+    for value in VALUES + _random_values():
+        assert _result(round_format_str, value, decimals) == _result(
+            _round_format_str_decimal, value, decimals
+        ), value
+
+
+def test_round_format_str_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(helpers, "MAX_CACHED_NUMBERS", 10)
+    monkeypatch.setattr(helpers, "_number_strings", {})
+    for i in range(25):
+        assert round_format_str(i + 0.5, 2) == "{:d}.5".format(i)
+    assert 0 < len(helpers._number_strings) <= 10
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import math
+from collections import OrderedDict
+from functools import partial
+
+import pytest
+
+import interpolate
+
+numpy = pytest.importorskip("numpy")
+
+T = [i / 100 for i in range(101)]
+
+
+def test_scalar_easings_use_pow():
+    t = 0.3
+    assert interpolate.acceleration(t, 0, 1) == t**2
+    assert interpolate.cubic_acceleration(t, 0, 1) == pow(t, 3)
+    assert interpolate.cubic_deccelaration(t, 0, 1) == 1 - (1 - t) ** 3
+    assert interpolate.smooth_step(t, 0, 1) == (t**2) * (3 - (2 * t))
+    assert interpolate.bernstein(t, 1, 3) == 3 * pow(t, 1) * pow(1 - t, 2)
+    expected = sum(
+        p * interpolate.bernstein(t, i, 3) for i, p in enumerate((0.25, 0.1, 0.25, 1))
+    )
+    assert interpolate.ease(t, 0, 1) == expected
+
+
+@pytest.mark.parametrize(
+    "func",
+    [f for f in interpolate.ARRAY_FUNCS if f is not interpolate.custom_curve]
+    + [partial(interpolate.cosine, repeat=3)],
+    ids=lambda f: getattr(f, "__name__", "partial"),
+)
+def test_array_versions_match_scalars(func):
+    for start, end in ((0, 1), (10.5, 30), (255, 0)):
+        values = interpolate.interpolate_array(numpy.array(T), start, end, func)
+        expected = [func(t, start, end) for t in T]
+        assert numpy.allclose(values, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_array_colors_match_scalars():
+    start = numpy.array([0.0, 200, 3.3])
+    end = numpy.array([255.0, 7, 100])
+    t = numpy.array(T)[:, None]
+    values = interpolate.array_func(interpolate.linear_squared)(t, start, end)
+    expected = [
+        [interpolate.linear_squared(v, s, e) for s, e in zip(start, end)] for v in T
+    ]
+    assert numpy.allclose(values, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_bezier_curve_array_matches_range():
+    points = [(0, 0), (3.3, 10), (-2, 4), (7.1, 1.7)]
+    expected = [
+        [interpolate.bezier_curve(i / 49, axis) for axis in zip(*points)]
+        for i in range(50)
+    ]
+    values = interpolate.bezier_curve_array(50, points)
+    assert numpy.allclose(values, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_bernstein_matrix_is_cached_and_read_only():
+    matrix = interpolate.bernstein_matrix(3, 11)
+    assert interpolate.bernstein_matrix(3, 11) is matrix
+    assert matrix.shape == (11, 4)
+    assert numpy.allclose(matrix.sum(1), 1)
+    with pytest.raises(ValueError):
+        matrix[0, 0] = 2
+
+
+def test_bernstein_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(interpolate, "MAX_CACHED_BASIS_SIZE", 100)
+    monkeypatch.setattr(interpolate, "_bernstein_cache", {})
+    for steps in range(5, 40):
+        interpolate.bernstein_matrix(3, steps)
+        cached = interpolate._bernstein_cache.values()
+        assert sum(basis.size for basis in cached) <= 100 or len(cached) == 1
+
+
+def test_high_degree_bezier_uses_de_casteljau():
+    points = [(i, (-1) ** i * i) for i in range(interpolate.MAX_BERNSTEIN_DEGREE + 5)]
+    expected = [
+        [interpolate.bezier_curve(i / 19, axis) for axis in zip(*points)]
+        for i in range(20)
+    ]
+    numpy.testing.assert_allclose(
+        interpolate.bezier_curve_array(20, points), expected, atol=1e-9
+    )
+
+
+def test_interpolate_range_array():
+    values = interpolate.interpolate_range_array(0, 10, 3, interpolate.cosine)
+    assert values.tolist() == pytest.approx([0, 5, 10])
+    assert math.isclose(values[1], interpolate.cosine(0.5, 0, 10))
+
+
+def test_cubic_bezier_tables_are_bounded(monkeypatch):
+    monkeypatch.setattr(interpolate.CubicBezier, "MAX_CACHED_TABLES", 4)
+    monkeypatch.setattr(interpolate.CubicBezier, "_tables", OrderedDict())
+    first = interpolate.CubicBezier(0.25, 0.1, 0.25, 1, samples=65)
+    first(0.5, 0, 1)
+    for i in range(10):
+        interpolate.CubicBezier(0.1 * i, 0, 0.5, 1, samples=65)(0.5, 0, 1)
+        interpolate.CubicBezier(0.25, 0.1, 0.25, 1, samples=65).table
+    tables = interpolate.CubicBezier._tables
+    assert len(tables) == 4
+    assert (first.points, 65) in tables
+
+
+def test_cubic_bezier_values():
+    linear = interpolate.CubicBezier(0, 0, 1, 1)
+    assert linear(0.3, 0, 10) == pytest.approx(3, abs=1e-6)
+    ease = interpolate.CubicBezier(0.25, 0.1, 0.25, 1)
+    assert round(ease(0.5, 0, 100), 2) == 80.24
+    values = ease(numpy.array([0.0, 0.5, 1.0]), 0, 100)
+    assert values.tolist() == pytest.approx([0, 80.24, 100], abs=0.01)
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+from array import array
+from collections import namedtuple
+from copy import copy
+
+import pytest
+
+from asstime import Time
+from karaoke import (
+    Columns,
+    Fx,
+    clamp_times,
+    delay_times,
+    fill_times,
+    karaoke_phases,
+    shift_times,
+)
+
+_Line = namedtuple("_Line", "start, end")
+_Item = namedtuple(
+    "_Item", "start, end, left, center, right, top, middle, bottom, width"
+)
+
+
+class _Dialog(object):
+
+    """Line, syllable or letter without the text metrics (no Qt)"""
+
+    def __init__(self, start, end, items=()):
+        self.start = Time(start)
+        self.end = Time(end)
+        self.left = self.center = self.right = 0.0
+        self.top = self.middle = self.bottom = self.width = 0.0
+        self.syls = self.chars = list(items)
+        self.syl_columns = self.char_columns = Columns.from_items(self.syls)
+
+    def copy(self):
+        return copy(self)
+
+    def as_dict(self):
+        return {"start": self.start.strtime, "end": self.end.strtime}
+
+
+class _Generator(object):
+
+    """Just the parts of `Generator` used by `Fx`"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.events = []
+
+    def extend(self, dialogs):
+        self.events.extend(dialogs)
+
+
+def _lines():
+    return [
+        _Dialog(1000, 2000, [_Dialog(1000, 1400), _Dialog(1400, 1990)]),
+        _Dialog(3000, 3500, [_Dialog(3000, 3500)]),
+    ]
+
+
+def _columns(starts, ends):
+    n = len(starts)
+    positions = [array("d", [0.0] * n) for _ in range(7)]
+    return Columns(array("l", starts), array("l", ends), *positions)
+
+
+def test_time_columns():
+    times = array("l", [0, 500, 1000])
+    assert list(shift_times(times, 100)) == [100, 600, 1100]
+    assert list(clamp_times(times, 200, 800)) == [200, 500, 800]
+    assert list(delay_times(times, 50, 1020)) == [50, 550, 1000]
+    assert list(fill_times(7, 3)) == [7, 7, 7]
+
+
+def test_columns_from_items():
+    items = [
+        _Item(Time(0), Time(100), 1, 2, 3, 4, 5, 6, 7),
+        _Item(Time(100), Time(250), 8, 9, 10, 11, 12, 13, 14),
+    ]
+    columns = Columns.from_items(items)
+    assert columns.start == array("l", [0, 100])
+    assert columns.end == array("l", [100, 250])
+    assert columns.left == array("d", [1, 8])
+    assert columns.width == array("d", [7, 14])
+    assert Columns.from_items([]).start == array("l")
+
+
+def test_karaoke_phases():
+    line = _Line(Time(1000), Time(3000))
+    columns = _columns([1000, 1500, 2500], [1500, 2500, 2980])
+    phases = karaoke_phases(line, columns, 50, 100, 200)
+    assert [list(times) for times in phases.sleep] == [
+        [1000, 1000, 1000],
+        [1000, 1500, 2500],
+    ]
+    assert list(phases.active[1]) == [1550, 2550, 2980]
+    assert list(phases.dead[0]) == [1550, 2550, 2980]
+    assert list(phases.in_[0]) == [900, 900, 900]
+    assert list(phases.out[1]) == [3200, 3200, 3200]
+
+
+def test_columns_numpy():
+    numpy = pytest.importorskip("numpy")
+    columns = _columns([0, 10], [10, 20])
+    arrays = columns.numpy()
+    assert arrays.end.dtype == numpy.dtype("l")
+    columns.end[0] = 15
+    assert arrays.end[0] == 15
+
+
+def test_fx_hooks():
+    class Effect(Fx):
+        def OnSyllable(self, syl):
+            pass
+
+        def OnLetterDead(self, let):
+            pass
+
+        def OnDialogueOut(self, diag):
+            pass
+
+    fx = Effect(_Generator([]))
+    assert [phase for phase, hook in fx._hooks("OnSyllable")] == ["active"]
+    assert [phase for phase, hook in fx._hooks("OnLetter")] == ["dead"]
+    assert [phase for phase, hook in fx._hooks("OnDialogue")] == ["out"]
+    assert Fx(_Generator([]))._hooks("OnSyllable") == []
+
+
+def test_fx_dispatch():
+    calls = []
+
+    class Effect(Fx):
+        def prepare(self, line):
+            calls.append(("prepare", line.start.ms))
+
+        def OnDialogueIn(self, diag):
+            calls.append(("in", self.index, diag.start.ms, diag.end.ms))
+            return diag
+
+        def OnSyllable(self, syl):
+            calls.append(("syl", self.index, syl.start.ms, syl.end.ms))
+            return [syl, syl.copy()]
+
+        def OnLetterDead(self, let):
+            calls.append(("dead", self.index, let.start.ms, let.end.ms))
+
+    sub = _Generator(_lines())
+    Effect(sub, delay=50, in_dur=200).run()
+    assert calls == [
+        ("prepare", 1000),
+        ("in", 0, 800, 1000),
+        ("syl", 0, 1000, 1450),
+        ("syl", 1, 1400, 1990),
+        ("dead", 0, 1450, 2000),
+        ("dead", 1, 1990, 2000),
+        ("prepare", 3000),
+        ("in", 0, 2800, 3000),
+        ("syl", 0, 3000, 3500),
+        ("dead", 0, 3500, 3500),
+    ]
+    # Single dialogs and lists of dialogs, in the order of the hooks
+    assert [(d.start.ms, d.end.ms) for d in sub.events] == [
+        (800, 1000),
+        (1000, 1450),
+        (1000, 1450),
+        (1400, 1990),
+        (1400, 1990),
+        (2800, 3000),
+        (3000, 3500),
+        (3000, 3500),
+    ]
+    # The items of the lines are copied, not changed
+    assert sub.lines[0].syls[0].end.ms == 1400
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import io
+
+from optimize import (
+    clamp_precision,
+    is_visible,
+    optimize_dialogs,
+    optimize_file,
+    optimize_text,
+)
+
+STYLE = (
+    "Style: Default,Arial,40,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,"
+    "0,0,0,0,100,100,0,0,1,2,0,5,10,10,10,1\n"
+)
+
+
+def test_optimize_text():
+    text = "{\\pos(10.123456,20)\\blur0}{\\blur2\\fad(0,0)}a{\\t(0,0,)}b"
+    assert optimize_text(text, 1000) == "{\\pos(10.12,20)\\blur2}ab"
+    assert optimize_text("{\\move(1,2,1,2)}a") == "{\\pos(1,2)}a"
+    assert optimize_text("{\\t(2000,3000,\\blur3)}a", 1000) == "a"
+    assert optimize_text("{comment}a") == "{comment}a"
+    assert clamp_precision("fscx", "\\fscx100.456") == "\\fscx100.46"
+
+
+def test_optimize_text_related_tags_with_style_defaults():
+    assert optimize_text("{\\xbord5\\bord2}abc", defaults={"bord": "2"}) == (
+        "{\\xbord5\\bord2}abc"
+    )
+    assert optimize_text("{\\yshad3\\shad0}abc", defaults={"shad": 0}) == (
+        "{\\yshad3\\shad0}abc"
+    )
+    assert optimize_text("{\\bord2\\xbord5}abc", defaults={"bord": 2}) == (
+        "{\\xbord5}abc"
+    )
+
+
+def test_is_visible():
+    assert is_visible("{\\pos(1,2)}")
+    assert is_visible("")
+    assert is_visible("{\\alpha&HFF&\\t(\\alpha&H00&)}a")
+    assert is_visible("{\\p1}m 0 0 l 10 0 10 10")
+    assert not is_visible("{\\alpha&HFF&}abc")
+    assert not is_visible("{\\alpha&HFF&\\p1}m 0 0 l 10 0 10 10")
+    assert not is_visible("abc", (0xFF, 0xFF, 0xFF, 0xFF))
+    assert is_visible("{\\1a&H00&}abc", (0xFF, 0xFF, 0xFF, 0xFF))
+
+
+def _dialog(start, end, text, comment=False):
+    style = {
+        "name": "Default",
+        "font": {"name": "Arial", "size": 40},
+        "color": {
+            "primary": "&H00FFFFFF",
+            "secondary": "&H000000FF",
+            "bord": "&H00000000",
+            "shadow": "&H00000000",
+        },
+        "bold": False,
+        "italic": False,
+        "scale": (100, 100),
+        "spacing": 0,
+        "bord": 2,
+        "shadow": 0,
+        "alignment": 5,
+    }
+    return {
+        "start": start,
+        "end": end,
+        "text": text,
+        "comment": comment,
+        "style": style,
+    }
+
+
+def test_optimize_dialogs_keeps_tag_only_events():
+    dialogs = [
+        _dialog("0:00:00.00", "0:00:01.00", "{\\pos(1,2)}"),
+        _dialog("0:00:00.00", "0:00:01.00", "{\\p1\\bord2}m 0 0 l 1 0 1 1"),
+        _dialog("0:00:01.00", "0:00:01.00", "zero"),
+        _dialog("0:00:00.00", "0:00:01.00", "{\\alpha&HFF&}hidden"),
+    ]
+    kept, report = optimize_dialogs(dialogs)
+    assert [d["text"] for d in kept] == ["{\\pos(1,2)}", "{\\p1}m 0 0 l 1 0 1 1"]
+    assert (report.zero_duration, report.invisible) == (1, 1)
+
+
+def test_optimize_file(tmp_path):
+    lines = [
+        "[V4+ Styles]\n",
+        STYLE,
+        "[Events]\n",
+        "Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\\bord2\\blur1}{\\an5}a\n",
+        "Dialogue: 0,0:00:00.00,0:00:00.00,Default,,0,0,0,,gone\n",
+        "Comment: 0,0:00:00.00,0:00:00.00,Default,,0,0,0,,{\\bord2}kept\n",
+    ]
+    source, target = tmp_path / "in.ass", tmp_path / "out.ass"
+    with io.open(str(source), "w", encoding="utf-8-sig") as f:
+        f.writelines(lines)
+    report = optimize_file(str(source), str(target))
+    with io.open(str(target), encoding="utf-8-sig") as f:
+        written = f.readlines()
+    assert written[3:] == [
+        "Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,{\\blur1}a\n",
+        "Comment: 0,0:00:00.00,0:00:00.00,Default,,0,0,0,,{\\bord2}kept\n",
+    ]
+    assert (report.events_before, report.events_after) == (3, 2)
+    assert report.bytes_after < report.bytes_before
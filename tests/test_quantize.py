@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+import color  # noqa: E402
+from quantize import (  # noqa: E402
+    drop_repeated_colors,
+    quantize_file,
+    quantize_tags,
+    quantize_texts,
+)
+
+
+def _gradient_texts(n=3):
+    line = "".join(
+        "{\\c&H%02X%02X%02X&}%s" % (i * 3 % 256, 100, 255 - i, char)
+        for i, char in enumerate("abcdefghijklmnopqrstuvwxyz")
+    )
+    return [line] * n
+
+
+def test_drop_repeated_colors():
+    text = (
+        "{\\c&H0000FF&}a{\\c&H0000FF&}b{\\1c&HFF&\\3c&H0&}c"
+        "{\\t(\\c&H00FF00&)}d{\\c&HFF&}e{\\r}f{\\c&HFF&}g{comment}"
+    )
+    assert drop_repeated_colors(text) == (
+        "{\\c&H0000FF&}ab{\\3c&H0&}c{\\t(\\c&H00FF00&)}d{\\c&HFF&}e{\\r}f"
+        "{\\c&HFF&}g{comment}"
+    )
+
+
+def test_quantize_tags_mapping():
+    mapping = {0x0000FE: "&H0000FF&"}
+    assert quantize_tags("{\\c&H0000FF&}a{\\c&H0000FE&}b", mapping) == (
+        "{\\c&H0000FF&}ab"
+    )
+    assert quantize_tags("no tags", mapping) == "no tags"
+
+
+def test_quantize_texts_error_budget_and_size():
+    texts = _gradient_texts()
+    new_texts, report = quantize_texts(texts, ncolors=8, max_error=0.05)
+    assert report.colors == 26
+    assert report.distinct <= 8 + report.kept
+    assert report.max_error <= 0.05
+    assert report.removed > 0
+    assert report.bytes_after < report.bytes_before
+    assert report.compressed_after < report.compressed_before
+    assert report.tags - report.removed == sum(t.count("\\c") for t in new_texts)
+
+
+def test_quantize_array_palette():
+    rgb = numpy.random.RandomState(1).randint(0, 256, (500, 3))
+    result = color.quantize_array(rgb, ncolors=16, max_error=0.5)
+    assert len(result.palette) <= 16
+    assert result.rgb.shape == (500, 3)
+    assert result.max_error <= 0.5
+
+
+def test_quantize_file_matches_texts(tmp_path):
+    texts = _gradient_texts()
+    lines = ["[Events]\n"] + [
+        "Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,%s\n" % text
+        for text in texts
+    ]
+    source, target = tmp_path / "in.ass", tmp_path / "out.ass"
+    with io.open(str(source), "w", encoding="utf-8-sig") as f:
+        f.writelines(lines)
+    report = quantize_file(str(source), str(target), ncolors=8, max_error=0.05)
+    new_texts, expected = quantize_texts(texts, ncolors=8, max_error=0.05)
+    with io.open(str(target), encoding="utf-8-sig") as f:
+        written = [line.rstrip("\n").split(",", 9)[9] for line in f if "," in line]
+    assert written == new_texts
+    assert report.removed == expected.removed
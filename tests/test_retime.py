@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import re
+
+from retime import retime_column, retime_dialogs, retime_factor, retime_tags
+
+
+def _karaoke(text):
+    return [int(value) for value in re.findall(r"\\(?:k[of]?|K)(\d+)", text)]
+
+
+def test_karaoke_rounding_does_not_accumulate():
+    text = "".join("{\\k3}syl" for _ in range(10))
+    durations = _karaoke(retime_tags(text, 1.5))
+    assert sum(durations) == 45
+    assert set(durations) <= {4, 5}
+
+
+def test_karaoke_total_follows_the_line():
+    text = "{\\k7}a{\\kf13}b{\\ko9}c{\\K11}d"
+    factor = retime_factor(source_fps=25, target_fps=24000 / 1001.0)
+    durations = _karaoke(retime_tags(text, factor))
+    assert sum(durations) == int(round(40 * factor))
+
+
+def test_retime_tags():
+    text = "{\\move(1,2,3,4,100,200)\\t(0,500,\\blur2)\\fad(150,250)}a"
+    assert retime_tags(text, 2) == (
+        "{\\move(1,2,3,4,200,400)\\t(0,1000,\\blur2)\\fad(300,500)}a"
+    )
+
+
+def test_retime_column_and_dialogs():
+    assert retime_column([0, 1000, 50], 2, -200) == [0, 1800, 0]
+    dialogs = [{"start": "0:00:01.00", "end": "0:00:02.00", "text": "{\\k50}a"}]
+    retime_dialogs(dialogs, shift=500, scale=2)
+    assert dialogs == [
+        {"start": "0:00:02.50", "end": "0:00:04.50", "text": "{\\k100}a"}
+    ]
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from shape import (  # noqa: E402
+    Shape,
+    ShapeCache,
+    flatten_beziers,
+    format_drawing,
+    rdp,
+    simplify_drawing,
+)
+
+SQUARE = "m 0 0 l 10 0 10 10 0 10"
+
+
+@pytest.mark.parametrize("drawing", ["0 0 l 1 1", "m 0 0 l 1", "m 0 x"])
+def test_invalid_drawings(drawing):
+    with pytest.raises(ValueError):
+        Shape.from_ass(drawing)
+
+
+def test_to_ass():
+    assert str(Shape.from_ass(SQUARE)) == SQUARE
+    shape = Shape.from_ass("m 0.125 -0.005 l 1.5 2.25 b 1 2 3 4 5 6 c")
+    assert shape.to_ass(2) == "m 0.12 0 l 1.5 2.25 b 1 2 3 4 5 6 c"
+    assert shape.to_ass(3) == "m 0.125 -0.005 l 1.5 2.25 b 1 2 3 4 5 6 c"
+
+
+def test_format_drawing_without_numpy():
+    shape = Shape.from_ass("m 0 0 l 1.005 2.675 -3.14159 4.5").scale(1.1)
+    values = shape.points.ravel().tolist()
+    assert format_drawing(shape.commands, values) == str(shape)
+
+
+def test_composed_transforms():
+    square = Shape.from_ass(SQUARE)
+    assert str(square.rotate(45).translate(100, 50)) == (
+        "m 105 47.93 l 112.07 55 105 62.07 97.93 55"
+    )
+    moved = square.scale(2, 3, origin=None).translate(1, 1)
+    assert moved.bbox == (-4.0, -9.0, 16.0, 21.0)
+    assert moved.size == (20.0, 30.0)
+    assert moved.center == (6.0, 6.0)
+    assert moved.move_to(0, 0).bbox == (0.0, 0.0, 20.0, 30.0)
+    assert str(square.flip()) == "m 10 0 l 0 0 0 10 10 10"
+    # The transforms return new shapes
+    assert str(square) == SQUARE
+    assert not square.points.flags.writeable
+
+
+def test_add():
+    shape = Shape.from_ass(SQUARE) + "m 2 2 l 4 2 4 4"
+    assert str(shape) == SQUARE + " m 2 2 l 4 2 4 4"
+    assert len(shape) == 7
+
+
+def test_flatten_beziers_tolerance():
+    p0, p1, p2, p3 = ([[x, y]] for x, y in ((0, 0), (0, 100), (100, 100), (100, 0)))
+    points, segments = flatten_beziers(p0, p1, p2, p3, tolerance=0.25)
+    assert len(points) == segments[0]
+    numpy.testing.assert_allclose(points[-1], [100, 0], atol=1e-9)
+    # Sample the curve finely, every point is near the polyline
+    t = numpy.linspace(0, 1, 2001)[:, None]
+    curve = (
+        (1 - t) ** 3 * p0[0]
+        + 3 * (1 - t) ** 2 * t * numpy.array(p1[0])
+        + 3 * (1 - t) * t**2 * numpy.array(p2[0])
+        + t**3 * numpy.array(p3[0])
+    )
+    polyline = numpy.vstack(([0, 0], points))
+    a, b = polyline[:-1], polyline[1:]
+    ab = b - a
+    u = ((curve[:, None] - a) * ab).sum(2) / (ab * ab).sum(1)
+    nearest = a + numpy.clip(u, 0, 1)[..., None] * ab
+    distance = numpy.hypot(*(curve[:, None] - nearest).T).min(0)
+    assert distance.max() <= 0.25
+
+
+def test_rdp():
+    points = [(0, 0), (1, 0.1), (2, 0), (3, 5), (4, 0)]
+    assert rdp(points, 0.25).tolist() == [True, False, True, True, True]
+    assert rdp(points, 10).tolist() == [True, False, False, False, True]
+    assert rdp([(0, 0), (1, 1)]).tolist() == [True, True]
+
+
+def test_simplify_drawing():
+    drawing, stats = simplify_drawing("m 0 0 l 1 0.01 2 0 4 0 4 4 0 4")
+    assert drawing == "m 0 0 l 4 0 4 4 0 4"
+    assert (stats.points_before, stats.points_after) == (6, 4)
+    # Scale 2: the coordinates are in half pixels, tolerance 0.5
+    assert simplify_drawing("m 0 0 l 2 0.4 4 0", scale=2)[0] == "m 0 0 l 4 0"
+    assert simplify_drawing("m 0 0 l 2 0.4 4 0")[0] == "m 0 0 l 2 0.4 4 0"
+
+
+def test_simplify_drawing_keeps_small_curves():
+    drawing = "m 0 0 b 0 100 100 100 100 0"
+    assert simplify_drawing(drawing)[0] == drawing
+    flat, stats = simplify_drawing(drawing, tolerance=100)
+    assert flat == "m 0 0 l 100 0"
+    assert stats.points_after == 2
+
+
+def test_shape_cache():
+    cache = ShapeCache(maxsize=2)
+    circle = cache.circle(5)
+    assert str(circle).startswith("m 5 0 b 2.2 0 0 2.2 0 5 ")
+    assert cache.circle(5.0001) is circle
+    cache.polygon(10, 3)
+    cache.star(5, 10, 5)  # evicts the circle
+    assert cache.cache_info() == (1, 3, 2, 2)
+    assert cache.circle(5) is not circle
+    assert str(cache.star(10, 5, 5)) == str(cache.star(5, 10, 5))
+    cache.cache_clear()
+    assert cache.cache_info() == (0, 0, 2, 0)
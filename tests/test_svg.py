@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import math
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from svg import (  # noqa: E402
+    SvgCache,
+    arc_to_beziers,
+    parse_path,
+    parse_transform,
+    path_to_shape,
+    svg_shapes,
+    svg_to_ass,
+)
+
+DOCUMENT = """<svg xmlns="http://www.w3.org/2000/svg">
+  <defs><rect id="hidden" width="5" height="5"/></defs>
+  <g transform="translate(10,20)" style="fill:#f00">
+    <rect id="box" width="10" height="5"/>
+    <line x1="0" y1="0" x2="5" y2="0" display="none"/>
+    <polygon points="0,0 4,0 4,4" fill="blue"/>
+  </g>
+</svg>"""
+
+
+def test_parse_path():
+    assert list(parse_path("M1,2 3 4l.5-1e1zh2")) == [
+        ("M", (1.0, 2.0)),
+        ("L", (3.0, 4.0)),
+        ("l", (0.5, -10.0)),
+        ("z", ()),
+        ("h", (2.0,)),
+    ]
+    # Compact arc flags
+    assert list(parse_path("a5 5 0 1110 10")) == [
+        ("a", (5.0, 5.0, 0.0, 1.0, 1.0, 10.0, 10.0))
+    ]
+
+
+@pytest.mark.parametrize("d", ["1 2", "M 1", "M 1 2 x", "A 1 1 0 2 0 1 1"])
+def test_parse_path_errors(d):
+    with pytest.raises(ValueError):
+        list(parse_path(d))
+
+
+def test_arc_to_beziers():
+    assert arc_to_beziers((0, 0), 5, 5, 0, 0, 1, (0, 0)) == []
+    assert arc_to_beziers((0, 0), 0, 5, 0, 0, 1, (10, 0)) is None
+    # Half circle of radius 5 centered at (5, 0): two quarters
+    curves = arc_to_beziers((0, 0), 5, 5, 0, 0, 1, (10, 0))
+    assert len(curves) == 2
+    assert curves[-1][2] == (10, 0)
+    (x, y) = curves[0][2]
+    assert abs(x - 5) < 1e-9 and abs(y + 5) < 1e-9
+    # Radii too small are scaled up: the same half circle
+    assert arc_to_beziers((0, 0), 1, 1, 0, 0, 1, (10, 0)) == pytest.approx(curves)
+
+
+def test_arc_points_on_the_circle():
+    # Large arc of radius 5 centered at (0, 5), rotated ellipse axes
+    p0 = (0.0, 0.0)
+    curves = arc_to_beziers(p0, 5, 5, 30, 1, 0, (5, 5))
+    assert len(curves) == 3
+    for c1, c2, p in curves:
+        x, y = (0.125 * (p0[i] + p[i]) + 0.375 * (c1[i] + c2[i]) for i in (0, 1))
+        assert abs(math.hypot(x, y - 5) - 5) < 0.01
+        p0 = p
+
+
+def test_path_to_shape():
+    assert str(path_to_shape("M 0 0 H 10 V 10 Q 0 10 0 0 Z")) == (
+        "m 0 0 l 10 0 10 10 b 3.33 10 0 6.67 0 0"
+    )
+    # Relative commands, smooth curve with the reflected control point
+    assert str(path_to_shape("m 1 1 l 2 0 c 1 1 2 1 3 0 s 2 -1 3 0")) == (
+        "m 1 1 l 3 1 b 4 2 5 2 6 1 7 0 8 0 9 1"
+    )
+    # Drawing after a closepath starts at the subpath start
+    assert str(path_to_shape("M 1 1 L 5 1 Z L 1 5")) == "m 1 1 l 5 1 m 1 1 l 1 5"
+    # Arc with a zero radius: a line
+    assert str(path_to_shape("M 0 0 A 0 5 0 0 1 10 0")) == "m 0 0 l 10 0"
+
+
+def test_parse_transform():
+    matrix = parse_transform("translate(10) scale(2, 3)")
+    assert matrix.dot([1, 1, 1]).tolist() == [12, 3, 1]
+    matrix = parse_transform("rotate(90 5 5)")
+    numpy.testing.assert_allclose(matrix.dot([5, 0, 1]), [10, 5, 1], atol=1e-12)
+    assert parse_transform(None).tolist() == numpy.identity(3).tolist()
+
+
+def test_svg_shapes(tmp_path):
+    path = tmp_path / "test.svg"
+    path.write_text(DOCUMENT)
+    shapes = list(svg_shapes(str(path)))
+    assert [(s.tag, s.id, s.fill) for s in shapes] == [
+        ("rect", "box", "#f00"),
+        ("polygon", None, "blue"),
+    ]
+    assert str(shapes[0].shape) == "m 10 20 l 20 20 20 25 10 25"
+    assert str(shapes[1].shape) == "m 10 20 l 14 20 14 24"
+
+
+def test_svg_to_ass_and_cache(tmp_path):
+    assert svg_to_ass("M 0 0 L 1 0.01 2 0 4 0", tolerance=0.25) == "m 0 0 l 4 0"
+    cache = SvgCache(maxsize=1, cache_dir=str(tmp_path / "cache"))
+    drawing = cache.drawing(DOCUMENT)
+    assert drawing == "m 10 20 l 20 20 20 25 10 25 m 10 20 l 14 20 14 24"
+    assert cache.drawing(DOCUMENT.encode("utf-8")) == drawing
+    assert cache.cache_info() == (1, 1, 1, 1)
+    # Another cache reads the file of the same document
+    other = SvgCache(cache_dir=str(tmp_path / "cache"))
+    assert other.drawing(DOCUMENT) == drawing
+    assert other.cache_info() == (1, 0, 64, 1)
+    assert svg_to_ass(DOCUMENT, cache=None) == drawing
+
+
+@pytest.mark.parametrize("name", ["logo.svg", "mask.svg", "circle.svg", "pic.svg"])
+def test_svg_to_ass_relative_filename(tmp_path, monkeypatch, name):
+    (tmp_path / name).write_text(DOCUMENT)
+    monkeypatch.chdir(tmp_path)
+    drawing = "m 10 20 l 20 20 20 25 10 25 m 10 20 l 14 20 14 24"
+    assert svg_to_ass(name, cache=None) == drawing
+    # Not a file and not path data: the file is missing
+    with pytest.raises(IOError):
+        svg_to_ass("l" + name, cache=None)
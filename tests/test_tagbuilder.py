@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from tagbuilder import DEFAULTS, TagBuilder, parse_tags, style_defaults
+
+
+def _style():
+    return {
+        "name": "Default",
+        "font": {"name": "Arial", "size": 40},
+        "color": {
+            "primary": "&H00FFFFFF",
+            "secondary": "&H000000FF",
+            "bord": "&H00000000",
+            "shadow": "&H80000000",
+        },
+        "bold": False,
+        "italic": False,
+        "scale": (100, 100),
+        "spacing": 0,
+        "bord": 2,
+        "shadow": 0,
+        "alignment": 2,
+    }
+
+
+def test_parse_tags():
+    assert parse_tags("\\pos(1,2)\\t(\\blur2)\\c&HFF&") == [
+        ("pos", "\\pos(1,2)"),
+        ("t", "\\t(\\blur2)"),
+        ("c", "\\c&HFF&"),
+    ]
+    assert parse_tags("\\fscx50\\fs20") == [("fscx", "\\fscx50"), ("fs", "\\fs20")]
+
+
+def test_defaults_extend_the_base_defaults():
+    tags = TagBuilder(defaults={"blur": 0, "an": 5})
+    tags.add("\\pos(10,20)\\blur0\\an5\\frz0\\blur2\\pos(0,0)")
+    assert tags.build() == "\\pos(10,20)\\blur2"
+    assert TagBuilder({"blur": 1}).defaults["frz"] == DEFAULTS["frz"]
+    assert TagBuilder({"blur": 1}, base=None).defaults == {"blur": 1}
+    assert TagBuilder(base=None).add("\\frz0").build() == "\\frz0"
+
+
+def test_first_wins_and_last_wins():
+    tags = TagBuilder(base=None).add("\\pos(1,2)\\blur1\\move(0,0,1,1)\\blur3")
+    assert tags.build() == "\\pos(1,2)\\blur3"
+    seen = set()
+    assert TagBuilder(base=None).add("\\an7\\fad(1,2)").build(seen) == "\\an7\\fad(1,2)"
+    assert TagBuilder(base=None).add("\\an8\\fade(1,2)\\blur1").build(seen) == "\\blur1"
+
+
+def test_transform_keeps_defaults():
+    tags = TagBuilder().add("\\blur0\\t(\\blur5)\\blur0")
+    assert tags.build() == "\\t(\\blur5)\\blur0"
+
+
+def test_border_and_shadow_groups():
+    defaults = style_defaults(_style())
+    assert TagBuilder(defaults).add("\\xbord5\\bord2").build() == "\\xbord5\\bord2"
+    assert TagBuilder(defaults).add("\\bord2\\xbord5").build() == "\\xbord5"
+    assert TagBuilder(defaults).add("\\yshad3\\shad0").build() == "\\yshad3\\shad0"
+    assert TagBuilder(defaults).add("\\xshad3\\shad0\\bord2").build() == (
+        "\\xshad3\\shad0"
+    )
+
+
+def test_style_defaults():
+    defaults = style_defaults(_style(), alignment=5)
+    assert defaults["1c"] == 0xFFFFFF
+    assert defaults["4c"] == 0
+    assert defaults["an"] == 5
+    tags = TagBuilder(defaults).add("\\c&HFFFFFF&\\fnArial\\fs40\\an5\\3c&H0000FF&")
+    assert tags.build() == "\\3c&H0000FF&"
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from color import Color
+from tagtemplate import TagTemplate, tag_template
+
+
+def test_formatters():
+    template = tag_template("\\pos({x},{y})\\blur{b}\\c{col}\\an1")
+    assert template(x=10.5, y=20, b=2, col="ff0000") == (
+        "\\pos(10.5,20)\\blur2\\c&H0000FF&\\an1"
+    )
+    template = TagTemplate(
+        "\\move({x1},{y1},{x2},{y2},{t1},{t2})\\fscx{sx}\\1a{a}\\3c{c}"
+    )
+    assert template(1.23456, 2, 3, 4, 10.6, 20.2, 99.1, 128, Color(0, 0, 255)) == (
+        "\\move(1.2346,2,3,4,11,20)\\fscx100\\1a&H80&\\3c&HFF0000&"
+    )
+    # Alpha strings: decimal, else hexadecimal (as asstags)
+    assert TagTemplate("\\alpha{a}")(a="FF") == "\\alpha&HFF&"
+
+
+def test_transform_arguments():
+    template = TagTemplate("\\pos({x},{y})\\t(0,{t},\\frz{angle})")
+    assert template.names == ("x", "y", "t", "angle")
+    assert template(12, 30.25, 500, 90) == "\\pos(12,30.25)\\t(0,500,\\frz90)"
+    assert template(12, 30.25, 500, 12.123456789) == (
+        "\\pos(12,30.25)\\t(0,500,\\frz12.12345679)"
+    )
+
+
+def test_placeholders_out_of_tags():
+    template = TagTemplate("{\\p1}{shape} {x:.1f} {x}")
+    assert template.names == ("shape", "x")
+    assert template(shape="m 0 0 l 1 1", x=1.25) == "{\\p1}m 0 0 l 1 1 1.2 1.25"
+
+
+def test_values():
+    template = TagTemplate("\\blur{b}\\bord{b}")
+    assert template.render({"b": 1.5}) == "\\blur1.5\\bord1.5"
+    with pytest.raises(TypeError):
+        template(1, 2)
+    with pytest.raises(KeyError):
+        template()
+
+
+def test_cache():
+    assert tag_template("\\fs{size}") is tag_template("\\fs{size}")